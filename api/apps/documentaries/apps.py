@@ -5,3 +5,6 @@ class DocumentariesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.documentaries"
     verbose_name = "Documentaries"
+
+    def ready(self):
+        import apps.documentaries.signals  # noqa: F401
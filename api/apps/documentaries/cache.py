@@ -0,0 +1,73 @@
+"""
+Versioned cache namespaces.
+
+Cached data derived from the catalog is stored under keys that embed the
+current version of a namespace. Signals bump the version whenever the
+underlying rows change, which invalidates every key of that namespace at
+once without having to know or delete them; stale entries simply expire.
+
+Versions are nanosecond timestamps of the last change, so they also serve as
+a cheap "last modified" marker. The cache must be shared between workers
+(CACHE_URL) for invalidation to reach all of them.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Documentaries, their tags and availabilities
+CATALOG = "catalog"
+# Sports, themes, regions, platforms and people
+TAXONOMY = "taxonomy"
+# Review-derived data (rating summaries)
+RATINGS = "ratings"
+# Time-decayed trending scores (trending.py)
+TRENDING = "trending"
+# Precomputed recommendations (related documentaries, also liked, for you)
+RECOMMENDATIONS = "recommendations"
+# Search data built by commands (spelling dictionary, semantic index)
+SEARCH = "search"
+
+
+def library_namespace(user_id):
+    """Namespace of one user's watchlist, watched list and favorites."""
+    return f"library.{user_id}"
+
+
+def _version_key(namespace):
+    return f"bivouac:version:{namespace}"
+
+
+def get_version(namespace):
+    """Current version of namespace, initialised on first use."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every key of namespace."""
+    cache.set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(namespace):
+    """
+    Invalidate namespace once the current transaction commits.
+
+    Bumping earlier would let a concurrent request recompute data from the
+    rows committed so far and cache it under the new version, where it would
+    stay until the next bump. Outside a transaction this bumps right away.
+    """
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+def versioned_key(namespaces, *parts):
+    """Cache key that changes whenever one of namespaces is bumped."""
+    if isinstance(namespaces, str):
+        namespaces = [namespaces]
+    versions = [f"{namespace}.{get_version(namespace)}" for namespace in namespaces]
+    return ":".join(["bivouac", *versions, *map(str, parts)])
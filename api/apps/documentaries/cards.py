@@ -0,0 +1,168 @@
+"""
+Fast-path serialization of documentary cards.
+
+DocumentaryListSerializer goes through DRF's field machinery for every card
+(nested SportSerializer, method fields, ImageField URL building), which
+dominates CPU time on large list responses. serialize_cards builds the same
+dicts straight from values() rows: one query for the cards, one for their
+sports and the LibraryState lookups. The output must stay byte-identical to
+DocumentaryListSerializer; tests/test_cards.py checks it.
+
+Both functions take the ?fields=/?expand= selection (see
+SparseFieldsetMixin): unrequested columns are not selected and the sports,
+library or expanded relation queries only run when their field is wanted.
+"""
+
+from collections import defaultdict
+
+from .library import LibraryState
+from .models import Documentary
+from .offers import current_offers, request_country
+from .serializers import (
+    AvailabilitySerializer,
+    DocumentaryListSerializer,
+    PersonSerializer,
+    RegionSerializer,
+    ThemeSerializer,
+)
+
+# Card field -> values() column it is built from
+CARD_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "slug": "slug",
+    "year": "year",
+    "duration_minutes": "duration_minutes",
+    "poster": "poster",
+    "average_rating": "rating_summary__average_rating",
+    "review_count": "rating_summary__review_count",
+}
+LIBRARY_FIELDS = ("is_in_watchlist", "is_watched", "is_favorited")
+# Expandable tag relation -> serializer of the related objects
+EXPANDABLE_TAGS = {
+    "themes": ThemeSerializer,
+    "regions": RegionSerializer,
+    "directors": PersonSerializer,
+}
+
+
+def card_rows(queryset, fields=None):
+    """
+    queryset as values() rows carrying the columns of the requested fields.
+
+    Ordering and annotation columns are kept so the rows can still be
+    paginated (keyset cursors read them from the rows).
+    """
+    fields = fields or DocumentaryListSerializer.default_fields()
+    columns = ["id", "pk", *(CARD_COLUMNS[name] for name in fields if name in CARD_COLUMNS)]
+    for field in queryset.query.order_by or queryset.model._meta.ordering:
+        if isinstance(field, str) and field != "?":
+            name = field.lstrip("-")
+            if "__" not in name:
+                columns.append(name)
+    columns = list(dict.fromkeys(columns))
+    return queryset.prefetch_related(None).values(*columns, *queryset.query.annotations)
+
+
+def card_rows_in_order(queryset, ids, fields=None):
+    """Card rows of the documentaries with the given IDs, in the order of ids."""
+    position = {pk: index for index, pk in enumerate(ids)}
+    rows = card_rows(queryset.filter(pk__in=ids).order_by(), fields)
+    return sorted(rows, key=lambda row: position[row["id"]])
+
+
+def _sports_by_documentary(documentary_ids):
+    """Serialized sports of each documentary, in SportSerializer order."""
+    rows = (
+        Documentary.sports.through.objects.filter(documentary_id__in=documentary_ids)
+        .order_by("sport__name")
+        .values_list("documentary_id", "sport_id", "sport__name", "sport__slug", "sport__icon")
+    )
+    sports = defaultdict(list)
+    for documentary_id, pk, name, slug, icon in rows:
+        sports[documentary_id].append({"id": pk, "name": name, "slug": slug, "icon": icon})
+    return sports
+
+
+def _tags_by_documentary(relation, documentary_ids, context):
+    """Serialized related objects of an expanded M2M relation, per documentary."""
+    field = Documentary._meta.get_field(relation)
+    through = field.remote_field.through
+    target = field.m2m_reverse_field_name()
+    pairs = through.objects.filter(documentary_id__in=documentary_ids).values_list(
+        "documentary_id", f"{target}_id"
+    )
+    related_ids = defaultdict(set)
+    for documentary_id, related_id in pairs:
+        related_ids[documentary_id].add(related_id)
+
+    # Serialize each related object once, in the model's default ordering
+    objects = field.related_model.objects.filter(
+        pk__in={pk for ids in related_ids.values() for pk in ids}
+    )
+    serialized = EXPANDABLE_TAGS[relation](objects, many=True, context=context).data
+    return {
+        documentary_id: [item for item in serialized if item["id"] in ids]
+        for documentary_id, ids in related_ids.items()
+    }
+
+
+def _availabilities_by_documentary(documentary_ids, context):
+    """Serialized offers of each documentary valid in the request's country."""
+    request = context["request"]
+    country = request_country(request) if request is not None else None
+    offers = current_offers(country).filter(documentary_id__in=documentary_ids).select_related("platform")
+    availabilities = defaultdict(list)
+    serialized = AvailabilitySerializer(offers, many=True, context=context).data
+    for offer, data in zip(offers, serialized, strict=True):
+        availabilities[offer.documentary_id].append(data)
+    return availabilities
+
+
+def serialize_cards(rows, request=None, library_state=None, fields=None):
+    """DocumentaryListSerializer(many=True) output for card rows."""
+    fields = fields or DocumentaryListSerializer.default_fields()
+    rows = list(rows)
+    ids = [row["id"] for row in rows]
+    context = {"request": request}
+
+    if any(name in LIBRARY_FIELDS for name in fields) and (
+        library_state is None or not all(library_state.covers(pk) for pk in ids)
+    ):
+        library_state = LibraryState(request.user if request else None, ids)
+    related = {}
+    if "sports" in fields:
+        related["sports"] = _sports_by_documentary(ids)
+    for relation in EXPANDABLE_TAGS:
+        if relation in fields:
+            related[relation] = _tags_by_documentary(relation, ids, context)
+    if "availabilities" in fields:
+        related["availabilities"] = _availabilities_by_documentary(ids, context)
+
+    storage = Documentary._meta.get_field("poster").storage
+
+    def poster(row):
+        if not row["poster"]:
+            return None
+        url = storage.url(row["poster"])
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def average_rating(row):
+        value = row["rating_summary__average_rating"]
+        return round(value, 1) if value else None
+
+    builders = {
+        "poster": poster,
+        "average_rating": average_rating,
+        "review_count": lambda row: row["rating_summary__review_count"] or 0,
+        "is_in_watchlist": lambda row: library_state.is_in_watchlist(row["id"]),
+        "is_watched": lambda row: library_state.is_watched(row["id"]),
+        "is_favorited": lambda row: library_state.is_favorited(row["id"]),
+    }
+    for name in ("id", "title", "slug", "year", "duration_minutes"):
+        builders[name] = (lambda column: lambda row: row[column])(name)
+    for name, by_documentary in related.items():
+        builders[name] = (lambda items: lambda row: items.get(row["id"], []))(by_documentary)
+
+    selected = [(name, builders[name]) for name in fields]
+    return [{name: build(row) for name, build in selected} for row in rows]
@@ -0,0 +1,122 @@
+"""
+Conditional GET for read endpoints.
+
+ETag and Last-Modified are derived from the versions of the cache namespaces
+a view depends on (see cache.py), and from the date for views whose content
+changes at midnight, so validating a request costs a few cache reads. A matching If-None-Match (or If-Modified-Since) is answered with an
+empty 304 right after authentication, before any query or serializer runs.
+"""
+
+import hashlib
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_version, library_namespace
+
+# Browser/CDN freshness of anonymous responses, in seconds
+ANONYMOUS_MAX_AGE = 60
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified / 304 support for APIViews and ViewSets.
+
+    version_namespaces lists the namespaces the response content depends on;
+    get_version_namespaces() may return None to opt an action out (e.g.
+    random picks). When per_user is set, authenticated users also depend on
+    their own library namespace since cards carry their watchlist/watched/
+    favorite flags. Views setting date_dependent (current offers, dated
+    rails) also get new validators every day.
+    """
+
+    version_namespaces = []
+    per_user = True
+    date_dependent = False
+    # Request headers the representation depends on
+    vary_headers = ["Accept", "Accept-Language"]
+
+    def get_version_namespaces(self):
+        namespaces = list(self.version_namespaces)
+        if self.per_user and self.request.user.is_authenticated:
+            namespaces.append(library_namespace(self.request.user.pk))
+        return namespaces
+
+    def get_vary_headers(self):
+        return list(self.vary_headers)
+
+    def get_validators(self, request):
+        """(etag, last_modified timestamp) of the current representation, or None."""
+        namespaces = self.get_version_namespaces()
+        if not namespaces:
+            return None
+        versions = [get_version(namespace) for namespace in namespaces]
+        last_modified = max(versions) // 1_000_000_000
+        if self.date_dependent:
+            today = timezone.localdate()
+            midnight = datetime.combine(today, time.min, tzinfo=timezone.get_current_timezone())
+            last_modified = max(last_modified, int(midnight.timestamp()))
+            versions.append(today.isoformat())
+        payload = "|".join([
+            request.get_full_path(),
+            *(request.headers.get(header, "") for header in self.get_vary_headers()),
+            str(request.user.pk or "") if self.per_user else "",
+            *map(str, versions),
+        ])
+        etag = quote_etag(hashlib.sha1(payload.encode(), usedforsecurity=False).hexdigest())
+        return etag, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ("GET", "HEAD"):
+            return
+
+        self.validators = self.get_validators(request)
+        if self.validators is None:
+            return
+
+        etag, last_modified = self.validators
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]
+            if "*" in etags or etag in etags:
+                raise NotModified
+            return
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if if_modified_since is not None and last_modified <= if_modified_since:
+            raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "validators", None)
+        if validators is None or response.status_code not in (200, 304):
+            return response
+
+        etag, last_modified = validators
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, self.get_vary_headers())
+        if self.per_user:
+            patch_vary_headers(response, ["Authorization", "Cookie"])
+        patch_cache_control(response, **self.get_cache_control(request))
+        return response
+
+    def get_cache_control(self, request):
+        """Cache-Control directives of successful responses."""
+        if self.per_user and request.user.is_authenticated:
+            return {"private": True, "no_cache": True}
+        return {"public": True, "max_age": ANONYMOUS_MAX_AGE}
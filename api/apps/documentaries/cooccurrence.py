@@ -0,0 +1,233 @@
+"""
+"People who liked this also liked": item-item collaborative filtering.
+
+Every user is a binary row over documentaries: 1 where they watched,
+favorited, watchlisted or positively reviewed it. The documentary x
+documentary co-occurrence counts are C = A.T @ A, accumulated over chunks of
+USER_CHUNK_SIZE users so only one chunk of A is ever in memory, whatever the
+number of users. Scores are cosine-normalized counts,
+C[i, j] / sqrt(C[i, i] * C[j, j]), ignoring pairs shared by fewer than
+MIN_COOCCURRENCE users, and the top ALSO_LIKED_COUNT published neighbours of
+every documentary are stored in AlsoLikedDocumentary.
+
+Matrices are indexed by documentary ID. The counts are kept in
+RECOMMENDATIONS_DIR together with the time they were computed up to, so
+update_cooccurrence only folds in the library rows created since then:
+for each user with new rows, C += N.T @ N + O.T @ N + N.T @ O (O their
+previous documentaries, N the new ones). Deleted rows are only forgotten by
+a full rebuild (build_cooccurrence), which should run periodically. Both
+bump the RECOMMENDATIONS cache version once the new lists are committed.
+
+Counts are only computed up to EVENT_SETTLE_SECONDS ago: rows are timestamped
+before their transaction commits, and one committed after a run must still
+fall in the next run's window.
+"""
+
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+import numpy as np
+from scipy import sparse
+
+from apps.reviews.models import Review
+
+from .cache import RECOMMENDATIONS, bump_version_on_commit
+from .datafiles import data_path, write_atomically
+from .models import AlsoLikedDocumentary, Documentary, Favorite, Watched, Watchlist
+from .similarity import best_entries
+
+ALSO_LIKED_COUNT = 12
+
+# Reviews from this rating up count as liking the documentary
+POSITIVE_RATING = 4
+
+# Pairs shared by fewer users are noise, not a signal
+MIN_COOCCURRENCE = 2
+
+# Users per chunk of the user x documentary matrix
+USER_CHUNK_SIZE = 5000
+# Documentaries per chunk when ranking neighbours
+ITEM_CHUNK_SIZE = 500
+
+# (model, creation timestamp field, extra filters) of each library signal
+SOURCES = [
+    (Watched, "watched_at", {}),
+    (Favorite, "added_at", {}),
+    (Watchlist, "added_at", {}),
+    (Review, "created_at", {"rating__gte": POSITIVE_RATING}),
+]
+
+
+def _settled_until():
+    """Library rows created before this are committed (or rolled back) by now."""
+    return timezone.now() - timedelta(seconds=settings.EVENT_SETTLE_SECONDS)
+
+
+def _state_path():
+    return data_path("cooccurrence.npz")
+
+
+def _save_counts(counts, computed_until):
+    """Store the counts and their watermark in one file, replaced atomically."""
+    write_atomically(_state_path(), partial(
+        np.savez,
+        data=counts.data, indices=counts.indices, indptr=counts.indptr,
+        shape=np.asarray(counts.shape), computed_until=np.asarray(computed_until.isoformat()),
+    ))
+
+
+def _load_counts():
+    """(counts, watermark) of the last run, or None."""
+    path = _state_path()
+    if not path.exists():
+        return None
+    with np.load(path) as state:
+        counts = sparse.csr_matrix(
+            (state["data"], state["indices"], state["indptr"]), shape=tuple(state["shape"])
+        )
+        return counts, datetime.fromisoformat(str(state["computed_until"]))
+
+
+def _interactions(users, since=None, until=None):
+    """(user ID, documentary ID) pairs of the users matching the users filter."""
+    pairs = []
+    for model, timestamp, filters in SOURCES:
+        queryset = model.objects.filter(**users, **filters)
+        if since is not None:
+            queryset = queryset.filter(**{f"{timestamp}__gte": since})
+        if until is not None:
+            queryset = queryset.filter(**{f"{timestamp}__lt": until})
+        pairs += queryset.values_list("user_id", "documentary_id")
+    return pairs
+
+
+def _user_matrix(pairs, user_index, size):
+    """Binary user x documentary CSR matrix, one row per user of user_index."""
+    rows = [user_index[user_id] for user_id, _ in pairs]
+    cols = [documentary_id for _, documentary_id in pairs]
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (rows, cols)), shape=(len(user_index), size)
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def _size():
+    """Matrix dimension: highest documentary ID + 1."""
+    return (Documentary.objects.aggregate(Max("pk"))["pk__max"] or 0) + 1
+
+
+def _store(counts, rows, count):
+    """Replace the stored neighbours of the documentaries rows."""
+    published = np.zeros(counts.shape[0], dtype=np.float32)
+    published_ids = Documentary.objects.filter(is_published=True).values_list("pk", flat=True)
+    published[[pk for pk in published_ids if pk < counts.shape[0]]] = 1
+
+    item_counts = counts.diagonal().astype(np.float32)
+    inverse_norms = np.divide(
+        1, np.sqrt(item_counts), out=np.zeros_like(item_counts), where=item_counts > 0
+    )
+    # Only published documentaries are recommended
+    column_scale = sparse.diags(inverse_norms * published)
+
+    entries = []
+    for start in range(0, len(rows), ITEM_CHUNK_SIZE):
+        chunk = rows[start:start + ITEM_CHUNK_SIZE]
+        block = counts[chunk].astype(np.float32)
+        block.data[block.data < MIN_COOCCURRENCE] = 0
+        block.eliminate_zeros()
+        scores = (sparse.diags(inverse_norms[chunk]) @ block @ column_scale).tocsr()
+        for row, neighbours, values in best_entries(scores, chunk, count):
+            entries += [
+                AlsoLikedDocumentary(
+                    documentary_id=int(row), related_id=int(neighbour), rank=rank, score=float(score)
+                )
+                for rank, (neighbour, score) in enumerate(zip(neighbours, values, strict=True))
+            ]
+
+    AlsoLikedDocumentary.objects.filter(documentary_id__in=[int(row) for row in rows]).delete()
+    AlsoLikedDocumentary.objects.bulk_create(entries, batch_size=1000)
+
+
+@transaction.atomic
+def build_cooccurrence(count=ALSO_LIKED_COUNT):
+    """Recount co-occurrences from scratch and rebuild every neighbour list."""
+    computed_until = _settled_until()
+    size = _size()
+    counts = sparse.csr_matrix((size, size), dtype=np.int32)
+
+    bounds = get_user_model().objects.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is not None:
+        for start in range(bounds["low"], bounds["high"] + 1, USER_CHUNK_SIZE):
+            pairs = _interactions(
+                {"user_id__gte": start, "user_id__lt": start + USER_CHUNK_SIZE}, until=computed_until
+            )
+            user_index = {user_id: row for row, user_id in enumerate(dict.fromkeys(u for u, _ in pairs))}
+            users = _user_matrix(pairs, user_index, size)
+            counts = counts + (users.T @ users).tocsr()
+
+    AlsoLikedDocumentary.objects.all().delete()
+    rows = sorted(Documentary.objects.filter(is_published=True).values_list("pk", flat=True))
+    _store(counts, rows, count)
+    # Saved last: a failed run leaves the previous state to resume from
+    _save_counts(counts, computed_until)
+    bump_version_on_commit(RECOMMENDATIONS)
+    return len(rows)
+
+
+@transaction.atomic
+def update_cooccurrence(count=ALSO_LIKED_COUNT):
+    """
+    Fold the library rows created since the last run into the counts.
+
+    Recomputes the lists of documentaries whose counts changed and the lists
+    that contained one of them. Runs a full build when there is no previous
+    state.
+    """
+    state = _load_counts()
+    if state is None:
+        return build_cooccurrence(count)
+    counts, since = state
+    computed_until = max(_settled_until(), since)
+
+    size = max(_size(), counts.shape[0])
+    counts.resize((size, size))
+
+    new_pairs = _interactions({}, since=since, until=computed_until)
+    user_ids = sorted({user_id for user_id, _ in new_pairs})
+    changed = np.zeros(size, dtype=bool)
+    for start in range(0, len(user_ids), USER_CHUNK_SIZE):
+        chunk = user_ids[start:start + USER_CHUNK_SIZE]
+        user_index = {user_id: row for row, user_id in enumerate(chunk)}
+        old = _user_matrix(_interactions({"user_id__in": chunk}, until=since), user_index, size)
+        new = _user_matrix(
+            [pair for pair in new_pairs if pair[0] in user_index], user_index, size
+        )
+        # A documentary is new to a user only if no older row had it
+        new = (new - new.multiply(old)).tocsr()
+        new.eliminate_zeros()
+
+        delta = (new.T @ new + old.T @ new + new.T @ old).tocsr()
+        counts = (counts + delta).tocsr()
+        changed[np.diff(delta.indptr) > 0] = True
+
+    changed_ids = np.flatnonzero(changed).tolist()
+    listing = AlsoLikedDocumentary.objects.filter(related_id__in=changed_ids).values_list(
+        "documentary_id", flat=True
+    )
+    published = set(
+        Documentary.objects.filter(is_published=True).values_list("pk", flat=True)
+    )
+    rows = sorted((set(changed_ids) | set(listing)) & published)
+    if rows:
+        _store(counts, rows, count)
+        bump_version_on_commit(RECOMMENDATIONS)
+    _save_counts(counts, computed_until)
+    return len(rows)
@@ -0,0 +1,42 @@
+"""
+Precomputed data files under RECOMMENDATIONS_DIR.
+
+Recommendation matrices, the semantic index and the spelling dictionary are
+built by management commands and read by every worker, often memory-mapped.
+Files are never rewritten in place: write_atomically writes a temporary file
+next to the target and renames it over the target, so readers only ever see
+the previous file or the complete new one.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def data_directory():
+    return Path(settings.RECOMMENDATIONS_DIR)
+
+
+def data_path(name):
+    return data_directory() / name
+
+
+def write_atomically(path, write):
+    """
+    Create or replace path with what write(file) writes to a binary file.
+
+    mkstemp creates its files readable by their owner only; the file gets
+    regular permissions so workers running as another user can read it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            write(file)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,132 @@
+"""
+Facet counts for the Browse page.
+
+Counts are computed for the documentaries matching the current filters with
+one grouped aggregate query per dimension (never one query per option), and
+cached under the normalized filter signature until the catalog or taxonomy
+changes, or the day (and so the current offers) does. Counts for ?semantic=
+queries also depend on the semantic index, and are recomputed after a rebuild.
+"""
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .cache import CATALOG, SEARCH, TAXONOMY, versioned_key
+from .models import Documentary
+from .offers import current_offers
+
+FACETS_CACHE_TIMEOUT = 60 * 60
+
+# (key, min minutes inclusive, max minutes exclusive)
+DURATION_BUCKETS = [
+    ("short", None, 30),
+    ("medium", 30, 60),
+    ("feature", 60, 90),
+    ("long", 90, None),
+]
+
+
+def _normalize(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, list | tuple):
+        return sorted(_normalize(item) for item in value)
+    return value
+
+
+def filter_signature(cleaned_data):
+    """Stable hash of the filter values actually in use."""
+    active = {
+        name: _normalize(value)
+        for name, value in cleaned_data.items()
+        if value not in (None, "", [])
+    }
+    payload = json.dumps(active, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def _grouped_counts(queryset, related):
+    """Documentary count per related object, as id/slug/name/count dicts."""
+    rows = (
+        queryset.values_list(f"{related}_id", f"{related}__slug", f"{related}__name")
+        .annotate(count=Count("documentary_id", distinct=True))
+        .order_by("-count", f"{related}__name")
+    )
+    return [
+        {"id": pk, "slug": slug, "name": name, "count": count}
+        for pk, slug, name, count in rows
+    ]
+
+
+def compute_facets(queryset, offers=None):
+    """
+    Facet counts for the documentaries in queryset.
+
+    The free and platform counts only look at offers (current offers by default).
+    """
+    documentary_ids = queryset.order_by().values("pk")
+    matching = Documentary.objects.filter(pk__in=documentary_ids)
+    if offers is None:
+        offers = current_offers()
+
+    def tagged(model):
+        return model.objects.filter(documentary_id__in=documentary_ids)
+
+    free_offer = offers.filter(documentary=OuterRef("pk"), is_free=True)
+    bucket_filters = {}
+    for key, low, high in DURATION_BUCKETS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(duration_minutes__gte=low)
+        if high is not None:
+            condition &= Q(duration_minutes__lt=high)
+        bucket_filters[key] = condition
+    totals = matching.aggregate(
+        count=Count("pk"),
+        free=Count("pk", filter=Q(Exists(free_offer))),
+        **{f"duration_{key}": Count("pk", filter=condition) for key, condition in bucket_filters.items()},
+    )
+
+    decades = list(
+        matching.order_by()
+        .values(decade=F("year") / 10 * 10)
+        .annotate(count=Count("pk"))
+        .order_by("-decade")
+    )
+
+    return {
+        "count": totals["count"],
+        "free": totals["free"],
+        "sports": _grouped_counts(tagged(Documentary.sports.through), "sport"),
+        "themes": _grouped_counts(tagged(Documentary.themes.through), "theme"),
+        "regions": _grouped_counts(tagged(Documentary.regions.through), "region"),
+        "platforms": _grouped_counts(offers.filter(documentary_id__in=documentary_ids), "platform"),
+        "decades": decades,
+        "durations": [
+            {"bucket": key, "min": low, "max": high, "count": totals[f"duration_{key}"]}
+            for key, low, high in DURATION_BUCKETS
+        ],
+    }
+
+
+def get_facets(filterset):
+    """Cached facet counts for a validated DocumentaryFilter."""
+    namespaces = [CATALOG, TAXONOMY]
+    if filterset.form.cleaned_data.get("semantic"):
+        namespaces.append(SEARCH)
+    key = versioned_key(
+        namespaces, "facets", timezone.localdate().isoformat(),
+        filter_signature(filterset.form.cleaned_data),
+    )
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filterset.qs, filterset.offers())
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -1,6 +1,73 @@
+from django.core.validators import RegexValidator
+from django.db.models import Exists, OuterRef
+from rest_framework.filters import OrderingFilter
+
 import django_filters
 
 from .models import Documentary
+from .offers import available_in, current_offers, normalize_country
+from .search import search_documentaries
+from .semantic import semantic_documentaries
+
+MATCH_CHOICES = [("any", "any"), ("all", "all")]
+
+
+class RelatedExistsFilter(django_filters.BaseCSVFilter, django_filters.CharFilter):
+    """
+    Filter on a related table with a correlated EXISTS subquery.
+
+    The relation is never joined into the documentary query, so rows are not
+    duplicated and no DISTINCT is needed. Accepts comma-separated values
+    (?sport=climbing,surf): documentaries matching any of them, or all of
+    them when the match_param filter is "all".
+    """
+
+    def __init__(self, related_model, outer_field, *args, match_param=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.related_model = related_model
+        self.outer_field = outer_field
+        self.match_param = match_param
+
+    def get_related_queryset(self):
+        return self.related_model._default_manager.all()
+
+    def get_match(self):
+        if self.match_param and self.parent is not None:
+            return self.parent.form.cleaned_data.get(self.match_param) or "any"
+        return "any"
+
+    def filter(self, qs, value):
+        values = list(dict.fromkeys(item.strip() for item in value or [] if item.strip()))
+        if not values:
+            return qs
+
+        related = self.get_related_queryset().filter(**{self.outer_field: OuterRef("pk")})
+        if self.get_match() == "all":
+            for item in values:
+                qs = qs.filter(Exists(related.filter(**{self.field_name: item})))
+            return qs
+        return qs.filter(Exists(related.filter(**{f"{self.field_name}__in": values})))
+
+
+class OfferExistsFilter(RelatedExistsFilter):
+    """RelatedExistsFilter over the current offers (valid in the filtered ?country=)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, "documentary", *args, **kwargs)
+
+    def get_related_queryset(self):
+        return self.parent.offers()
+
+
+class MatchFilter(django_filters.ChoiceFilter):
+    """any/all switch read by a RelatedExistsFilter; does not filter by itself."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("choices", MATCH_CHOICES)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        return qs
 
 
 class DocumentaryFilter(django_filters.FilterSet):
@@ -8,6 +75,7 @@ class DocumentaryFilter(django_filters.FilterSet):
 
     # Text search
     search = django_filters.CharFilter(method="filter_search")
+    semantic = django_filters.CharFilter(method="filter_semantic")
 
     # Range filters
     year_min = django_filters.NumberFilter(field_name="year", lookup_expr="gte")
@@ -15,17 +83,38 @@ class DocumentaryFilter(django_filters.FilterSet):
     duration_min = django_filters.NumberFilter(field_name="duration_minutes", lookup_expr="gte")
     duration_max = django_filters.NumberFilter(field_name="duration_minutes", lookup_expr="lte")
 
-    # Relation filters (accept slugs)
-    sport = django_filters.CharFilter(field_name="sports__slug")
-    theme = django_filters.CharFilter(field_name="themes__slug")
-    region = django_filters.CharFilter(field_name="regions__slug")
-    director = django_filters.CharFilter(field_name="directors__slug")
+    # Relation filters (accept comma-separated slugs; <name>_match=all to
+    # require every value instead of any)
+    sport = RelatedExistsFilter(
+        Documentary.sports.through, "documentary", field_name="sport__slug", match_param="sport_match"
+    )
+    theme = RelatedExistsFilter(
+        Documentary.themes.through, "documentary", field_name="theme__slug", match_param="theme_match"
+    )
+    region = RelatedExistsFilter(
+        Documentary.regions.through, "documentary", field_name="region__slug", match_param="region_match"
+    )
+    director = RelatedExistsFilter(
+        Documentary.directors.through, "documentary", field_name="person__slug", match_param="director_match"
+    )
+    sport_match = MatchFilter()
+    theme_match = MatchFilter()
+    region_match = MatchFilter()
+    director_match = MatchFilter()
 
-    # Platform filter (accept slug)
-    platform = django_filters.CharFilter(field_name="availabilities__platform__slug")
+    # Platform filter (accept comma-separated slugs, any of them; current
+    # offers only)
+    platform = OfferExistsFilter(field_name="platform__slug")
 
-    # Free content filter
-    is_free = django_filters.BooleanFilter(field_name="availabilities__is_free")
+    # Watchable in a country (ISO 3166 code); platform and is_free then only
+    # consider the offers valid there
+    country = django_filters.CharFilter(
+        method="filter_country",
+        validators=[RegexValidator(r"^[A-Za-z]{2}$", "Enter a two-letter country code.")],
+    )
+
+    # Free content filter (current offers only)
+    is_free = django_filters.BooleanFilter(method="filter_is_free")
 
     # Featured filter
     is_featured = django_filters.BooleanFilter()
@@ -33,20 +122,59 @@ class DocumentaryFilter(django_filters.FilterSet):
     class Meta:
         model = Documentary
         fields = [
-            "search", "year_min", "year_max", "duration_min", "duration_max",
-            "sport", "theme", "region", "director", "platform", "is_free",
-            "is_featured"
+            "search", "semantic", "year_min", "year_max", "duration_min", "duration_max",
+            "sport", "theme", "region", "director", "platform", "country", "is_free",
+            "is_featured", "sport_match", "theme_match", "region_match",
+            "director_match"
         ]
 
     def filter_search(self, queryset, name, value):
-        """Search in title, original_title, and both synopsis languages."""
-        return queryset.filter(
-            models.Q(title__icontains=value) |
-            models.Q(original_title__icontains=value) |
-            models.Q(synopsis_en__icontains=value) |
-            models.Q(synopsis_fr__icontains=value)
-        )
+        """Full-text search over titles, directors and synopsis, ordered by relevance."""
+        return search_documentaries(queryset, value)
+
+    def filter_semantic(self, queryset, name, value):
+        """Synopses closest in meaning to value (see semantic.py), ordered by similarity."""
+        return semantic_documentaries(queryset, value)
+
+    def offers(self):
+        """Offers the offer filters look at: current ones, valid in ?country= if given."""
+        return current_offers(normalize_country(self.form.cleaned_data.get("country")))
+
+    def filter_country(self, queryset, name, value):
+        """Documentaries with at least one current offer valid in the country."""
+        return queryset.filter(available_in(normalize_country(value)))
+
+    def filter_is_free(self, queryset, name, value):
+        """Documentaries with at least one free (or, for false, paid) offer."""
+        offers = self.offers().filter(documentary=OuterRef("pk"), is_free=value)
+        return queryset.filter(Exists(offers))
+
+
+class DocumentaryOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that keeps search or semantic relevance ordering unless ?ordering= is given.
+
+    The view's ordering_aliases name orderings by their meaning rather than
+    their column: {"trending": "-trending_score"} makes ?ordering=trending
+    list the most trending first and ?ordering=-trending the least.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        aliases = getattr(view, "ordering_aliases", {})
+
+        def resolve(term):
+            name = term.removeprefix("-")
+            if name not in aliases:
+                return term
+            target = aliases[name]
+            if term.startswith("-"):
+                target = target.removeprefix("-") if target.startswith("-") else f"-{target}"
+            return target
 
+        return super().remove_invalid_fields(queryset, [resolve(term) for term in fields], view, request)
 
-# Import models for Q lookup
-from django.db import models  # noqa: E402
+    def get_default_ordering(self, view):
+        params = view.request.query_params
+        if params.get("search") or params.get("semantic"):
+            return None
+        return super().get_default_ordering(view)
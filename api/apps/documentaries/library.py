@@ -0,0 +1,70 @@
+"""
+Per-request resolution of a user's library flags (watchlist, watched, favorites).
+
+Serializers used to run one EXISTS query per flag and per documentary. Views
+now build a LibraryState for the documentaries they are about to serialize,
+which loads each relation once with an IN lookup, and pass it through the
+serializer context under the "library_state" key. The same state, with the
+user's own ratings, is served on its own by /api/documentaries/library-state/.
+"""
+
+from collections.abc import Iterable
+
+from apps.reviews.models import Review
+
+from .models import Documentary, Favorite, Watched, Watchlist
+
+
+class LibraryState:
+    """Sets of documentary IDs the user has in each library relation."""
+
+    def __init__(self, user, documentary_ids: Iterable[int], with_ratings=False):
+        self.documentary_ids = set(documentary_ids)
+        self.watchlist: set[int] = set()
+        self.watched: set[int] = set()
+        self.favorites: set[int] = set()
+        # Only loaded with_ratings: cards do not show the user's own rating
+        self.ratings: dict[int, int] = {}
+
+        if user is None or not user.is_authenticated or not self.documentary_ids:
+            return
+
+        self.watchlist = self._load(Watchlist, user)
+        self.watched = self._load(Watched, user)
+        self.favorites = self._load(Favorite, user)
+        if with_ratings:
+            self.ratings = dict(
+                Review.objects.filter(
+                    user=user, documentary_id__in=self.documentary_ids
+                ).values_list("documentary_id", "rating")
+            )
+
+    def _load(self, model, user):
+        return set(
+            model.objects.filter(
+                user=user, documentary_id__in=self.documentary_ids
+            ).values_list("documentary_id", flat=True)
+        )
+
+    @classmethod
+    def for_documentaries(cls, user, documentaries):
+        """Build the state for Documentary instances (or a single one)."""
+        if isinstance(documentaries, Documentary):
+            documentaries = [documentaries]
+        return cls(user, (doc.pk for doc in documentaries))
+
+    def covers(self, documentary_id):
+        return documentary_id in self.documentary_ids
+
+    def is_in_watchlist(self, documentary_id):
+        return documentary_id in self.watchlist
+
+    def is_watched(self, documentary_id):
+        return documentary_id in self.watched
+
+    def is_favorited(self, documentary_id):
+        return documentary_id in self.favorites
+
+    def rating(self, documentary_id):
+        """The user's rating of the documentary, or None (needs with_ratings)."""
+        return self.ratings.get(documentary_id)
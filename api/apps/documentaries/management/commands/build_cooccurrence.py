@@ -0,0 +1,37 @@
+"""
+Build the "people who liked this also liked" index from library co-occurrence.
+
+Counts which documentaries are watched, favorited, watchlisted or positively
+reviewed by the same users. --incremental only folds in the rows created
+since the previous run; schedule it frequently and a full run periodically
+(removed rows are only forgotten by a full run).
+
+Usage:
+    python manage.py build_cooccurrence
+    python manage.py build_cooccurrence --incremental
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.cooccurrence import build_cooccurrence, update_cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed also-liked documentaries from library co-occurrence"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only fold in library rows created since the previous run",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = update_cooccurrence() if options["incremental"] else build_cooccurrence()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed also-liked documentaries for {count} documentaries in {elapsed:.1f}s."
+        ))
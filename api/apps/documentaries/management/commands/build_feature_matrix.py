@@ -0,0 +1,29 @@
+"""
+Build the documentary x tag feature matrix behind /for_you/ recommendations.
+
+Nothing is updated incrementally and requests never build the matrix: run
+this after imports and periodically (e.g. nightly) so new documentaries and
+tag changes are recommended. /for_you/ serves the popular rail until the
+first build.
+
+Usage:
+    python manage.py build_feature_matrix
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.recommendations import build_feature_matrix
+
+
+class Command(BaseCommand):
+    help = "Rebuild the memory-mapped tag feature matrix of for-you recommendations"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = build_feature_matrix()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Built the feature matrix of {count} documentaries in {elapsed:.1f}s."
+        ))
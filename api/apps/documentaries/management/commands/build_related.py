@@ -0,0 +1,38 @@
+"""
+Build the "more like this" index (top related documentaries by shared tags).
+
+Tag and publication changes update the index incrementally; run this after
+bulk imports, after changing the tag weights, or to start from scratch.
+
+Usage:
+    python manage.py build_related
+    python manage.py build_related --documentary 12 --documentary 34
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.similarity import build_related, update_related
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed related documentaries from tag similarity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--documentary",
+            type=int,
+            action="append",
+            dest="documentary_ids",
+            help="Only refresh the given documentary ID and the ones affected by it (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        ids = options["documentary_ids"]
+        count = update_related(ids) if ids else build_related()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed related documentaries for {count} documentaries in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,37 @@
+"""
+Build the semantic synopsis search index (?semantic=).
+
+Computes TF-IDF + truncated SVD vectors of every published synopsis and
+their LSH buckets. Nothing is updated incrementally: run this after imports
+and periodically (e.g. nightly) so new and edited synopses are searchable.
+
+Usage:
+    python manage.py build_semantic_index
+    python manage.py build_semantic_index --dimensions 200
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.semantic import DIMENSIONS, build_semantic_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the LSA vectors behind semantic synopsis search"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dimensions",
+            type=int,
+            default=DIMENSIONS,
+            help=f"Number of latent topics (default: {DIMENSIONS})",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = build_semantic_index(options["dimensions"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} synopses for semantic search in {elapsed:.1f}s."
+        ))
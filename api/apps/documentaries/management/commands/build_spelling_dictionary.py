@@ -0,0 +1,28 @@
+"""
+Build the "did you mean" spelling dictionary of the search endpoints.
+
+Indexes the words of published titles, director names and taxonomy names.
+Workers pick up the new file on their next correction; run this after
+imports and periodically (e.g. nightly) so new titles are known.
+
+Usage:
+    python manage.py build_spelling_dictionary
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.spelling import build_spelling_dictionary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the spelling correction dictionary used when a search finds nothing"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = build_spelling_dictionary()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} words for spelling correction in {elapsed:.1f}s."
+        ))
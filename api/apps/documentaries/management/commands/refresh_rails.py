@@ -0,0 +1,28 @@
+"""
+Precompute the homepage rails (featured, top rated, recent, popular and the
+theme/sport rails listed in settings.HOME_RAILS).
+
+Rails are invalidated automatically when the catalog or reviews change and
+recomputed on the next request; run this periodically (e.g. from cron every
+few minutes) so visitors never pay for the recomputation.
+
+Usage:
+    python manage.py refresh_rails
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.rails import refresh_rails
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached homepage rails"
+
+    def handle(self, *args, **options):
+        refreshed = refresh_rails()
+
+        for (name, param), ids in refreshed.items():
+            label = f"{name}:{param}" if param else name
+            self.stdout.write(f"  - {label}: {len(ids)} documentaries")
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(refreshed)} rails."))
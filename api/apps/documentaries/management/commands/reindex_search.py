@@ -0,0 +1,48 @@
+"""
+Rebuild the full-text search document of every documentary.
+
+Search vectors are refreshed automatically when a documentary, its directors
+or a director's name change; run this after bulk imports or after changing
+the search configuration. Only does something on PostgreSQL.
+
+Usage:
+    python manage.py reindex_search
+    python manage.py reindex_search --batch-size 200
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.models import Documentary
+from apps.documentaries.search import update_search_vectors, uses_postgres_search
+
+
+class Command(BaseCommand):
+    help = "Rebuild documentary full-text search vectors in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of documentaries updated per query (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        if not uses_postgres_search():
+            self.stdout.write(self.style.WARNING(
+                "Full-text search vectors are only used on PostgreSQL, nothing to do."
+            ))
+            return
+
+        ids = list(Documentary.objects.order_by("pk").values_list("pk", flat=True))
+        total = len(ids)
+        updated = 0
+
+        for start in range(0, total, batch_size):
+            batch = ids[start:start + batch_size]
+            updated += update_search_vectors(batch)
+            self.stdout.write(f"[{min(start + batch_size, total)}/{total}] reindexed")
+
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {updated} documentaries."))
@@ -0,0 +1,36 @@
+"""
+Fold new library and review events into the trending scores.
+
+Only events created since the previous run are read. Schedule it every few
+minutes; --rebuild recomputes everything (run it every few months, see
+apps.documentaries.trending).
+
+Usage:
+    python manage.py update_trending
+    python manage.py update_trending --rebuild
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.trending import rebuild_trending, update_trending
+
+
+class Command(BaseCommand):
+    help = "Update time-decayed trending scores from the events since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute every score and move the epoch to now",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_trending() if options["rebuild"] else update_trending()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated trending scores of {count} documentaries in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,87 @@
+"""
+Full-text search support for documentaries (PostgreSQL only).
+- Extensions: unaccent, pg_trgm
+- Text search configuration french_unaccent (unaccent + french stemming)
+- IMMUTABLE bivouac_unaccent() so folded titles can be indexed
+- GIN index on search_vector, trigram GIN index on the folded title
+Other databases only get the (unused) search_vector column.
+"""
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+SETUP_SQL = [
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END $$;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bivouac_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS documentary_search_vector_gin
+        ON documentaries_documentary USING gin (search_vector);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS documentary_title_trgm_gin
+        ON documentaries_documentary USING gin (bivouac_unaccent(lower(title)) gin_trgm_ops);
+    """,
+    """
+    UPDATE documentaries_documentary d SET search_vector =
+        setweight(to_tsvector('french_unaccent', d.title || ' ' || d.original_title), 'A')
+        || setweight(to_tsvector('french_unaccent', coalesce((
+            SELECT string_agg(p.name, ' ')
+            FROM documentaries_person p
+            JOIN documentaries_documentary_directors dd ON dd.person_id = p.id
+            WHERE dd.documentary_id = d.id
+        ), '')), 'B')
+        || setweight(to_tsvector('french_unaccent', d.synopsis), 'C');
+    """,
+]
+
+TEARDOWN_SQL = [
+    "DROP INDEX IF EXISTS documentary_title_trgm_gin;",
+    "DROP INDEX IF EXISTS documentary_search_vector_gin;",
+    "DROP FUNCTION IF EXISTS bivouac_unaccent(text);",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent;",
+]
+
+
+def setup_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in SETUP_SQL:
+        schema_editor.execute(statement)
+
+
+def teardown_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in TEARDOWN_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0007_french_only'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='documentary',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(setup_search, teardown_search),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0008_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-year', 'title', 'id'], name='documentary_browse_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['title', 'id'], name='documentary_browse_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at', 'id'], name='documentary_browse_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0009_browse_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedDocumentary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('documentary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='documentaries.documentary')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentaries.documentary')),
+            ],
+            options={
+                'verbose_name_plural': 'related documentaries',
+                'ordering': ['documentary', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('documentary', 'rank'), name='related_documentary_rank_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0010_related_documentary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlsoLikedDocumentary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'verbose_name_plural': 'also liked documentaries',
+                'ordering': ['documentary', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['added_at'], name='favorite_added_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='watched',
+            index=models.Index(fields=['watched_at'], name='watched_watched_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='watchlist',
+            index=models.Index(fields=['added_at'], name='watchlist_added_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='alsolikeddocumentary',
+            name='documentary',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='also_liked_entries', to='documentaries.documentary'),
+        ),
+        migrations.AddField(
+            model_name='alsolikeddocumentary',
+            name='related',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentaries.documentary'),
+        ),
+        migrations.AddConstraint(
+            model_name='alsolikeddocumentary',
+            constraint=models.UniqueConstraint(fields=('documentary', 'rank'), name='also_liked_documentary_rank_unique'),
+        ),
+    ]
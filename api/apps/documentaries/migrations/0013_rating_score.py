@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rating_scores(apps, schema_editor):
+    """Bayesian score of every reviewed documentary (see RatingSummary.update_scores)."""
+    Documentary = apps.get_model("documentaries", "Documentary")
+    RatingSummary = apps.get_model("reviews", "RatingSummary")
+
+    prior_weight = float(settings.RATING_PRIOR_WEIGHT)
+    prior_mean = float(settings.RATING_PRIOR_MEAN)
+    documentaries = []
+    for documentary_id, review_count, rating_sum in RatingSummary.objects.filter(
+        review_count__gt=0
+    ).values_list("documentary_id", "review_count", "rating_sum"):
+        documentaries.append(Documentary(
+            pk=documentary_id,
+            rating_score=(prior_weight * prior_mean + rating_sum) / (prior_weight + review_count),
+        ))
+    Documentary.objects.bulk_update(documentaries, ["rating_score"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0012_trending_score'),
+        ('reviews', '0003_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentary',
+            name='rating_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-rating_score', 'id'], name='documentary_rating_score_idx'),
+        ),
+        migrations.RunPython(backfill_rating_scores, migrations.RunPython.noop),
+    ]
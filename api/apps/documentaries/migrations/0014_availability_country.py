@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_availability_countries(apps, schema_editor):
+    """One row per country of each offer, "*" for offers without any (see Availability.sync_countries)."""
+    Availability = apps.get_model("documentaries", "Availability")
+    AvailabilityCountry = apps.get_model("documentaries", "AvailabilityCountry")
+
+    rows = []
+    for pk, documentary_id, country_codes in Availability.objects.values_list(
+        "pk", "documentary_id", "country_codes"
+    ):
+        codes = {code.strip().upper() for code in country_codes or [] if isinstance(code, str)}
+        codes = {code for code in codes if len(code) == 2 and code.isascii() and code.isalpha()}
+        rows += [
+            AvailabilityCountry(availability_id=pk, documentary_id=documentary_id, country_code=code)
+            for code in sorted(codes or {"*"})
+        ]
+    AvailabilityCountry.objects.bulk_create(rows, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0013_rating_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityCountry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country_code', models.CharField(max_length=2)),
+                ('availability', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='countries', to='documentaries.availability')),
+                ('documentary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentaries.documentary')),
+            ],
+            options={
+                'verbose_name_plural': 'availability countries',
+                'indexes': [models.Index(fields=['country_code', 'documentary'], name='availability_country_idx')],
+                'unique_together': {('availability', 'country_code')},
+            },
+        ),
+        migrations.RunPython(create_availability_countries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0014_availability_country'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availability',
+            index=models.Index(fields=['available_until', 'available_from', 'documentary'], name='availability_until_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='availability',
+            index=models.Index(fields=['available_from', 'available_until', 'documentary'], name='availability_from_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0015_availability_window_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='documentary',
+            name='documentary_trending_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='documentary',
+            name='documentary_rating_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-trending_score', '-id'], name='documentary_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentary',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-rating_score', '-id'], name='documentary_rating_score_idx'),
+        ),
+    ]
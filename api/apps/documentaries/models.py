@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.text import slugify
@@ -104,6 +106,10 @@ class Platform(models.Model):
 class Documentary(models.Model):
     """Core documentary model."""
 
+    # Scores maintained with UPDATE queries; save() only writes them back
+    # when update_fields names them (see _do_update)
+    MAINTAINED_FIELDS = {"trending_score", "rating_score"}
+
     # Basic info
     title = models.CharField(max_length=255)
     original_title = models.CharField(max_length=255, blank=True)
@@ -137,6 +143,14 @@ class Documentary(models.Model):
     )
     tmdb_id = models.CharField(max_length=20, blank=True)
 
+    # Full-text search document, maintained by apps.documentaries.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Time-decayed activity score, maintained by apps.documentaries.trending
+    trending_score = models.FloatField(default=0, editable=False)
+    # Bayesian average rating, maintained by RatingSummary.update_scores
+    rating_score = models.FloatField(default=0, editable=False)
+
     # Status
     is_published = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
@@ -148,6 +162,36 @@ class Documentary(models.Model):
     class Meta:
         ordering = ["-year", "title"]
         verbose_name_plural = "documentaries"
+        indexes = [
+            # Keyset pagination of the published catalog, one per ordering option.
+            # The id tiebreaker follows the direction of the last ordering field
+            # (see KeysetPagination.get_ordering); indexes also serve the reverse.
+            models.Index(
+                fields=["-year", "title", "id"],
+                name="documentary_browse_year_idx",
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=["title", "id"],
+                name="documentary_browse_title_idx",
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                name="documentary_browse_created_idx",
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=["-trending_score", "-id"],
+                name="documentary_trending_idx",
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=["-rating_score", "-id"],
+                name="documentary_rating_score_idx",
+                condition=models.Q(is_published=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.year})"
@@ -158,20 +202,40 @@ class Documentary(models.Model):
             self.slug = f"{base_slug}-{self.year}"
         super().save(*args, **kwargs)
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # An instance loaded earlier (admin form) holds stale scores: the
+        # UPDATE leaves them out unless update_fields asks for them. Inserts
+        # (a new row, or one deleted since the instance was loaded) write
+        # every field as usual. update_fields is set by Django itself for
+        # instances with deferred fields, and then never asks for them.
+        requested = update_fields if update_fields is not None and not self.get_deferred_fields() else ()
+        values = [
+            value for value in values
+            if value[0].name not in self.MAINTAINED_FIELDS or value[0].name in requested
+        ]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    @property
+    def rating_summary_or_none(self):
+        """Denormalized rating summary, or None when the documentary has no reviews yet."""
+        try:
+            return self.rating_summary
+        except ObjectDoesNotExist:
+            return None
+
     @property
     def average_rating(self):
-        """Calculate average user rating."""
-        from apps.reviews.models import Review
-        avg = Review.objects.filter(documentary=self).aggregate(
-            avg=models.Avg("rating")
-        )["avg"]
-        return round(avg, 1) if avg else None
+        """Average user rating, read from the rating summary."""
+        summary = self.rating_summary_or_none
+        if summary and summary.average_rating:
+            return round(summary.average_rating, 1)
+        return None
 
     @property
     def review_count(self):
-        """Count number of reviews."""
-        from apps.reviews.models import Review
-        return Review.objects.filter(documentary=self).count()
+        """Number of reviews, read from the rating summary."""
+        summary = self.rating_summary_or_none
+        return summary.review_count if summary else 0
 
 
 class Availability(models.Model):
@@ -197,10 +261,132 @@ class Availability(models.Model):
     class Meta:
         verbose_name_plural = "availabilities"
         unique_together = ["documentary", "platform"]
+        indexes = [
+            # Range scans of the leaving soon / just arrived rails, the other
+            # bound and the documentary read from the index
+            models.Index(
+                fields=["available_until", "available_from", "documentary"],
+                name="availability_until_idx",
+            ),
+            models.Index(
+                fields=["available_from", "available_until", "documentary"],
+                name="availability_from_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.documentary.title} on {self.platform.name}"
 
+    def normalized_country_codes(self):
+        """Upper-cased country codes of the offer ({ANY_COUNTRY} when unrestricted)."""
+        codes = {code.strip().upper() for code in self.country_codes or [] if isinstance(code, str)}
+        # Anything else than a two-letter code is a typo, not a country
+        codes = {code for code in codes if len(code) == 2 and code.isascii() and code.isalpha()}
+        return codes or {AvailabilityCountry.ANY_COUNTRY}
+
+    def sync_countries(self):
+        """Make the AvailabilityCountry rows match country_codes."""
+        codes = self.normalized_country_codes()
+        self.countries.exclude(country_code__in=codes, documentary_id=self.documentary_id).delete()
+        existing = set(self.countries.values_list("country_code", flat=True))
+        AvailabilityCountry.objects.bulk_create([
+            AvailabilityCountry(availability=self, documentary_id=self.documentary_id, country_code=code)
+            for code in sorted(codes - existing)
+        ])
+
+
+class AvailabilityCountry(models.Model):
+    """
+    One country an offer is valid in, mirroring Availability.country_codes.
+
+    The JSON list cannot be indexed; these rows answer "what can I watch in
+    Belgium" with an index lookup on (country_code, documentary). Offers
+    without country codes are unrestricted and get a single ANY_COUNTRY row.
+    """
+
+    ANY_COUNTRY = "*"
+
+    availability = models.ForeignKey(
+        Availability, on_delete=models.CASCADE, related_name="countries"
+    )
+    # Copied from the offer so country filters never join availabilities
+    documentary = models.ForeignKey(
+        Documentary, on_delete=models.CASCADE, related_name="+"
+    )
+    country_code = models.CharField(max_length=2)
+
+    class Meta:
+        verbose_name_plural = "availability countries"
+        unique_together = ["availability", "country_code"]
+        indexes = [
+            models.Index(fields=["country_code", "documentary"], name="availability_country_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.availability} ({self.country_code})"
+
+
+class RelatedDocumentary(models.Model):
+    """Precomputed "more like this" neighbour, built by similarity.py."""
+
+    documentary = models.ForeignKey(
+        Documentary, on_delete=models.CASCADE, related_name="related_entries"
+    )
+    related = models.ForeignKey(
+        Documentary, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name_plural = "related documentaries"
+        ordering = ["documentary", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["documentary", "rank"], name="related_documentary_rank_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.documentary_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class TrendingCheckpoint(models.Model):
+    """Progress of the incremental trending score updates (a single row), see trending.py."""
+
+    # Stored scores are scaled to this time
+    epoch = models.DateTimeField()
+    # Events created before this time are included in the scores
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"Trending scores up to {self.processed_until:%Y-%m-%d %H:%M}"
+
+
+class AlsoLikedDocumentary(models.Model):
+    """Precomputed "people who liked this also liked" neighbour, built by cooccurrence.py."""
+
+    documentary = models.ForeignKey(
+        Documentary, on_delete=models.CASCADE, related_name="also_liked_entries"
+    )
+    related = models.ForeignKey(
+        Documentary, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name_plural = "also liked documentaries"
+        ordering = ["documentary", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["documentary", "rank"], name="also_liked_documentary_rank_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.documentary_id} -> {self.related_id} ({self.score:.3f})"
+
 
 class Watchlist(models.Model):
     """User's watchlist - documentaries they want to watch."""
@@ -216,6 +402,8 @@ class Watchlist(models.Model):
     class Meta:
         unique_together = ["user", "documentary"]
         ordering = ["-added_at"]
+        # Rows created since the last incremental build_cooccurrence run
+        indexes = [models.Index(fields=["added_at"], name="watchlist_added_at_idx")]
 
     def __str__(self):
         return f"{self.user.email} - {self.documentary.title}"
@@ -235,6 +423,7 @@ class Watched(models.Model):
     class Meta:
         unique_together = ["user", "documentary"]
         ordering = ["-watched_at"]
+        indexes = [models.Index(fields=["watched_at"], name="watched_watched_at_idx")]
 
     def __str__(self):
         return f"{self.user.email} watched {self.documentary.title}"
@@ -254,6 +443,7 @@ class Favorite(models.Model):
     class Meta:
         unique_together = ["user", "documentary"]
         ordering = ["-added_at"]
+        indexes = [models.Index(fields=["added_at"], name="favorite_added_at_idx")]
 
     def __str__(self):
         return f"{self.user.email} favorited {self.documentary.title}"
@@ -0,0 +1,90 @@
+"""
+Offers (Availability) currently valid for a request.
+
+An offer is current from its available_from date to its available_until
+date included, either bound being open when unset. Filters, facets and
+serialized availabilities only ever consider current offers.
+
+Offers are also only valid in some countries. Responses list the offers of
+one country, resolved in this order:
+
+1. an explicit ?country=BE parameter,
+2. the GeoIP country header set by the CDN or proxy (GEOIP_COUNTRY_HEADER),
+3. the region of the preferred Accept-Language (fr-BE),
+4. the DEFAULT_COUNTRY setting.
+
+Lookups go through the indexed AvailabilityCountry rows, never through the
+country_codes JSON lists.
+"""
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from .models import Availability, AvailabilityCountry
+
+COUNTRY_PARAM = "country"
+
+# Codes GeoIP providers send for "unknown" and Tor exits, not countries
+UNKNOWN_COUNTRIES = {"XX", "T1"}
+
+
+def normalize_country(value):
+    """Upper-cased two-letter country code of value, or None."""
+    code = (value or "").strip().upper()
+    if len(code) == 2 and code.isascii() and code.isalpha() and code not in UNKNOWN_COUNTRIES:
+        return code
+    return None
+
+
+def accept_language_country(header):
+    """Region of the most preferred Accept-Language tag that has one."""
+    for language, _ in parse_accept_lang_header(header or ""):
+        for subtag in language.split("-")[1:]:
+            code = normalize_country(subtag)
+            if code:
+                return code
+    return None
+
+
+def request_country(request):
+    """Country whose offers are shown to request (see the module docstring)."""
+    params = getattr(request, "query_params", request.GET)
+    geoip_header = settings.GEOIP_COUNTRY_HEADER
+    return (
+        normalize_country(params.get(COUNTRY_PARAM))
+        or (normalize_country(request.headers.get(geoip_header)) if geoip_header else None)
+        or accept_language_country(request.headers.get("Accept-Language"))
+        or normalize_country(settings.DEFAULT_COUNTRY)
+    )
+
+
+def is_current(prefix="", today=None):
+    """Q of the offers (at prefix, e.g. "availability__") valid on today."""
+    today = today or timezone.localdate()
+    return (
+        (Q(**{f"{prefix}available_from__isnull": True}) | Q(**{f"{prefix}available_from__lte": today}))
+        & (Q(**{f"{prefix}available_until__isnull": True}) | Q(**{f"{prefix}available_until__gte": today}))
+    )
+
+
+def _country_rows(country):
+    return AvailabilityCountry.objects.filter(
+        country_code__in=[country, AvailabilityCountry.ANY_COUNTRY]
+    )
+
+
+def current_offers(country=None, today=None):
+    """Offers valid today, in country when given."""
+    offers = Availability.objects.filter(is_current(today=today))
+    if country:
+        offers = offers.filter(Exists(_country_rows(country).filter(availability=OuterRef("pk"))))
+    return offers
+
+
+def available_in(country):
+    """EXISTS condition on documentaries with at least one current offer valid in country."""
+    return Exists(
+        _country_rows(country).filter(is_current("availability__"), documentary=OuterRef("pk"))
+    )
@@ -0,0 +1,287 @@
+"""
+Pagination for the documentary browse endpoint.
+
+Page-number pagination (the project default) runs a COUNT and an OFFSET scan
+on every page. Clients that only scroll forward can ask for keyset pagination
+with ?pagination=cursor: pages are then fetched with a WHERE clause on the
+last row's ordering values, which an index on the ordering columns serves in
+constant time however deep the page is. No page runs a COUNT unless the
+client asks for the total with ?with_count=1.
+"""
+
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.db.models import F, OrderBy, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, datetime | date | time):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's ordering.
+
+    The ordering comes from the filtered queryset (OrderingFilter, search
+    relevance or the model default) with the primary key appended as a
+    tiebreaker, in the direction of the last field so that a single-direction
+    (field, id) index can serve it, and any combination of ordering fields
+    paginates correctly. Ordering fields must be non-nullable columns or
+    annotations.
+
+    Pages carry no total count: the first page (no cursor) includes one
+    only when requested with ?with_count=1, since a COUNT scans every
+    matching row.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = None
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            if self.wants_count(request):
+                self.count = queryset.count()
+            values, reverse = None, False
+        else:
+            values, reverse = cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.first_row = results[0] if results else None
+        self.last_row = results[-1] if results else None
+        return results
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true")
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Ordering as a list of "field"/"-field" strings ending with "pk" or "-pk"."""
+        ordering = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(item, OrderBy) and isinstance(item.expression, F):
+                item = f"{'-' if item.descending else ''}{item.expression.name}"
+            if not isinstance(item, str) or item == "?":
+                raise ValueError(f"Keyset pagination cannot order by {item!r}")
+            ordering.append(item)
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            ordering.append("-pk" if ordering and ordering[-1].startswith("-") else "pk")
+        return ordering
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def seek_filter(ordering, values):
+        """
+        Rows strictly after values in ordering.
+
+        (a, b, c) after (x, y, z) expands to
+        a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)),
+        with < for descending fields. The redundant leading a >= x is a range
+        condition the database can seek the (a, b, c) index to; the OR chain
+        alone would be checked row by row from the start of the index.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values, strict=True):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        return bound & condition
+
+    def row_values(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(_encode_value(value))
+        return values
+
+    def encode_cursor(self, row, reverse=False):
+        payload = {"o": self.ordering, "v": self.row_values(row), "r": int(reverse)}
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        return urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            payload = json.loads(data)
+            values, reverse = payload["v"], bool(payload["r"])
+            if payload["o"] != self.ordering or len(values) != len(self.ordering):
+                raise ValueError("Cursor does not match the current ordering")
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message) from None
+        return values, reverse
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_row))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.first_row is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.first_row, reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "description": "Only present on the first page, with ?with_count=1"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor (use the next/previous links).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total count on the first page (runs a COUNT query).",
+                "schema": {"type": "boolean"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class DocumentaryPagination(BasePagination):
+    """
+    Page-number pagination by default, keyset pagination with ?pagination=cursor.
+
+    Requests carrying a cursor are always paginated with keysets.
+    """
+
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.paginator = self.page_number
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
+
+    def select(self, request):
+        params = request.query_params
+        if (
+            params.get(self.mode_query_param) == self.cursor_mode
+            or self.keyset.cursor_query_param in params
+        ):
+            return self.keyset
+        return self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.select(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number.get_schema_operation_parameters(view),
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination (no page numbers or totals after the first page).",
+                "schema": {"type": "string", "enum": [self.cursor_mode]},
+            },
+            *self.keyset.get_schema_operation_parameters(view)[:1],
+        ]
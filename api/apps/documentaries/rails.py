@@ -0,0 +1,266 @@
+"""
+Precomputed homepage rails.
+
+Each rail (featured, top rated, recent, popular, trending, leaving soon,
+just arrived, per-theme, per-sport) is an ordered list of documentary IDs stored in the cache, so
+homepage requests only run a primary-key lookup for the cards instead of
+annotate/order queries over the live tables.
+
+Rail keys are versioned by the cache namespaces they depend on: documentary,
+tag or availability changes invalidate every rail, review writes invalidate
+the rating-based ones and trending updates the trending one. Rails built
+from offer dates (DATED_RAILS) are also keyed by the day and expire at
+midnight, when offers enter or leave their windows. The refresh_rails command recomputes everything ahead of time; a rail missing
+from the cache is computed on first request.
+
+The hero is picked in memory from a pool of eligible IDs (published, with a
+backdrop) and their pick weights. The pool is cached under the CATALOG
+version (and the RATINGS one with rating weighting), so it is recomputed by
+the first hero request after a relevant change rather than on every save.
+"""
+
+import random
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .cache import CATALOG, RATINGS, TRENDING, versioned_key
+from .models import Availability, Documentary
+
+RAIL_SIZE = 10
+RAILS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _published():
+    return Documentary.objects.filter(is_published=True)
+
+
+def _featured(param):
+    return _published().filter(is_featured=True)
+
+
+def _top_rated(param):
+    return _published().filter(rating_score__gt=0).order_by("-rating_score", "-year")
+
+
+def _recent(param):
+    return _published().order_by("-created_at")
+
+
+def _popular(param):
+    return _published().order_by(
+        F("rating_summary__review_count").desc(nulls_last=True), "-year"
+    )
+
+
+def _trending(param):
+    return _published().filter(trending_score__gt=0).order_by("-trending_score", "-year")
+
+
+def _leaving_soon(param):
+    """
+    Documentaries watchable now but not after LEAVING_SOON_DAYS, soonest gone first.
+
+    A documentary with any other offer (even a future one) lasting beyond
+    the window is not leaving.
+    """
+    today = timezone.localdate()
+    limit = today + timedelta(days=settings.LEAVING_SOON_DAYS)
+    # Range scan of availability_until_idx
+    ending = Availability.objects.filter(
+        Q(available_from__isnull=True) | Q(available_from__lte=today),
+        available_until__range=(today, limit),
+    )
+    lasting = Availability.objects.filter(Q(available_until__isnull=True) | Q(available_until__gt=limit))
+    last_day = ending.filter(documentary=OuterRef("pk")).order_by("-available_until")
+    return (
+        _published()
+        .filter(pk__in=ending.values("documentary_id"))
+        .exclude(Exists(lasting.filter(documentary=OuterRef("pk"))))
+        .annotate(leaving_on=Subquery(last_day.values("available_until")[:1]))
+        .order_by("leaving_on", "-year")
+    )
+
+
+def _just_arrived(param):
+    """Documentaries with an offer that started within JUST_ARRIVED_DAYS, newest first."""
+    today = timezone.localdate()
+    # Range scan of availability_from_idx
+    arrived = Availability.objects.filter(
+        Q(available_until__isnull=True) | Q(available_until__gte=today),
+        available_from__range=(today - timedelta(days=settings.JUST_ARRIVED_DAYS), today),
+    )
+    first_day = arrived.filter(documentary=OuterRef("pk")).order_by("-available_from")
+    return (
+        _published()
+        .filter(pk__in=arrived.values("documentary_id"))
+        .annotate(arrived_on=Subquery(first_day.values("available_from")[:1]))
+        .order_by("-arrived_on", "-year")
+    )
+
+
+def _by_theme(slug):
+    return _published().filter(themes__slug=slug).order_by("-year", "title")
+
+
+def _by_sport(slug):
+    return _published().filter(sports__slug=slug).order_by("-year", "title")
+
+
+# name -> (cache namespaces the rail depends on, queryset builder)
+RAILS = {
+    "featured": ([CATALOG], _featured),
+    "top_rated": ([CATALOG, RATINGS], _top_rated),
+    "recent": ([CATALOG], _recent),
+    "popular": ([CATALOG, RATINGS], _popular),
+    "trending": ([CATALOG, TRENDING], _trending),
+    "leaving_soon": ([CATALOG], _leaving_soon),
+    "just_arrived": ([CATALOG], _just_arrived),
+    "by_theme": ([CATALOG], _by_theme),
+    "by_sport": ([CATALOG], _by_sport),
+}
+
+# Rails that take a theme/sport slug, and the HOME_RAILS setting listing them
+PARAMETERIZED_RAILS = {"by_theme": "themes", "by_sport": "sports"}
+
+# Rails that depend on the current date
+DATED_RAILS = {"leaving_soon", "just_arrived"}
+
+
+def _rail_key(name, param):
+    namespaces, _ = RAILS[name]
+    if name in DATED_RAILS:
+        return versioned_key(namespaces, "rail", name, param or "", timezone.localdate().isoformat())
+    return versioned_key(namespaces, "rail", name, param or "")
+
+
+def _rail_timeout(name):
+    """Cache timeout of a rail: dated rails expire at the next midnight."""
+    if name not in DATED_RAILS:
+        return RAILS_CACHE_TIMEOUT
+    now = timezone.localtime()
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min, tzinfo=now.tzinfo)
+    return max(1, min(RAILS_CACHE_TIMEOUT, int((midnight - now).total_seconds())))
+
+
+def compute_rail_ids(name, param=None):
+    """Run the rail query and return its ordered documentary IDs."""
+    _, builder = RAILS[name]
+    return list(builder(param).values_list("pk", flat=True)[:RAIL_SIZE])
+
+
+def get_rail_ids(name, param=None):
+    """Ordered documentary IDs of a rail, from the cache when possible."""
+    key = _rail_key(name, param)
+    ids = cache.get(key)
+    if ids is None:
+        ids = compute_rail_ids(name, param)
+        cache.set(key, ids, _rail_timeout(name))
+    return ids
+
+
+def configured_rails():
+    """(name, param) of every rail shown on the homepage."""
+    rails = [(name, None) for name in RAILS if name not in PARAMETERIZED_RAILS]
+    home_rails = settings.HOME_RAILS
+    for name, setting_key in PARAMETERIZED_RAILS.items():
+        rails += [(name, slug) for slug in home_rails.get(setting_key, [])]
+    return rails
+
+
+def home_rails():
+    """
+    IDs of every homepage rail, with theme/sport rails keyed by slug.
+
+    All rails are read from the cache in one round trip; missing ones are
+    computed and stored together.
+    """
+    keys = {(name, param): _rail_key(name, param) for name, param in configured_rails()}
+    cached = cache.get_many(list(keys.values()))
+    # Missing rails by cache timeout
+    missing = {}
+
+    rails = {}
+    for (name, param), key in keys.items():
+        ids = cached.get(key)
+        if ids is None:
+            ids = missing.setdefault(_rail_timeout(name), {})[key] = compute_rail_ids(name, param)
+        if param is None:
+            rails[name] = ids
+        else:
+            rails.setdefault(PARAMETERIZED_RAILS[name], {})[param] = ids
+
+    for timeout, rails_by_key in missing.items():
+        cache.set_many(rails_by_key, timeout)
+    return rails
+
+
+def refresh_rails():
+    """Recompute every configured rail and store it under the current versions."""
+    refreshed = {}
+    for name, param in configured_rails():
+        ids = compute_rail_ids(name, param)
+        cache.set(_rail_key(name, param), ids, _rail_timeout(name))
+        refreshed[(name, param)] = ids
+    refresh_hero_pool()
+    return refreshed
+
+
+def _hero_weight(year, average_rating, weighting):
+    if weighting == "recency":
+        # Halves every five years: this year's films are picked twice as
+        # often as five-year-old ones
+        age = max(0, timezone.now().year - (year or 0))
+        return 0.5 ** (age / 5)
+    if weighting == "rating":
+        # Unrated documentaries count as average
+        return (average_rating or 2.5) ** 2
+    return 1
+
+
+def compute_hero_pool():
+    """IDs of hero-eligible documentaries with cumulative pick weights."""
+    weighting = settings.HERO_WEIGHTING
+    rows = (
+        _published()
+        .exclude(backdrop="")
+        .exclude(backdrop__isnull=True)
+        .values_list("pk", "year", "rating_summary__average_rating")
+    )
+    ids, weights = [], []
+    for pk, year, average_rating in rows:
+        ids.append(pk)
+        weights.append(_hero_weight(year, average_rating, weighting))
+    cum_weights = list(accumulate(weights)) if weighting != "uniform" else None
+    return {"ids": ids, "cum_weights": cum_weights}
+
+
+def _hero_pool_key():
+    # Eligibility follows documentary changes; only rating weights follow
+    # review changes
+    weighting = settings.HERO_WEIGHTING
+    namespaces = [CATALOG, RATINGS] if weighting == "rating" else [CATALOG]
+    return versioned_key(namespaces, "hero-pool", weighting)
+
+
+def refresh_hero_pool():
+    pool = compute_hero_pool()
+    cache.set(_hero_pool_key(), pool, RAILS_CACHE_TIMEOUT)
+    return pool
+
+
+def pick_hero_id():
+    """Random hero-eligible documentary ID, or None when the pool is empty."""
+    pool = cache.get(_hero_pool_key())
+    if pool is None:
+        pool = refresh_hero_pool()
+    if not pool["ids"]:
+        return None
+    # A varied homepage, not a secret: the module PRNG is fine here
+    if pool["cum_weights"] is None:
+        return random.choice(pool["ids"])  # noqa: S311
+    return random.choices(pool["ids"], cum_weights=pool["cum_weights"])[0]  # noqa: S311
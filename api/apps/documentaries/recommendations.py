@@ -0,0 +1,223 @@
+"""
+Personalized "for you" recommendations.
+
+Published documentaries are rows of a sparse float32 documentary x tag
+feature matrix (the L2 normalized tag vectors of similarity.py). A user's
+taste is one vector over the same tags, summed from their favorite sports and
+the rows of the documentaries they watched, favorited or reviewed; scoring
+the whole catalog is then a single sparse matrix-vector product.
+
+build_feature_matrix writes the matrix under RECOMMENDATIONS_DIR as CSR
+arrays in .npy files named after the build, the row pointers last: their
+presence means the set is complete. Requests never build it; they open the
+newest build with mmap_mode="r", so the workers of a host share one copy in
+the page cache, and look for a newer one when the directory modification
+time changes. Run the command after imports and periodically (e.g. nightly)
+so new documentaries and tags are taken into account; until the first
+build, /for_you/ serves the popular rail minus what the user already
+watched, favorited or reviewed.
+
+Results are cached per user under their library namespace, which watchlist,
+watched, favorite, review and favorite sports changes bump, and under the
+RECOMMENDATIONS namespace, which a new build bumps.
+"""
+
+import re
+import time
+from collections import namedtuple
+from functools import partial
+
+from django.core.cache import cache
+
+import numpy as np
+from scipy import sparse
+
+from apps.reviews.models import Review
+
+from .cache import RECOMMENDATIONS, bump_version, library_namespace, versioned_key
+from .datafiles import data_directory, data_path, write_atomically
+from .models import Favorite, Sport, Watched
+from .rails import RAILS, RAILS_CACHE_TIMEOUT
+from .similarity import TAG_WEIGHTS, tag_matrix
+
+RECOMMENDATION_COUNT = 20
+
+# How much each signal pulls the taste vector towards a documentary's tags.
+# Review weights are scaled by (rating - 3) / 2, so low ratings push away.
+SIGNAL_WEIGHTS = {
+    "favorite_sport": 1.0,
+    "watched": 1.0,
+    "favorite": 2.0,
+    "review": 1.5,
+}
+
+SPORTS_RELATION = list(TAG_WEIGHTS).index("sports")
+
+# Arrays of a build, in the order they are written
+FILE_NAMES = ("ids", "columns", "data", "indices", "indptr")
+
+FeatureMatrix = namedtuple("FeatureMatrix", ["ids", "columns", "features"])
+
+
+def _path(name, build):
+    return data_path(f"features-{name}-{build}.npy")
+
+
+def _builds(directory):
+    """Complete builds found in directory, newest first."""
+    pattern = re.compile(r"features-indptr-(\d+)\.npy")
+    matches = (pattern.fullmatch(path.name) for path in directory.glob("features-indptr-*.npy"))
+    return sorted((int(match.group(1)) for match in matches if match), reverse=True)
+
+
+def build_feature_matrix():
+    """Write the feature matrix as a new build; returns its number of documentaries."""
+    ids, columns, matrix = tag_matrix()
+    matrix = matrix.astype(np.float32).tocsr()
+    arrays = {
+        "ids": ids, "columns": columns,
+        "data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr,
+    }
+    build = time.time_ns()
+    for name in FILE_NAMES:
+        write_atomically(_path(name, build), partial(np.save, arr=arrays[name]))
+
+    # Workers still mapping older files keep their pages until they unmap them
+    for old_build in _builds(data_directory())[2:]:
+        for name in FILE_NAMES:
+            _path(name, old_build).unlink(missing_ok=True)
+
+    bump_version(RECOMMENDATIONS)
+    return len(ids)
+
+
+# (directory modification time, FeatureMatrix) mapped by this worker
+_matrix = (None, None)
+
+
+def feature_matrix():
+    """The newest complete build, memory-mapped; None before the first one."""
+    global _matrix
+    directory = data_directory()
+    try:
+        modified = directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _matrix[0] != modified:
+        builds = _builds(directory)
+        matrix = None
+        if builds:
+            arrays = {name: np.load(_path(name, builds[0]), mmap_mode="r") for name in FILE_NAMES}
+            matrix = FeatureMatrix(
+                ids=arrays["ids"],
+                columns=arrays["columns"],
+                features=sparse.csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]),
+                    shape=(len(arrays["ids"]), len(arrays["columns"])),
+                    copy=False,
+                ),
+            )
+        _matrix = (modified, matrix)
+    return _matrix[1]
+
+
+def taste_vector(user, matrix):
+    """
+    (taste vector over the matrix columns, rows of the watched documentaries).
+
+    The vector is all zeros for users without any signal.
+    """
+    watched_ids = list(Watched.objects.filter(user=user).values_list("documentary_id", flat=True))
+    signals = [
+        *((pk, SIGNAL_WEIGHTS["watched"]) for pk in watched_ids),
+        *((pk, SIGNAL_WEIGHTS["favorite"]) for pk in
+          Favorite.objects.filter(user=user).values_list("documentary_id", flat=True)),
+        *((pk, SIGNAL_WEIGHTS["review"] * (rating - 3) / 2) for pk, rating in
+          Review.objects.filter(user=user).values_list("documentary_id", "rating")),
+    ]
+    vector = np.zeros(matrix.features.shape[1], dtype=np.float32)
+
+    if signals:
+        documentary_ids, weights = zip(*signals, strict=True)
+        rows, found = _rows(matrix.ids, documentary_ids)
+        weights = np.asarray(weights, dtype=np.float32)[found]
+        vector += matrix.features[rows].T @ weights
+
+    sport_ids = list(Sport.objects.filter(favorited_by__user=user).values_list("pk", flat=True))
+    if sport_ids:
+        sport_columns = (matrix.columns[:, 0] == SPORTS_RELATION) & np.isin(matrix.columns[:, 1], sport_ids)
+        vector[sport_columns] += SIGNAL_WEIGHTS["favorite_sport"]
+
+    watched_rows, _ = _rows(matrix.ids, watched_ids)
+    return vector, watched_rows
+
+
+def _rows(ids, documentary_ids):
+    """(matrix rows of documentary_ids still in the matrix, mask of those found)."""
+    documentary_ids = np.asarray(documentary_ids, dtype=np.int64)
+    if not len(ids) or not len(documentary_ids):
+        return np.zeros(0, dtype=np.int64), np.zeros(len(documentary_ids), dtype=bool)
+    positions = np.minimum(np.searchsorted(ids, documentary_ids), len(ids) - 1)
+    found = ids[positions] == documentary_ids
+    return positions[found], found
+
+
+def compute_recommendations(user, count=RECOMMENDATION_COUNT):
+    """
+    IDs of the published documentaries closest to user's taste, best first.
+
+    Empty when nothing is known about the user yet or the feature matrix was
+    never built.
+    """
+    matrix = feature_matrix()
+    if matrix is None:
+        return []
+    vector, watched_rows = taste_vector(user, matrix)
+    if not vector.any():
+        return []
+
+    scores = matrix.features @ vector
+    scores[watched_rows] = -np.inf
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > count:
+        candidates = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+    # Best score first, most recently added (highest ID) on ties
+    order = np.lexsort((-matrix.ids[candidates], -scores[candidates]))
+    return matrix.ids[candidates[order]].tolist()
+
+
+def compute_popular_fallback(user, count=RECOMMENDATION_COUNT):
+    """IDs of the popular rail's documentaries user has not watched, favorited or reviewed."""
+    _, builder = RAILS["popular"]
+    return list(
+        builder(None)
+        .exclude(pk__in=Watched.objects.filter(user=user).values("documentary_id"))
+        .exclude(pk__in=Favorite.objects.filter(user=user).values("documentary_id"))
+        .exclude(pk__in=Review.objects.filter(user=user).values("documentary_id"))
+        .values_list("pk", flat=True)[:count]
+    )
+
+
+def get_recommendations(user):
+    """
+    Recommended documentary IDs of user, from the cache when possible.
+
+    Users without any signal get popular documentaries instead, as does
+    everyone until the feature matrix is built. Those are cached under the
+    popular rail's namespaces rather than RECOMMENDATIONS.
+    """
+    key = versioned_key([RECOMMENDATIONS, library_namespace(user.pk)], "for-you")
+    ids = cache.get(key)
+    if ids is None:
+        ids = compute_recommendations(user)
+        cache.set(key, ids, RAILS_CACHE_TIMEOUT)
+    if ids:
+        return ids
+
+    namespaces, _ = RAILS["popular"]
+    key = versioned_key([*namespaces, library_namespace(user.pk)], "for-you-popular")
+    ids = cache.get(key)
+    if ids is None:
+        ids = compute_popular_fallback(user)
+        cache.set(key, ids, RAILS_CACHE_TIMEOUT)
+    return ids
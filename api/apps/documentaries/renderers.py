@@ -0,0 +1,95 @@
+"""
+Compact columnar rendering of list responses.
+
+Selected with ?format=compact (or ?format=msgpack), or through the Accept
+header with the media types below. A list of objects is sent as one array
+per field instead of repeating every key on every item, and sports and
+platforms are replaced by their ID and sent once in a lookup table:
+
+    {
+        "count": 42, "next": "...", "previous": null,
+        "results": {"id": [1, 2], "title": ["...", "..."], "sports": [[3], [3, 5]], ...},
+        "lookups": {"sports": {"3": {...}, "5": {...}}, "platforms": {}}
+    }
+
+Nested objects (the documentary of a watchlist row) become nested column
+tables. Responses that are not lists (detail, errors) are rendered as-is.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+import msgpack
+
+# Item key -> lookup table of the objects it holds (a list of them or a single one)
+LOOKUP_KEYS = {"sports": "sports", "platform": "platforms"}
+
+
+def _columns(items, lookups):
+    """Column table of a list of dicts sharing the same keys."""
+    keys = list(items[0]) if items else []
+    table = {}
+    for key in keys:
+        values = [item[key] for item in items]
+        if key in LOOKUP_KEYS:
+            values = [_lookup_ids(value, lookups[LOOKUP_KEYS[key]]) for value in values]
+        elif values and all(isinstance(value, dict) for value in values):
+            values = _columns(values, lookups)
+        elif values and all(_is_object_list(value) for value in values):
+            values = [_columns(value, lookups) if value else [] for value in values]
+        table[key] = values
+    return table
+
+
+def _is_object_list(value):
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def _lookup_ids(value, table):
+    """Move the object(s) of value to table and return their ID(s)."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        table.setdefault(str(value["id"]), value)
+        return value["id"]
+    return [_lookup_ids(item, table) for item in value]
+
+
+def to_compact(data):
+    """Columnar version of a (paginated) list response, or data unchanged."""
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        payload, items = dict(data), data["results"]
+    elif isinstance(data, list):
+        payload, items = {}, data
+    else:
+        return data
+
+    if not all(isinstance(item, dict) for item in items):
+        return data
+    lookups = {table: {} for table in LOOKUP_KEYS.values()}
+    payload["results"] = _columns(items, lookups)
+    payload["lookups"] = lookups
+    return payload
+
+
+class CompactJSONRenderer(JSONRenderer):
+    media_type = "application/vnd.bivouac.compact+json"
+    format = "compact"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_compact(data), accepted_media_type, renderer_context)
+
+
+class CompactMessagePackRenderer(BaseRenderer):
+    """Compact columnar lists encoded with MessagePack."""
+
+    media_type = "application/vnd.bivouac.compact+msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Dates, decimals and lazy strings are encoded as in JSON responses
+        return msgpack.packb(to_compact(data), default=encoders.JSONEncoder().default)
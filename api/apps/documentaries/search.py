@@ -0,0 +1,168 @@
+"""
+Documentary search backend.
+
+On PostgreSQL, documentaries carry a weighted tsvector (title and original
+title, then director names, then synopsis) built with an accent-insensitive
+French text search configuration and GIN-indexed, plus a trigram index on the
+folded title for typo tolerance. Results are ranked by ts_rank plus title
+word similarity.
+
+The trigram match uses the indexable %> operator, whose cut-off is the
+pg_trgm.word_similarity_threshold setting (0.6 by default): every new
+connection sets it to TRIGRAM_THRESHOLD (see set_trigram_threshold).
+
+Other databases (SQLite in development) fall back to icontains matching with
+a simple field-based relevance score, so the API behaves the same everywhere.
+"""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    FloatField,
+    Func,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Lower
+
+from .models import Documentary, Person
+
+# Created by migration 0008: french stemming on top of unaccent
+SEARCH_CONFIG = "french_unaccent"
+
+# Minimum word_similarity() for a title to match on trigrams alone
+TRIGRAM_THRESHOLD = 0.4
+
+
+class ImmutableUnaccent(Func):
+    """
+    IMMUTABLE wrapper around unaccent(), created by migration 0008.
+
+    unaccent() itself is only STABLE, so it cannot be used in an index
+    expression; the trigram index is built on this function instead.
+    """
+
+    function = "bivouac_unaccent"
+    output_field = TextField()
+
+
+def uses_postgres_search():
+    return connection.vendor == "postgresql"
+
+
+def set_trigram_threshold(sender, connection, **kwargs):
+    """connection_created receiver applying TRIGRAM_THRESHOLD to the session."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # set_config() rather than SET, which takes no query parameters
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                [str(TRIGRAM_THRESHOLD)],
+            )
+
+
+def _folded(expression):
+    return ImmutableUnaccent(Lower(expression))
+
+
+def search_vector_expression():
+    """Weighted tsvector for a documentary row, suitable for .update()."""
+    director_names = Subquery(
+        Person.objects.filter(directed=OuterRef("pk"))
+        .order_by()
+        .values("directed")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    return (
+        SearchVector("title", "original_title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            Coalesce(director_names, Value(""), output_field=TextField()),
+            weight="B",
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector("synopsis", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(documentary_ids=None):
+    """
+    Refresh search_vector for the given documentaries (all when None).
+
+    No-op outside PostgreSQL. Returns the number of rows updated.
+    """
+    if not uses_postgres_search():
+        return 0
+    queryset = Documentary.objects.all()
+    if documentary_ids is not None:
+        queryset = queryset.filter(pk__in=documentary_ids)
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def search_documentaries(queryset, value):
+    """
+    Filter queryset to documentaries matching value, ordered by relevance.
+
+    The queryset is annotated with search_rank (higher is better).
+    """
+    value = value.strip()
+    if not value:
+        return queryset
+
+    if uses_postgres_search():
+        return _postgres_search(queryset, value)
+    return _fallback_search(queryset, value)
+
+
+def _postgres_search(queryset, value):
+    query = SearchQuery(value, search_type="websearch", config=SEARCH_CONFIG)
+    folded_title = _folded(F("title"))
+    folded_value = _folded(Value(value))
+    return (
+        queryset.annotate(
+            title_folded=folded_title,
+            search_rank=SearchRank(F("search_vector"), query)
+            + TrigramWordSimilarity(folded_value, folded_title),
+        )
+        .filter(Q(search_vector=query) | Q(title_folded__trigram_word_similar=folded_value))
+        .order_by("-search_rank", "-year", "title")
+    )
+
+
+def _fallback_search(queryset, value):
+    director_match = Exists(
+        Documentary.directors.through.objects.filter(
+            documentary_id=OuterRef("pk"), person__name__icontains=value
+        )
+    )
+    return (
+        queryset.filter(
+            Q(title__icontains=value)
+            | Q(original_title__icontains=value)
+            | Q(synopsis__icontains=value)
+            | director_match
+        )
+        .annotate(
+            search_rank=Case(
+                When(title__icontains=value, then=Value(1.0)),
+                When(original_title__icontains=value, then=Value(0.8)),
+                When(director_match, then=Value(0.5)),
+                default=Value(0.2),
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-search_rank", "-year", "title")
+    )
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "search"
+
+urlpatterns = [
+    path("suggest/", views.SuggestView.as_view(), name="suggest"),
+]
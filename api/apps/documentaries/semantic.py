@@ -0,0 +1,304 @@
+"""
+Semantic synopsis search (?semantic=): latent semantic analysis.
+
+Synopses are bags of accent-folded words weighted by TF-IDF (sublinear term
+frequency, smoothed inverse document frequency, rows L2 normalized). Words
+found in fewer than MIN_DOCUMENT_FREQUENCY synopses are noise and words in
+more than MAX_DOCUMENT_RATIO of them carry no meaning, so both are dropped.
+A truncated SVD reduces the documentary x word matrix to DIMENSIONS latent
+topics: documentary vectors are their TF-IDF rows times the word x topic
+components, and a query is folded into the same space the same way. Words
+used in similar synopses end up close together, so "traversée en solitaire
+d'une calotte glaciaire" also finds polar expeditions described with other
+words. Documentaries are ranked by cosine similarity.
+
+build_semantic_index writes the arrays under RECOMMENDATIONS_DIR as .npy
+files named after the build, the vectors last: their presence means the set
+is complete. Everything is opened with mmap_mode="r", so the workers of a
+host share one copy in the page cache. Workers look for a newer build when
+the directory modification time changes, and a build bumps the SEARCH
+cache version; until the first build, ?semantic= falls back to keyword
+search.
+
+Catalogs up to EXACT_SEARCH_LIMIT documentaries are scored exhaustively, in
+batches of rows. Past it, random-projection LSH narrows down the candidates:
+each of LSH_TABLES tables hashes a vector to the signs of its projections on
+random hyperplanes, with about LSH_BUCKET_SIZE documentaries per code, and
+only documentaries whose code is within one bit of the query's in some table
+are scored. The work per query then stays about constant as the catalog
+grows, at the cost of occasionally missing a weakly similar documentary.
+"""
+
+import math
+import re
+import time
+from collections import Counter, namedtuple
+from functools import partial
+
+from django.db.models import Case, FloatField, Value, When
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from .cache import SEARCH, bump_version
+from .datafiles import data_directory, data_path, write_atomically
+from .models import Documentary
+from .search import search_documentaries
+from .suggest import fold
+
+DIMENSIONS = 128
+
+MIN_WORD_LENGTH = 3
+# The vocabulary is stored as a fixed-width string array
+MAX_WORD_LENGTH = 32
+MIN_DOCUMENT_FREQUENCY = 2
+MAX_DOCUMENT_RATIO = 0.5
+
+RESULT_COUNT = 100
+# Lower similarities are mostly shared filler words
+MIN_SIMILARITY = 0.2
+
+# Larger catalogs go through the LSH index instead of a full scan
+EXACT_SEARCH_LIMIT = 20000
+# Rows scored at once during a full scan
+BATCH_SIZE = 65536
+
+LSH_TABLES = 12
+LSH_BUCKET_SIZE = 64
+# Fixed so that rebuilding an unchanged catalog gives the same index
+SEED = 0
+
+SemanticIndex = namedtuple(
+    "SemanticIndex", ["ids", "vocabulary", "idf", "components", "planes", "codes", "order", "vectors"]
+)
+
+
+def _words(text):
+    return [
+        word for word in fold(text).split()
+        if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH and not word.isdigit()
+    ]
+
+
+def _normalize(matrix):
+    """Dense rows scaled to unit length (zero rows are left alone)."""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def tfidf_matrix():
+    """
+    (documentary IDs, vocabulary, idf, normalized documentary x word CSR matrix).
+
+    Rows are the published documentaries with a synopsis, by ID; columns the
+    words of the sorted vocabulary.
+    """
+    ids, documents = [], []
+    rows = (
+        Documentary.objects.filter(is_published=True).exclude(synopsis="")
+        .order_by("pk").values_list("pk", "synopsis")
+    )
+    for pk, synopsis in rows:
+        ids.append(pk)
+        documents.append(Counter(_words(synopsis)))
+
+    document_frequency = Counter(word for counts in documents for word in counts)
+    vocabulary = sorted(
+        word for word, frequency in document_frequency.items()
+        if MIN_DOCUMENT_FREQUENCY <= frequency <= MAX_DOCUMENT_RATIO * len(documents)
+    )
+    columns = {word: column for column, word in enumerate(vocabulary)}
+
+    data, indices, indptr = [], [], [0]
+    for counts in documents:
+        for word, count in counts.items():
+            column = columns.get(word)
+            if column is not None:
+                indices.append(column)
+                data.append(1 + math.log(count))
+        indptr.append(len(indices))
+
+    frequencies = np.asarray([document_frequency[word] for word in vocabulary], dtype=np.float32)
+    idf = np.log((1 + len(documents)) / (1 + frequencies)).astype(np.float32) + 1
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), indices, indptr), shape=(len(documents), len(vocabulary))
+    ) @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (
+        np.asarray(ids, dtype=np.int64),
+        np.asarray(vocabulary, dtype=f"U{MAX_WORD_LENGTH}"),
+        idf,
+        (sparse.diags(1 / norms) @ matrix).astype(np.float32).tocsr(),
+    )
+
+
+def lsh_codes(vectors, planes):
+    """(tables, rows) int64 codes: bit b of a code is the sign of the projection on plane b."""
+    weights = np.left_shift(1, np.arange(planes.shape[2], dtype=np.int64))
+    return np.stack([((vectors @ table) > 0) @ weights for table in planes])
+
+
+def build_index(dimensions=DIMENSIONS):
+    """Compute the SemanticIndex of the current synopses."""
+    ids, vocabulary, idf, matrix = tfidf_matrix()
+    # ARPACK needs fewer dimensions than rows and columns
+    dimensions = max(0, min(dimensions, min(matrix.shape) - 1))
+    if dimensions:
+        start = np.random.default_rng(SEED).uniform(-1, 1, min(matrix.shape))
+        _, singular_values, word_topics = svds(matrix, k=dimensions, v0=start)
+        # svds returns the topics by increasing singular value
+        components = word_topics[np.argsort(-singular_values)].T.astype(np.float32)
+    else:
+        components = np.zeros((len(vocabulary), 0), dtype=np.float32)
+    vectors = _normalize(matrix @ components).astype(np.float32)
+
+    bits = int(np.clip(round(math.log2(max(len(ids), 1) / LSH_BUCKET_SIZE)), 1, 30))
+    planes = np.random.default_rng(SEED).standard_normal((LSH_TABLES, dimensions, bits)).astype(np.float32)
+    codes = lsh_codes(vectors, planes)
+    order = np.argsort(codes, axis=1, kind="stable")
+    return SemanticIndex(
+        ids=ids, vocabulary=vocabulary, idf=idf, components=components, planes=planes,
+        codes=np.take_along_axis(codes, order, axis=1), order=order.astype(np.int32), vectors=vectors,
+    )
+
+
+def _path(name, build):
+    return data_path(f"semantic-{name}-{build}.npy")
+
+
+def _builds(directory):
+    """Complete builds found in directory, newest first."""
+    pattern = re.compile(r"semantic-vectors-(\d+)\.npy")
+    matches = (pattern.fullmatch(path.name) for path in directory.glob("semantic-vectors-*.npy"))
+    return sorted((int(match.group(1)) for match in matches if match), reverse=True)
+
+
+def save_index(index):
+    """Write index as a new build and remove all but the previous one."""
+    build = time.time_ns()
+    for name, array in index._asdict().items():
+        write_atomically(_path(name, build), partial(np.save, arr=array))
+
+    # Workers still mapping older files keep their pages until they unmap them
+    for old_build in _builds(data_directory())[2:]:
+        for name in SemanticIndex._fields:
+            _path(name, old_build).unlink(missing_ok=True)
+    bump_version(SEARCH)
+
+
+def build_semantic_index(dimensions=DIMENSIONS):
+    """Rebuild and save the index; returns the number of documentaries indexed."""
+    index = build_index(dimensions)
+    save_index(index)
+    return len(index.ids)
+
+
+# (directory modification time, SemanticIndex) mapped by this worker
+_index = (None, None)
+
+
+def get_index():
+    """The newest complete build, memory-mapped; None before the first one."""
+    global _index
+    directory = data_directory()
+    try:
+        modified = directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _index[0] != modified:
+        builds = _builds(directory)
+        index = SemanticIndex(*(
+            np.load(_path(name, builds[0]), mmap_mode="r") for name in SemanticIndex._fields
+        )) if builds else None
+        _index = (modified, index)
+    return _index[1]
+
+
+def query_vector(index, text):
+    """Unit vector of text in the topic space (all zeros when no word is known)."""
+    counts = Counter(_words(text))
+    vector = np.zeros(index.components.shape[1], dtype=np.float32)
+    if not counts or not len(index.vocabulary):
+        return vector
+    words = np.asarray(list(counts), dtype=index.vocabulary.dtype)
+    columns = np.minimum(np.searchsorted(index.vocabulary, words), len(index.vocabulary) - 1)
+    known = index.vocabulary[columns] == words
+    if not known.any():
+        return vector
+
+    columns = columns[known]
+    weights = 1 + np.log(np.asarray(list(counts.values()), dtype=np.float32)[known])
+    vector = (weights * index.idf[columns]) @ index.components[columns]
+    return _normalize(vector).astype(np.float32)
+
+
+def _candidates(index, vector):
+    """Sorted rows sharing an LSH bucket, or a neighbouring one, with vector."""
+    codes = lsh_codes(vector[np.newaxis], index.planes)[:, 0]
+    bits = index.planes.shape[2]
+    rows = []
+    for table, code in enumerate(codes.tolist()):
+        probes = np.asarray([code] + [code ^ (1 << bit) for bit in range(bits)], dtype=np.int64)
+        starts = np.searchsorted(index.codes[table], probes, side="left")
+        ends = np.searchsorted(index.codes[table], probes, side="right")
+        rows += [index.order[table][start:end] for start, end in zip(starts, ends, strict=True)]
+    return np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+
+
+def semantic_matches(text, count=RESULT_COUNT):
+    """
+    [(documentary ID, cosine similarity)] closest to text, best first.
+
+    None when no index was built yet.
+    """
+    index = get_index()
+    if index is None:
+        return None
+    vector = query_vector(index, text)
+    if not vector.any():
+        return []
+
+    if len(index.ids) <= EXACT_SEARCH_LIMIT:
+        rows = np.arange(len(index.ids))
+        scores = np.concatenate([
+            index.vectors[start:start + BATCH_SIZE] @ vector
+            for start in range(0, len(index.ids), BATCH_SIZE)
+        ])
+    else:
+        rows = _candidates(index, vector)
+        scores = index.vectors[rows] @ vector
+
+    keep = np.flatnonzero(scores >= MIN_SIMILARITY)
+    if len(keep) > count:
+        keep = keep[np.argpartition(-scores[keep], count - 1)[:count]]
+    # Best score first, lowest ID on ties
+    keep = keep[np.lexsort((rows[keep], -scores[keep]))]
+    return list(zip(index.ids[rows[keep]].tolist(), scores[keep].tolist(), strict=True))
+
+
+def semantic_documentaries(queryset, value):
+    """
+    Filter queryset to the documentaries closest in meaning to value, best first.
+
+    The queryset is annotated with semantic_score (cosine similarity).
+    """
+    value = value.strip()
+    if not value:
+        return queryset
+    matches = semantic_matches(value)
+    if matches is None:
+        return search_documentaries(queryset, value)
+
+    return (
+        queryset.filter(pk__in=[pk for pk, _ in matches])
+        .annotate(semantic_score=Case(
+            *(When(pk=pk, then=Value(score)) for pk, score in matches),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+        .order_by("-semantic_score", "-year", "title")
+    )
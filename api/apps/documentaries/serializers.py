@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
+from .library import LibraryState
 from .models import (
     Availability,
     Documentary,
@@ -55,47 +57,96 @@ class AvailabilitySerializer(serializers.ModelSerializer):
         ]
 
 
-class DocumentaryListSerializer(serializers.ModelSerializer):
+class LibraryFlagsMixin(serializers.Serializer):
+    """
+    is_in_watchlist / is_watched / is_favorited read from a shared LibraryState.
+
+    Views put a LibraryState covering the whole page in the serializer context;
+    without one, a state is loaded for the single documentary being serialized.
+    """
+
+    is_in_watchlist = serializers.SerializerMethodField()
+    is_watched = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
+
+    def get_library_state(self, obj):
+        state = self.context.get("library_state")
+        if state is None or not state.covers(obj.pk):
+            request = self.context.get("request")
+            state = LibraryState.for_documentaries(request.user if request else None, obj)
+        return state
+
+    def get_is_in_watchlist(self, obj):
+        return self.get_library_state(obj).is_in_watchlist(obj.pk)
+
+    def get_is_watched(self, obj):
+        return self.get_library_state(obj).is_watched(obj.pk)
+
+    def get_is_favorited(self, obj):
+        return self.get_library_state(obj).is_favorited(obj.pk)
+
+
+def _split_param(value):
+    return [name for name in (value or "").replace(" ", "").split(",") if name]
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields= / ?expand= support.
+
+    Meta.fields lists every available field; those in Meta.expandable_fields
+    are only sent when named in ?expand=. ?fields= keeps only the listed
+    fields. Views resolve the selection with requested_fields() and pass it
+    as context["fields"], so they can also skip the queries of unrequested
+    fields.
+    """
+
+    @classmethod
+    def default_fields(cls):
+        expandable = getattr(cls.Meta, "expandable_fields", [])
+        return [name for name in cls.Meta.fields if name not in expandable]
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """Field names selected by the query parameters, in Meta.fields order."""
+        fields = _split_param(query_params.get("fields"))
+        expand = _split_param(query_params.get("expand"))
+        unknown = [name for name in [*fields, *expand] if name not in cls.Meta.fields]
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}"})
+
+        selected = set(fields or cls.default_fields()) | set(expand)
+        return [name for name in cls.Meta.fields if name in selected]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = set(self.context.get("fields") or self.default_fields())
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+
+class DocumentaryListSerializer(SparseFieldsetMixin, LibraryFlagsMixin, serializers.ModelSerializer):
     """Serializer for documentary list view (minimal data)."""
 
     sports = SportSerializer(many=True, read_only=True)
     average_rating = serializers.ReadOnlyField()
     review_count = serializers.ReadOnlyField()
-    is_in_watchlist = serializers.SerializerMethodField()
-    is_watched = serializers.SerializerMethodField()
-    is_favorited = serializers.SerializerMethodField()
+    # Only sent with ?expand=
+    themes = ThemeSerializer(many=True, read_only=True)
+    regions = RegionSerializer(many=True, read_only=True)
+    directors = PersonSerializer(many=True, read_only=True)
+    availabilities = AvailabilitySerializer(many=True, read_only=True)
 
     class Meta:
         model = Documentary
         fields = [
             "id", "title", "slug", "year", "duration_minutes",
             "poster", "sports", "average_rating", "review_count",
-            "is_in_watchlist", "is_watched", "is_favorited"
+            "is_in_watchlist", "is_watched", "is_favorited",
+            "themes", "regions", "directors", "availabilities"
         ]
-
-    def get_is_in_watchlist(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Watchlist.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
-
-    def get_is_watched(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Watched.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
-
-    def get_is_favorited(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Favorite.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
+        expandable_fields = ["themes", "regions", "directors", "availabilities"]
 
 
 class DocumentaryHeroSerializer(serializers.ModelSerializer):
@@ -113,7 +164,7 @@ class DocumentaryHeroSerializer(serializers.ModelSerializer):
         ]
 
 
-class DocumentaryDetailSerializer(serializers.ModelSerializer):
+class DocumentaryDetailSerializer(SparseFieldsetMixin, LibraryFlagsMixin, serializers.ModelSerializer):
     """Serializer for documentary detail view (full data)."""
 
     sports = SportSerializer(many=True, read_only=True)
@@ -123,9 +174,6 @@ class DocumentaryDetailSerializer(serializers.ModelSerializer):
     availabilities = AvailabilitySerializer(many=True, read_only=True)
     average_rating = serializers.ReadOnlyField()
     review_count = serializers.ReadOnlyField()
-    is_in_watchlist = serializers.SerializerMethodField()
-    is_watched = serializers.SerializerMethodField()
-    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Documentary
@@ -138,33 +186,31 @@ class DocumentaryDetailSerializer(serializers.ModelSerializer):
             "is_in_watchlist", "is_watched", "is_favorited", "created_at", "updated_at"
         ]
 
-    def get_is_in_watchlist(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Watchlist.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
 
-    def get_is_watched(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Watched.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
+class DocumentaryCardField(serializers.Field):
+    """
+    Documentary card of a library row.
 
-    def get_is_favorited(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Favorite.objects.filter(
-                user=request.user, documentary=obj
-            ).exists()
-        return False
+    Reads the card prebuilt by the view in context["cards"] (see cards.py),
+    falling back to DocumentaryListSerializer for single rows.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, instance):
+        card = self.context.get("cards", {}).get(instance.documentary_id)
+        if card is None:
+            card = DocumentaryListSerializer(instance.documentary, context=self.context).data
+        return card
 
 
 class WatchlistSerializer(serializers.ModelSerializer):
-    documentary = DocumentaryListSerializer(read_only=True)
+    documentary = DocumentaryCardField()
 
     class Meta:
         model = Watchlist
@@ -181,8 +227,22 @@ class WatchlistCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+# IDs accepted by one /library-state/ request (cards of a few pages)
+LIBRARY_STATE_MAX_IDS = 500
+
+
+class LibraryStateRequestSerializer(serializers.Serializer):
+    """IDs of the documentaries to return the library state of."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=LIBRARY_STATE_MAX_IDS,
+    )
+
+
 class WatchedSerializer(serializers.ModelSerializer):
-    documentary = DocumentaryListSerializer(read_only=True)
+    documentary = DocumentaryCardField()
 
     class Meta:
         model = Watched
@@ -200,7 +260,7 @@ class WatchedCreateSerializer(serializers.ModelSerializer):
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
-    documentary = DocumentaryListSerializer(read_only=True)
+    documentary = DocumentaryCardField()
 
     class Meta:
         model = Favorite
@@ -0,0 +1,266 @@
+import logging
+import threading
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.users.models import UserProfile
+
+from .cache import CATALOG, TAXONOMY, bump_version_on_commit, library_namespace
+from .models import (
+    Availability,
+    Documentary,
+    Favorite,
+    Person,
+    Platform,
+    Region,
+    RelatedDocumentary,
+    Sport,
+    Theme,
+    Watched,
+    Watchlist,
+)
+from .search import set_trigram_threshold, update_search_vectors
+from .similarity import update_related
+from .suggest import SUGGESTION_TYPES, record_change
+
+TAG_THROUGH_MODELS = [
+    Documentary.sports.through,
+    Documentary.themes.through,
+    Documentary.regions.through,
+    Documentary.directors.through,
+]
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Documentary)
+@receiver(post_delete, sender=Documentary)
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def invalidate_catalog(sender, **kwargs):
+    """Invalidate cached data derived from documentaries and their offers."""
+    bump_version_on_commit(CATALOG)
+
+
+@receiver(post_save, sender=Availability)
+def sync_availability_countries(sender, instance, raw=False, **kwargs):
+    """Keep the indexed country rows of an offer in step with its country_codes."""
+    if not raw:
+        instance.sync_countries()
+
+
+def invalidate_catalog_on_tags_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version_on_commit(CATALOG)
+
+
+for through in TAG_THROUGH_MODELS:
+    m2m_changed.connect(
+        invalidate_catalog_on_tags_change,
+        sender=through,
+        dispatch_uid=f"invalidate_catalog_{through._meta.label_lower}",
+    )
+
+
+# Documentary IDs whose neighbours await a refresh, per thread (and so per
+# connection)
+_pending_related = threading.local()
+
+
+def flush_related_updates():
+    """Refresh the neighbours of every pending documentary in one update_related call."""
+    documentary_ids = getattr(_pending_related, "ids", None)
+    _pending_related.ids = set()
+    if not documentary_ids:
+        return
+    try:
+        update_related(documentary_ids)
+    except Exception:
+        # The edit is committed already: a stale list (fixed by the next
+        # build_related) beats turning the save into an error
+        logger.exception("Could not refresh related documentaries of %s", sorted(documentary_ids))
+
+
+def schedule_related_update(documentary_ids):
+    """
+    Refresh "more like this" neighbours once the transaction commits.
+
+    A documentary edit changes its publication and several tag relations in
+    one transaction: the IDs are collected and the first callback to run
+    after the commit refreshes them all with a single update_related call,
+    so the tag matrix is built once. IDs left over from a rolled back
+    transaction are refreshed with the next one, which is harmless.
+    """
+    documentary_ids = set(documentary_ids)
+    if documentary_ids:
+        if not hasattr(_pending_related, "ids"):
+            _pending_related.ids = set()
+        _pending_related.ids |= documentary_ids
+        transaction.on_commit(flush_related_updates)
+
+
+def refresh_related_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            schedule_related_update([instance.pk])
+        return
+
+    # Reverse side: instance is the tag and pk_set holds documentary IDs
+    if action == "pre_clear":
+        tag_field = next(
+            field.name for field in sender._meta.get_fields()
+            if getattr(field, "related_model", None) is type(instance)
+        )
+        instance._cleared_related_ids = list(
+            sender.objects.filter(**{tag_field: instance}).values_list("documentary_id", flat=True)
+        )
+    elif action == "post_clear":
+        schedule_related_update(getattr(instance, "_cleared_related_ids", []))
+    elif action in ("post_add", "post_remove"):
+        schedule_related_update(pk_set)
+
+
+for through in TAG_THROUGH_MODELS:
+    m2m_changed.connect(
+        refresh_related_on_tags_change,
+        sender=through,
+        dispatch_uid=f"refresh_related_{through._meta.label_lower}",
+    )
+
+
+@receiver(post_save, sender=Documentary)
+def refresh_related_on_publication_change(sender, instance, raw=False, **kwargs):
+    """Add newly published documentaries to the index, drop unpublished ones."""
+    if raw:
+        return
+    if instance.is_published:
+        stale = not RelatedDocumentary.objects.filter(documentary=instance).exists()
+    else:
+        stale = RelatedDocumentary.objects.filter(documentary=instance).exists() or (
+            RelatedDocumentary.objects.filter(related=instance).exists()
+        )
+    if stale:
+        schedule_related_update([instance.pk])
+
+
+@receiver(pre_delete, sender=Documentary)
+def refresh_related_on_delete(sender, instance, **kwargs):
+    """Documentaries listing a deleted one get a replacement neighbour."""
+    listing = RelatedDocumentary.objects.filter(related=instance).values_list("documentary_id", flat=True)
+    schedule_related_update([instance.pk, *listing])
+
+
+@receiver(post_save, sender=Sport)
+@receiver(post_delete, sender=Sport)
+@receiver(post_save, sender=Theme)
+@receiver(post_delete, sender=Theme)
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=Platform)
+@receiver(post_delete, sender=Platform)
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def invalidate_taxonomy(sender, **kwargs):
+    """Invalidate cached data that embeds taxonomy names."""
+    bump_version_on_commit(TAXONOMY)
+
+
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+@receiver(post_save, sender=Watched)
+@receiver(post_delete, sender=Watched)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_user_library(sender, instance, **kwargs):
+    """Invalidate responses embedding the user's watchlist/watched/favorite flags."""
+    bump_version_on_commit(library_namespace(instance.user_id))
+
+
+@receiver(m2m_changed, sender=UserProfile.favorite_sports.through)
+def invalidate_user_library_on_favorite_sports_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Favorite sports feed the user's recommendations."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_version_on_commit(library_namespace(instance.user_id))
+        return
+
+    # Reverse side: instance is a Sport and pk_set holds profile IDs
+    if action == "pre_clear":
+        instance._cleared_user_ids = list(instance.favorited_by.values_list("user_id", flat=True))
+        return
+    if action == "post_clear":
+        user_ids = getattr(instance, "_cleared_user_ids", [])
+    elif action in ("post_add", "post_remove"):
+        user_ids = UserProfile.objects.filter(pk__in=pk_set).values_list("user_id", flat=True)
+    else:
+        return
+    for user_id in user_ids:
+        bump_version_on_commit(library_namespace(user_id))
+
+
+@receiver(post_save, sender=Documentary)
+def refresh_documentary_search_vector(sender, instance, raw=False, **kwargs):
+    """Rebuild the search document after title/synopsis edits."""
+    if not raw:
+        update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Documentary.directors.through)
+def refresh_search_vector_on_directors_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Director names are part of the search document."""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            update_search_vectors([instance.pk])
+        return
+
+    # Reverse side: instance is a Person and pk_set holds documentary IDs
+    if action == "pre_clear":
+        instance._cleared_documentary_ids = list(instance.directed.values_list("pk", flat=True))
+    elif action == "post_clear":
+        update_search_vectors(getattr(instance, "_cleared_documentary_ids", []))
+    elif action in ("post_add", "post_remove"):
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Person)
+def refresh_search_vectors_on_person_rename(sender, instance, created, raw=False, **kwargs):
+    """Keep director names in the search document up to date."""
+    if raw or created:
+        return
+    update_search_vectors(instance.directed.values_list("pk", flat=True))
+
+
+connection_created.connect(set_trigram_threshold, dispatch_uid="documentaries_trigram_threshold")
+
+
+def reindex_suggestion(sender, instance, raw=False, **kwargs):
+    """Have every worker re-index a saved or deleted object (see suggest.py)."""
+    if not raw:
+        kind, pk = SUGGESTION_TYPES[sender], instance.pk
+        transaction.on_commit(lambda: record_change(kind, pk))
+
+
+for model in SUGGESTION_TYPES:
+    for signal in (post_save, post_delete):
+        signal.connect(
+            reindex_suggestion,
+            sender=model,
+            dispatch_uid=f"reindex_suggestion_{model._meta.label_lower}",
+        )
+
+
+@receiver(m2m_changed, sender=Documentary.directors.through)
+def reindex_directors_suggestions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Directors become suggestions with their first published documentary."""
+    if action not in ("post_add", "post_remove"):
+        return
+    person_ids = [instance.pk] if reverse else list(pk_set)
+
+    def record():
+        for pk in person_ids:
+            record_change("person", pk)
+
+    transaction.on_commit(record)
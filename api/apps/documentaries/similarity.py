@@ -0,0 +1,182 @@
+"""
+"More like this": item-item similarity from shared tags.
+
+Published documentaries are rows of a sparse documentary x tag matrix
+(sports, themes, regions and directors as columns). Each tag is weighted by
+its relation weight and its inverse document frequency, rows are L2
+normalized, and the cosine similarity of two documentaries is the dot
+product of their rows. Sparse products only touch documentaries sharing at
+least one tag, so nothing is ever compared pairwise in Python.
+
+The top RELATED_COUNT neighbours of every documentary are stored in
+RelatedDocumentary and served with one indexed lookup. Tag changes update
+the affected documentaries only (update_related); build_related rebuilds
+everything. Incremental updates recompute IDF weights too but only rewrite
+the lists they know to be affected, so lists elsewhere drift slightly as tag
+frequencies change: run build_related periodically (e.g. nightly). Both bump
+the RECOMMENDATIONS cache version once the new lists are committed.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Min
+
+import numpy as np
+from scipy import sparse
+
+from .cache import RECOMMENDATIONS, bump_version_on_commit
+from .models import Documentary, RelatedDocumentary
+
+RELATED_COUNT = 12
+
+# How much a shared tag of each relation counts, before IDF weighting
+TAG_WEIGHTS = {
+    "sports": 1.0,
+    "themes": 1.0,
+    "regions": 0.5,
+    "directors": 2.0,
+}
+
+# Rows multiplied against the whole matrix at once during a full rebuild
+CHUNK_SIZE = 500
+
+
+def tag_matrix():
+    """
+    (documentary IDs, tag columns, normalized documentary x tag CSR matrix).
+
+    Row i of the matrix is the documentary ids[i]; ids are sorted. Column j
+    is the tag columns[j], a (relation index in TAG_WEIGHTS, tag ID) pair.
+    """
+    ids = np.fromiter(
+        Documentary.objects.filter(is_published=True).order_by("pk").values_list("pk", flat=True),
+        dtype=np.int64,
+    )
+    index = {pk: row for row, pk in enumerate(ids.tolist())}
+
+    rows, cols, weights, columns = [], [], [], []
+    for relation_index, (relation, weight) in enumerate(TAG_WEIGHTS.items()):
+        field = Documentary._meta.get_field(relation)
+        pairs = field.remote_field.through.objects.values_list(
+            "documentary_id", f"{field.m2m_reverse_field_name()}_id"
+        )
+        tag_columns = {}
+        for documentary_id, tag_id in pairs:
+            row = index.get(documentary_id)
+            if row is None:
+                continue
+            rows.append(row)
+            cols.append(tag_columns.setdefault(tag_id, len(columns) + len(tag_columns)))
+            weights.append(weight)
+        columns += [(relation_index, tag_id) for tag_id in tag_columns]
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), (rows, cols)),
+        shape=(len(ids), len(columns)),
+    )
+    matrix.sum_duplicates()
+
+    # Rare tags say more about a documentary than ubiquitous ones
+    document_frequency = np.diff(matrix.tocsc().indptr)
+    idf = np.log((1 + len(ids)) / (1 + document_frequency)).astype(np.float32) + 1
+    matrix = matrix @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    columns = np.asarray(columns, dtype=np.int64).reshape(-1, 2)
+    return ids, columns, sparse.diags(1 / norms).astype(np.float32) @ matrix
+
+
+def top_neighbours(matrix, rows, count=RELATED_COUNT):
+    """Yield (row, neighbour rows, scores) for rows, best scores first."""
+    yield from best_entries((matrix[rows] @ matrix.T).tocsr(), rows, count)
+
+
+def best_entries(similarities, rows, count):
+    """
+    Yield (row, columns, scores) of the count best entries of each row.
+
+    similarities is a CSR matrix with one line per item of rows, whose
+    columns index the same items as rows; an item is never its own neighbour.
+    """
+    for position, row in enumerate(rows):
+        start, end = similarities.indptr[position], similarities.indptr[position + 1]
+        neighbours = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+
+        keep = (neighbours != row) & (scores > 0)
+        neighbours, scores = neighbours[keep], scores[keep]
+        # Highest score first, lowest row (oldest documentary) on ties, so
+        # ties at the cut-off are broken the same way on every run
+        order = np.lexsort((neighbours, -scores))[:count]
+        yield row, neighbours[order], scores[order]
+
+
+def _store(ids, matrix, rows, count):
+    """Replace the stored neighbours of the documentaries at rows."""
+    entries = []
+    for row, neighbours, scores in top_neighbours(matrix, rows, count):
+        entries += [
+            RelatedDocumentary(
+                documentary_id=int(ids[row]), related_id=int(ids[neighbour]),
+                rank=rank, score=float(score),
+            )
+            for rank, (neighbour, score) in enumerate(zip(neighbours, scores, strict=True))
+        ]
+    RelatedDocumentary.objects.filter(documentary_id__in=ids[rows].tolist()).delete()
+    RelatedDocumentary.objects.bulk_create(entries, batch_size=1000)
+
+
+@transaction.atomic
+def build_related(count=RELATED_COUNT):
+    """Recompute the neighbours of every published documentary."""
+    ids, _, matrix = tag_matrix()
+    RelatedDocumentary.objects.all().delete()
+    for start in range(0, len(ids), CHUNK_SIZE):
+        _store(ids, matrix, list(range(start, min(start + CHUNK_SIZE, len(ids)))), count)
+    bump_version_on_commit(RECOMMENDATIONS)
+    return len(ids)
+
+
+@transaction.atomic
+def update_related(documentary_ids, count=RELATED_COUNT):
+    """
+    Refresh neighbours after the tags or publication of documentary_ids changed.
+
+    Besides the changed documentaries themselves, this recomputes the ones
+    that listed one of them, and the ones a changed documentary is now
+    similar enough to enter (fewer than count neighbours, or a score at least
+    their current lowest).
+    """
+    documentary_ids = set(documentary_ids)
+    ids, _, matrix = tag_matrix()
+    position = {pk: row for row, pk in enumerate(ids.tolist())}
+    changed_rows = [position[pk] for pk in documentary_ids if pk in position]
+
+    affected = set(
+        RelatedDocumentary.objects.filter(related_id__in=documentary_ids)
+        .values_list("documentary_id", flat=True)
+    )
+    if changed_rows:
+        best_scores = np.asarray((matrix[changed_rows] @ matrix.T).max(axis=0).todense()).ravel()
+        candidates = {int(ids[row]) for row in np.flatnonzero(best_scores > 0)} - documentary_ids
+        stored = {
+            entry["documentary_id"]: entry
+            for entry in RelatedDocumentary.objects.filter(documentary_id__in=candidates)
+            .values("documentary_id")
+            .annotate(entries=Count("pk"), lowest=Min("score"))
+        }
+        for pk in candidates:
+            entry = stored.get(pk)
+            if entry is None or entry["entries"] < count or best_scores[position[pk]] >= entry["lowest"]:
+                affected.add(pk)
+
+    # Unpublished or deleted documentaries lose their own list
+    RelatedDocumentary.objects.filter(
+        documentary_id__in=[pk for pk in documentary_ids if pk not in position]
+    ).delete()
+
+    rows = sorted(set(changed_rows) | {position[pk] for pk in affected if pk in position})
+    if rows:
+        _store(ids, matrix, rows, count)
+    bump_version_on_commit(RECOMMENDATIONS)
+    return len(rows)
@@ -0,0 +1,242 @@
+"""
+"Did you mean": spelling correction of searches that found nothing.
+
+The vocabulary is every word of published documentary titles, director
+names and sport, theme and region names, accent-folded like the suggestion
+index (suggest.fold). Corrections use symmetric deletes (SymSpell): each
+vocabulary word is indexed under every string obtained by deleting up to
+MAX_EDIT_DISTANCE characters from its first PREFIX_LENGTH characters, and a
+misspelled word is looked up under its own deletes. Two words within the
+edit distance share at least one delete, so candidates come from a handful
+of exact lookups instead of a scan of the vocabulary, and are then checked
+with the real (Damerau-Levenshtein) distance. Among the closest candidates,
+the most frequent word wins.
+
+build_spelling_dictionary writes the dictionary to RECOMMENDATIONS_DIR as
+numpy arrays: 64-bit hashes of the deletes, sorted, with the vocabulary
+index of their word, and the words themselves as UTF-8 blobs. Each worker
+loads the file once and again only when it is replaced, so a rebuild is
+picked up without restarts, and bumps the SEARCH cache version so cached
+list responses get the new "did you mean". Nothing is corrected until the
+command has run; run it after imports and periodically (e.g. nightly) for
+new titles.
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import combinations
+
+import numpy as np
+
+from .cache import SEARCH, bump_version
+from .datafiles import data_path, write_atomically
+from .models import Documentary, Person, Region, Sport, Theme
+from .suggest import fold
+
+MAX_EDIT_DISTANCE = 2
+# Words up to this length are only corrected by a single edit
+SHORT_WORD_LENGTH = 4
+# Shorter words are too ambiguous to correct
+MIN_WORD_LENGTH = 3
+# Deletes are generated from this many leading characters only, which keeps
+# the index small; longer words are still verified over their full length
+PREFIX_LENGTH = 7
+
+
+def _path():
+    return data_path("spelling.npz")
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def _deletes(word, distance):
+    """word and every string obtained by deleting up to distance characters."""
+    prefix = word[:PREFIX_LENGTH]
+    return {
+        "".join(char for position, char in enumerate(prefix) if position not in removed)
+        for count in range(min(distance, len(prefix)) + 1)
+        for removed in map(set, combinations(range(len(prefix)), count))
+    }
+
+
+def edit_distance(source, target, limit):
+    """Optimal string alignment distance of source and target, or limit + 1 beyond limit."""
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = source[i - 1] != target[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                before is not None and j > 1
+                and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]
+            ):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return min(current[-1], limit + 1)
+
+
+def _texts():
+    """Every text whose words make up the vocabulary."""
+    for title, original_title in Documentary.objects.filter(is_published=True).values_list(
+        "title", "original_title"
+    ):
+        yield title
+        if original_title:
+            yield original_title
+    yield from Person.objects.filter(directed__is_published=True).distinct().values_list("name", flat=True)
+    for model in (Sport, Theme, Region):
+        yield from model.objects.values_list("name", flat=True)
+
+
+def _pack(strings):
+    """(UTF-8 blob, offsets) of strings: string i is blob[offsets[i]:offsets[i + 1]]."""
+    encoded = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class SpellingDictionary:
+    """Vocabulary words, their display forms and counts, and the sorted delete hashes."""
+
+    def __init__(self, words, forms, counts, hashes, word_indexes):
+        self.words, self.forms, self.counts = words, forms, counts
+        self.hashes, self.word_indexes = hashes, word_indexes
+
+    @classmethod
+    def build(cls):
+        counts, forms = Counter(), defaultdict(Counter)
+        for text in _texts():
+            for surface in re.findall(r"\w+", text):
+                word = fold(surface)
+                if len(word) >= MIN_WORD_LENGTH and " " not in word and not word.isdigit():
+                    counts[word] += 1
+                    forms[word][surface.lower()] += 1
+
+        words = sorted(counts)
+        hashes, word_indexes = [], []
+        for index, word in enumerate(words):
+            for delete in _deletes(word, MAX_EDIT_DISTANCE):
+                hashes.append(_hash(delete))
+                word_indexes.append(index)
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        return cls(
+            words=_pack(words),
+            # The accented spelling seen most often, e.g. "forêts" for "forets"
+            forms=_pack([forms[word].most_common(1)[0][0] for word in words]),
+            counts=np.asarray([counts[word] for word in words], dtype=np.int32),
+            hashes=hashes[order],
+            word_indexes=np.asarray(word_indexes, dtype=np.int32)[order],
+        )
+
+    def save(self):
+        """Write the dictionary to its file, replaced atomically."""
+        write_atomically(_path(), partial(
+            np.savez,
+            words=self.words[0], word_offsets=self.words[1],
+            forms=self.forms[0], form_offsets=self.forms[1],
+            counts=self.counts, hashes=self.hashes, word_indexes=self.word_indexes,
+        ))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            return cls(
+                words=(state["words"], state["word_offsets"]),
+                forms=(state["forms"], state["form_offsets"]),
+                counts=state["counts"], hashes=state["hashes"], word_indexes=state["word_indexes"],
+            )
+
+    def __len__(self):
+        return len(self.counts)
+
+    @staticmethod
+    def _string(packed, index):
+        blob, offsets = packed
+        return blob[offsets[index]:offsets[index + 1]].tobytes().decode()
+
+    def correct(self, word):
+        """
+        Display form of the vocabulary word closest to the folded word.
+
+        None when word is in the vocabulary, too short, or nothing is close.
+        """
+        if len(word) < MIN_WORD_LENGTH or word.isdigit():
+            return None
+        limit = 1 if len(word) <= SHORT_WORD_LENGTH else MAX_EDIT_DISTANCE
+
+        keys = np.fromiter((_hash(delete) for delete in _deletes(word, limit)), dtype=np.uint64)
+        starts = np.searchsorted(self.hashes, keys, side="left")
+        ends = np.searchsorted(self.hashes, keys, side="right")
+        candidates = {
+            int(index) for start, end in zip(starts, ends, strict=True)
+            for index in self.word_indexes[start:end]
+        }
+
+        best = None
+        for index in candidates:
+            distance = edit_distance(word, self._string(self.words, index), limit)
+            if distance == 0:
+                return None
+            if distance <= limit:
+                # Closest first, then most frequent, then alphabetical
+                rank = (distance, -int(self.counts[index]), index)
+                best = min(best or rank, rank)
+        return self._string(self.forms, best[2]) if best else None
+
+
+# (file modification time, SpellingDictionary) loaded by this worker
+_dictionary = (None, None)
+
+
+def get_dictionary():
+    """This worker's dictionary, reloaded when the file changed; None before any build."""
+    global _dictionary
+    try:
+        modified = _path().stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _dictionary[0] != modified:
+        _dictionary = (modified, SpellingDictionary.load(_path()))
+    return _dictionary[1]
+
+
+def build_spelling_dictionary():
+    """Rebuild the dictionary file from the database; returns the vocabulary size."""
+    dictionary = SpellingDictionary.build()
+    dictionary.save()
+    bump_version(SEARCH)
+    return len(dictionary)
+
+
+def correct_query(text):
+    """
+    text with its misspelled words replaced, or None when nothing changed.
+
+    Words found in the vocabulary, short words and numbers are kept as typed.
+    """
+    dictionary = get_dictionary()
+    if dictionary is None:
+        return None
+
+    corrected, changed = [], False
+    position = 0
+    for match in re.finditer(r"\w+", text):
+        word = fold(match.group())
+        replacement = dictionary.correct(word) if word and " " not in word else None
+        if replacement and match.group()[0].isupper():
+            replacement = replacement[0].upper() + replacement[1:]
+        corrected += [text[position:match.start()], replacement or match.group()]
+        changed = changed or replacement is not None
+        position = match.end()
+    corrected.append(text[position:])
+    return "".join(corrected).strip() if changed else None
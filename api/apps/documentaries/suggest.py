@@ -0,0 +1,276 @@
+"""
+Search-as-you-type suggestions (/api/search/suggest/).
+
+Every worker keeps an in-memory prefix index over published documentary
+titles, directors, sports, themes and regions. Names are accent-folded and
+lower-cased ("Épopée" -> "epopee") and indexed from the start of each word,
+so "blanc" finds "Mont Blanc". All keys live in one sorted list: the matches
+of a prefix are the contiguous run starting at bisect_left(prefix), and the
+best of them are picked by popularity (reviews for documentaries, published
+documentaries for the others), normalized per type. Those runs are longest
+for the shortest queries, so the answers to every prefix of up to
+SHORT_PREFIX_LENGTH characters are ranked once, when the index is built.
+
+Saves and deletions of the indexed models are queued in the shared cache
+under increasing sequence numbers (record_change). Before answering, a
+worker reads the latest sequence number and re-indexes only the objects
+changed since its own; it rebuilds everything when it fell too far behind,
+or after REBUILD_INTERVAL since popularity changes are not tracked.
+"""
+
+import heapq
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import namedtuple
+from itertools import groupby, islice, takewhile
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Documentary, Person, Region, Sport, Theme
+
+SUGGESTION_COUNT = 8
+MIN_QUERY_LENGTH = 2
+# Queries up to this long are answered from the table ranked at build time
+SHORT_PREFIX_LENGTH = 3
+
+# Seconds before a worker rebuilds its index to refresh popularity
+REBUILD_INTERVAL = 60 * 60
+# A worker further behind than this many changes rebuilds instead
+MAX_PENDING_CHANGES = 500
+CHANGE_TIMEOUT = 60 * 60
+
+SEQUENCE_KEY = "bivouac:suggest:sequence"
+
+Entry = namedtuple("Entry", ["type", "id", "slug", "label", "year", "popularity"])
+
+
+def fold(text):
+    """Lower-cased, accent-free words of text joined by single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+def _keys(names):
+    """(key, word position) of every word start of names."""
+    keys = set()
+    for name in names:
+        words = fold(name).split()
+        keys.update((" ".join(words[position:]), position) for position in range(len(words)))
+    return keys
+
+
+def _documentaries(pks=None):
+    queryset = Documentary.objects.filter(is_published=True)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    rows = queryset.values_list(
+        "pk", "slug", "title", "original_title", "year", "rating_summary__review_count"
+    )
+    for pk, slug, title, original_title, year, review_count in rows:
+        yield Entry("documentary", pk, slug, title, year, review_count or 0), [title, original_title]
+
+
+def _tags(kind, model, relation, pks=None):
+    queryset = model.objects.annotate(
+        popularity=Count(relation, filter=Q(**{f"{relation}__is_published": True}))
+    )
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    for pk, slug, name, popularity in queryset.values_list("pk", "slug", "name", "popularity"):
+        # People only matter as directors of something watchable
+        if kind != "person" or popularity:
+            yield Entry(kind, pk, slug, name, None, popularity), [name]
+
+
+# Suggestion type -> (model, loader of (entry, names) for all or some pks)
+SOURCES = {
+    "documentary": (Documentary, _documentaries),
+    "person": (Person, lambda pks=None: _tags("person", Person, "directed", pks)),
+    "sport": (Sport, lambda pks=None: _tags("sport", Sport, "documentaries", pks)),
+    "theme": (Theme, lambda pks=None: _tags("theme", Theme, "documentaries", pks)),
+    "region": (Region, lambda pks=None: _tags("region", Region, "documentaries", pks)),
+}
+
+SUGGESTION_TYPES = {model: kind for kind, (model, _) in SOURCES.items()}
+
+
+class SuggestionIndex:
+    """Entries and their sorted (key, word position, type, id) prefix keys."""
+
+    def __init__(self, entries=None, names=None, keys=None, short_prefixes=None):
+        self.entries = entries or {}
+        self.names = names or {}
+        self.keys = keys or []
+        self._normalize()
+        if short_prefixes is None:
+            self._rank_short_prefixes()
+        else:
+            self.short_prefixes = short_prefixes
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        for _, load in SOURCES.values():
+            for entry, names in load():
+                index.entries[entry.type, entry.id] = entry
+                index.names[entry.type, entry.id] = names
+        index.keys = sorted(
+            (key, position, *ref) for ref, names in index.names.items() for key, position in _keys(names)
+        )
+        index._normalize()
+        index._rank_short_prefixes()
+        return index
+
+    def _normalize(self):
+        self.max_popularity = {}
+        for entry in self.entries.values():
+            self.max_popularity[entry.type] = max(self.max_popularity.get(entry.type, 0), entry.popularity)
+
+    def updated(self, changes):
+        """Copy of the index with the (type, id) objects of changes reloaded."""
+        entries, names, keys = dict(self.entries), dict(self.names), list(self.keys)
+        changed_keys = set()
+        for ref in changes:
+            entries.pop(ref, None)
+            for key, position in _keys(names.pop(ref, [])):
+                del keys[bisect_left(keys, (key, position, *ref))]
+                changed_keys.add(key)
+
+        pks_by_type = {}
+        for kind, pk in changes:
+            pks_by_type.setdefault(kind, set()).add(pk)
+        for kind, pks in pks_by_type.items():
+            _, load = SOURCES[kind]
+            for entry, entry_names in load(pks):
+                ref = (entry.type, entry.id)
+                entries[ref], names[ref] = entry, entry_names
+                for key, position in _keys(entry_names):
+                    insort(keys, (key, position, *ref))
+                    changed_keys.add(key)
+
+        index = SuggestionIndex(entries, names, keys, short_prefixes=dict(self.short_prefixes))
+        if index.max_popularity != self.max_popularity:
+            # Every score of the type moved
+            index._rank_short_prefixes()
+        else:
+            index._rank_short_prefixes({
+                key[:length] for key in changed_keys
+                for length in range(MIN_QUERY_LENGTH, min(len(key), SHORT_PREFIX_LENGTH) + 1)
+            })
+        return index
+
+    def _rank_short_prefixes(self, prefixes=None):
+        """
+        Rank the best SUGGESTION_COUNT (type, id) of key prefixes of up to
+        SHORT_PREFIX_LENGTH characters: all of them, or only prefixes.
+        """
+        if prefixes is not None:
+            for prefix in prefixes:
+                refs = self._rank(self._run(prefix), SUGGESTION_COUNT)
+                if refs:
+                    self.short_prefixes[prefix] = refs
+                else:
+                    self.short_prefixes.pop(prefix, None)
+            return
+
+        self.short_prefixes = {}
+        for length in range(MIN_QUERY_LENGTH, SHORT_PREFIX_LENGTH + 1):
+            # Prefixes of sorted keys are sorted too: each prefix is one run
+            long_enough = (item for item in self.keys if len(item[0]) >= length)
+            for prefix, run in groupby(long_enough, key=lambda item: item[0][:length]):
+                self.short_prefixes[prefix] = self._rank(run, SUGGESTION_COUNT)
+
+    def _run(self, prefix):
+        """The contiguous keys starting with prefix."""
+        run = islice(self.keys, bisect_left(self.keys, (prefix,)), None)
+        return takewhile(lambda item: item[0].startswith(prefix), run)
+
+    def _score(self, entry):
+        top = self.max_popularity.get(entry.type) or 0
+        return math.log1p(entry.popularity) / math.log1p(top) if top else 0.0
+
+    def _rank(self, keys, count):
+        """(type, id) of the best count entries of keys."""
+        # Name starts before later words, then popularity
+        best = {}
+        for _, position, kind, pk in keys:
+            ref = (kind, pk)
+            best[ref] = max(best.get(ref, (False, 0.0)), (position == 0, self._score(self.entries[ref])))
+        return heapq.nlargest(
+            count, best, key=lambda ref: (*best[ref], -len(self.entries[ref].label))
+        )
+
+    def suggest(self, query, count=SUGGESTION_COUNT):
+        """Best entries whose name has a word starting with query."""
+        prefix = fold(query)
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX_LENGTH and count <= SUGGESTION_COUNT:
+            refs = self.short_prefixes.get(prefix, [])[:count]
+        else:
+            refs = self._rank(self._run(prefix), count)
+        return [self.entries[ref] for ref in refs]
+
+
+# (sequence number, monotonic build time, SuggestionIndex) of this worker
+_index = (0, 0.0, None)
+
+
+def _sequence():
+    return cache.get(SEQUENCE_KEY) or 0
+
+
+def _change_key(sequence):
+    return f"bivouac:suggest:change:{sequence}"
+
+
+def record_change(kind, pk):
+    """Queue a saved or deleted object for re-indexing by every worker."""
+    try:
+        sequence = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        sequence = cache.incr(SEQUENCE_KEY)
+    cache.set(_change_key(sequence), (kind, pk), CHANGE_TIMEOUT)
+
+
+def get_index():
+    """This worker's index, brought up to date with the queued changes."""
+    global _index
+    seen, built_at, index = _index
+    sequence = _sequence()
+
+    pending = sequence - seen
+    expired = time.monotonic() - built_at > REBUILD_INTERVAL
+    # A negative count means the cache was cleared
+    if index is None or expired or not 0 <= pending <= MAX_PENDING_CHANGES:
+        _index = (sequence, time.monotonic(), SuggestionIndex.build())
+        return _index[2]
+
+    if pending:
+        keys = [_change_key(number) for number in range(seen + 1, sequence + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            # Expired, or not written yet by a concurrent record_change
+            _index = (sequence, time.monotonic(), SuggestionIndex.build())
+            return _index[2]
+        index = index.updated({tuple(change) for change in changes.values()})
+        _index = (sequence, built_at, index)
+    return index
+
+
+def get_suggestions(query, count=SUGGESTION_COUNT):
+    """Suggestion dicts for query, best first."""
+    return [
+        {
+            "type": entry.type, "id": entry.id, "slug": entry.slug, "label": entry.label,
+            **({"year": entry.year} if entry.type == "documentary" else {}),
+        }
+        for entry in get_index().suggest(query, count)
+    ]
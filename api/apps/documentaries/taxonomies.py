@@ -0,0 +1,45 @@
+"""
+Taxonomy bundle: sports, themes, regions and platforms in one payload.
+
+The bundle is kept in memory by each worker together with the TAXONOMY
+version it was built for (see cache.py). Requests only read that version
+from the shared cache; the database is queried again only after a Sport,
+Theme, Region, Platform or Person save/delete bumped it.
+"""
+
+from .cache import TAXONOMY, get_version
+from .models import Platform, Region, Sport, Theme
+from .serializers import PlatformSerializer, RegionSerializer, SportSerializer, ThemeSerializer
+
+# (version, bundle) of this worker; replaced as a whole so readers never see
+# a half-built bundle
+_bundle = (None, None)
+
+
+def build_taxonomy_bundle(version):
+    # Built without a request: logo URLs stay relative until served
+    return {
+        "version": str(version),
+        "sports": SportSerializer(Sport.objects.all(), many=True).data,
+        "themes": ThemeSerializer(Theme.objects.all(), many=True).data,
+        "regions": RegionSerializer(Region.objects.all(), many=True).data,
+        "platforms": PlatformSerializer(Platform.objects.all(), many=True).data,
+    }
+
+
+def get_taxonomy_bundle(request=None):
+    """Current taxonomy bundle, rebuilt when the TAXONOMY version changed."""
+    global _bundle
+    version = get_version(TAXONOMY)
+    cached_version, bundle = _bundle
+    if cached_version != version:
+        bundle = build_taxonomy_bundle(version)
+        _bundle = (version, bundle)
+
+    if request is None:
+        return bundle
+    platforms = [
+        {**platform, "logo": request.build_absolute_uri(platform["logo"]) if platform["logo"] else None}
+        for platform in bundle["platforms"]
+    ]
+    return {**bundle, "platforms": platforms}
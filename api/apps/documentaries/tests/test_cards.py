@@ -0,0 +1,178 @@
+import datetime
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+import pytest
+
+from apps.documentaries.cards import card_rows, serialize_cards
+from apps.documentaries.library import LibraryState
+from apps.documentaries.models import (
+    Availability,
+    Documentary,
+    Favorite,
+    Person,
+    Platform,
+    Sport,
+    Theme,
+    Watchlist,
+)
+from apps.documentaries.offers import current_offers
+from apps.documentaries.serializers import DocumentaryListSerializer
+from apps.reviews.models import Review
+
+
+@pytest.fixture
+def catalog(user):
+    sports = [Sport.objects.create(name=name, slug=name.lower(), icon="mountain") for name in ("Ski", "Alpinisme")]
+    theme = Theme.objects.create(name="Aventure", slug="aventure")
+    director = Person.objects.create(name="Jeanne Dupont", slug="jeanne-dupont")
+    platform = Platform.objects.create(name="Arte", slug="arte", is_free=True)
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+
+    documentaries = []
+    for i in range(12):
+        documentary = Documentary.objects.create(
+            title=f"Face nord {i}",
+            year=2000 + i % 4,
+            duration_minutes=50 + i,
+            is_published=True,
+            poster=f"posters/{i}.jpg" if i % 3 else "",
+        )
+        documentary.sports.set(sports[: 1 + i % 2])
+        documentary.themes.set([theme] if i % 2 else [])
+        documentary.directors.set([director])
+        Availability.objects.create(
+            documentary=documentary,
+            platform=platform,
+            url=f"https://example.com/{i}",
+            country_codes=["FR"] if i % 4 else ["BE"],
+            # Expired offers are never serialized
+            available_until=yesterday if i == 5 else None,
+        )
+        documentaries.append(documentary)
+
+    for i, documentary in enumerate(documentaries[:6]):
+        Review.objects.create(user=user, documentary=documentary, rating=1 + i % 5)
+    Watchlist.objects.create(user=user, documentary=documentaries[1])
+    Favorite.objects.create(user=user, documentary=documentaries[2])
+    return documentaries
+
+
+def make_request(user=None, **params):
+    request = RequestFactory().get("/api/documentaries/", params)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def cards_queryset():
+    return Documentary.objects.filter(is_published=True).order_by("-year", "title", "pk")
+
+
+def serializer_output(request, fields):
+    documentaries = list(
+        cards_queryset()
+        .select_related("rating_summary")
+        .prefetch_related(
+            "sports", "themes", "regions", "directors",
+            Prefetch("availabilities", queryset=current_offers("FR").select_related("platform")),
+        )
+    )
+    context = {
+        "request": request,
+        "fields": fields,
+        "library_state": LibraryState.for_documentaries(request.user, documentaries),
+    }
+    return DocumentaryListSerializer(documentaries, many=True, context=context).data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("authenticated", [False, True])
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"fields": "id,title,is_favorited"}, {"expand": "themes,directors,availabilities"}],
+)
+def test_cards_match_list_serializer(catalog, user, authenticated, params):
+    request = make_request(user if authenticated else None, **params)
+    fields = DocumentaryListSerializer.requested_fields(request.GET)
+
+    cards = serialize_cards(card_rows(cards_queryset(), fields), request, fields=fields)
+
+    renderer = JSONRenderer()
+    assert renderer.render(cards) == renderer.render(serializer_output(request, fields))
+
+
+@pytest.mark.django_db
+def test_card_library_flags(catalog, user):
+    cards = serialize_cards(card_rows(cards_queryset()), make_request(user))
+
+    by_id = {card["id"]: card for card in cards}
+    assert by_id[catalog[1].pk]["is_in_watchlist"] is True
+    assert by_id[catalog[2].pk]["is_favorited"] is True
+    assert by_id[catalog[3].pk]["is_in_watchlist"] is False
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 12])
+def test_card_query_count(catalog, user, size, django_assert_num_queries):
+    request = make_request(user)
+    # Cards, their sports and the three library relations, whatever the size
+    with django_assert_num_queries(5):
+        cards = serialize_cards(card_rows(cards_queryset()[:size]), request)
+    assert len(cards) == size
+
+
+@pytest.mark.django_db
+def test_card_query_count_skips_unrequested_fields(catalog, django_assert_num_queries):
+    request = make_request(fields="id,title")
+    fields = DocumentaryListSerializer.requested_fields(request.GET)
+
+    with django_assert_num_queries(1):
+        serialize_cards(card_rows(cards_queryset(), fields), request, fields=fields)
+
+
+def best_time(function, repeat=5):
+    """Fastest of repeat runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [20, 100, 1000])
+def test_cards_benchmark(user, size):
+    sports = [Sport.objects.create(name=name, slug=name.lower(), icon="mountain") for name in ("Ski", "Alpinisme")]
+    platform = Platform.objects.create(name="Arte", slug="arte", is_free=True)
+    documentaries = Documentary.objects.bulk_create(
+        Documentary(
+            title=f"Face nord {i}", slug=f"face-nord-{i}", year=2000 + i % 20, duration_minutes=50, is_published=True
+        )
+        for i in range(size)
+    )
+    Documentary.sports.through.objects.bulk_create(
+        Documentary.sports.through(documentary=documentary, sport=sports[i % 2])
+        for i, documentary in enumerate(documentaries)
+    )
+    Availability.objects.bulk_create(
+        Availability(documentary=documentary, platform=platform, url=f"https://example.com/{documentary.pk}")
+        for documentary in documentaries
+    )
+    request = make_request(user)
+    fields = DocumentaryListSerializer.requested_fields(request.GET)
+
+    def cards():
+        return serialize_cards(card_rows(cards_queryset(), fields), request, fields=fields)
+
+    def serializer():
+        return serializer_output(request, fields)
+
+    renderer = JSONRenderer()
+    assert renderer.render(cards()) == renderer.render(serializer())
+    cards_time, serializer_time = best_time(cards), best_time(serializer)
+    assert cards_time < serializer_time, f"cards {cards_time * 1000:.1f} ms, serializer {serializer_time * 1000:.1f} ms"
@@ -0,0 +1,84 @@
+import pytest
+
+from apps.documentaries.models import Documentary, Watchlist
+from apps.reviews.models import Review
+
+LIST_URL = "/api/documentaries/"
+
+
+@pytest.fixture
+def documentary(db):
+    return Documentary.objects.create(title="Face nord", year=2020, duration_minutes=52, is_published=True)
+
+
+def revalidate(client, response, url=LIST_URL):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+def test_unchanged_list_is_not_modified(api_client, documentary):
+    response = api_client.get(LIST_URL)
+
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "public, max-age=60"
+    not_modified = revalidate(api_client, response)
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == response["ETag"]
+    assert not not_modified.content
+    since = api_client.get(LIST_URL, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert since.status_code == 304
+
+
+def test_etag_depends_on_query(api_client, documentary):
+    response = api_client.get(LIST_URL)
+
+    assert api_client.get(f"{LIST_URL}?year=2020", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 200
+
+
+def test_documentary_change_invalidates_after_commit(
+    api_client, documentary, django_capture_on_commit_callbacks
+):
+    response = api_client.get(LIST_URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        documentary.title = "Face sud"
+        documentary.save()
+        # Until the transaction commits, the old version stays current
+        assert revalidate(api_client, response).status_code == 304
+
+    changed = revalidate(api_client, response)
+    assert changed.status_code == 200
+    assert changed.json()["results"][0]["title"] == "Face sud"
+
+
+def test_review_invalidates_ratings(api_client, user, documentary, django_capture_on_commit_callbacks):
+    response = api_client.get(LIST_URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Review.objects.create(user=user, documentary=documentary, rating=5)
+
+    changed = revalidate(api_client, response)
+    assert changed.status_code == 200
+    assert changed.json()["results"][0]["review_count"] == 1
+
+
+def test_library_change_only_invalidates_its_user(
+    api_client, user_client, user, documentary, django_capture_on_commit_callbacks
+):
+    anonymous = api_client.get(LIST_URL)
+    personal = user_client.get(LIST_URL)
+    assert personal["ETag"] != anonymous["ETag"]
+    assert personal["Cache-Control"] == "private, no-cache"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Watchlist.objects.create(user=user, documentary=documentary)
+
+    assert revalidate(api_client, anonymous).status_code == 304
+    changed = revalidate(user_client, personal)
+    assert changed.status_code == 200
+    assert changed.json()["results"][0]["is_in_watchlist"] is True
+
+
+def test_random_hero_has_no_validators(api_client, documentary):
+    response = api_client.get(f"{LIST_URL}hero/")
+
+    assert "ETag" not in response
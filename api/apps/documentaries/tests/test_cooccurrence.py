@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+import pytest
+
+from apps.documentaries import cooccurrence
+from apps.documentaries.models import AlsoLikedDocumentary, Documentary, Favorite, Watched, Watchlist
+from apps.reviews.models import Review
+from apps.users.models import User
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable timezone.now(), also used for the library rows' timestamps."""
+    now = [datetime(2026, 3, 1, 12, tzinfo=timezone.get_current_timezone())]
+    monkeypatch.setattr(timezone, "now", lambda: now[0])
+    return now
+
+
+@pytest.fixture(autouse=True)
+def data_directory(settings, tmp_path):
+    settings.RECOMMENDATIONS_DIR = tmp_path
+
+
+@pytest.fixture
+def documentaries(db):
+    return [
+        Documentary.objects.create(title=f"Face nord {i}", year=2020, duration_minutes=52, is_published=True)
+        for i in range(4)
+    ]
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com") for i in range(4)]
+
+
+def snapshot():
+    counts, _ = cooccurrence._load_counts()
+    lists = list(AlsoLikedDocumentary.objects.order_by("documentary_id", "rank").values_list(
+        "documentary_id", "related_id", "score"
+    ))
+    return counts.toarray(), lists
+
+
+def assert_matches_rebuild():
+    counts, lists = snapshot()
+    cooccurrence.build_cooccurrence()
+    rebuilt_counts, rebuilt_lists = snapshot()
+
+    size = min(len(counts), len(rebuilt_counts))
+    assert (counts[:size, :size] == rebuilt_counts[:size, :size]).all()
+    assert lists == pytest.approx(rebuilt_lists)
+
+
+def test_updates_match_rebuild(clock, documentaries, users):
+    start = clock[0]
+    clock[0] = start - timedelta(days=1)
+    for user in users[:2]:
+        Watched.objects.create(user=user, documentary=documentaries[0])
+        Favorite.objects.create(user=user, documentary=documentaries[1])
+    clock[0] = start
+    cooccurrence.update_cooccurrence()
+
+    # Stamped before the run, committed after it
+    clock[0] = start - timedelta(seconds=1)
+    Watchlist.objects.create(user=users[0], documentary=documentaries[2])
+    Watched.objects.create(user=users[2], documentary=documentaries[0])
+    clock[0] = start + timedelta(minutes=10)
+    Watchlist.objects.create(user=users[1], documentary=documentaries[2])
+    Review.objects.create(user=users[2], documentary=documentaries[1], rating=5)
+    Review.objects.create(user=users[3], documentary=documentaries[3], rating=2)
+    clock[0] = start + timedelta(days=1)
+    cooccurrence.update_cooccurrence()
+
+    assert AlsoLikedDocumentary.objects.filter(documentary=documentaries[2]).exists()
+    assert_matches_rebuild()
+
+
+def test_update_skips_unsettled_rows(clock, settings, documentaries, users):
+    cooccurrence.update_cooccurrence()
+    for user in users[:2]:
+        Watched.objects.create(user=user, documentary=documentaries[0])
+        Favorite.objects.create(user=user, documentary=documentaries[1])
+
+    clock[0] += timedelta(seconds=settings.EVENT_SETTLE_SECONDS)
+    assert cooccurrence.update_cooccurrence() == 0
+    clock[0] += timedelta(seconds=1)
+    assert cooccurrence.update_cooccurrence() == 2
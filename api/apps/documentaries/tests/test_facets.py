@@ -0,0 +1,33 @@
+import pytest
+
+from apps.documentaries import facets, filters
+from apps.documentaries.cache import SEARCH, bump_version
+from apps.documentaries.filters import DocumentaryFilter
+from apps.documentaries.models import Documentary
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Record compute_facets calls, with the semantic index stubbed out."""
+    calls = []
+    monkeypatch.setattr(filters, "semantic_documentaries", lambda queryset, value: queryset)
+    monkeypatch.setattr(facets, "compute_facets", lambda queryset, offers: calls.append(queryset) or {})
+    return calls
+
+
+def get_facets(params):
+    filterset = DocumentaryFilter(params, queryset=Documentary.objects.all())
+    assert filterset.is_valid(), filterset.errors
+    return facets.get_facets(filterset)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(("params", "recomputed"), [({}, False), ({"semantic": "glacier"}, True)])
+def test_semantic_index_rebuild_invalidates_semantic_facets(computed, params, recomputed):
+    get_facets(params)
+    get_facets(params)
+    assert len(computed) == 1
+
+    bump_version(SEARCH)
+    get_facets(params)
+    assert len(computed) == (2 if recomputed else 1)
@@ -0,0 +1,80 @@
+import pytest
+
+from apps.documentaries.filters import DocumentaryFilter
+from apps.documentaries.models import Documentary, Person, Sport, Theme
+
+
+@pytest.fixture
+def sports(db):
+    return {slug: Sport.objects.create(name=slug.title(), slug=slug) for slug in ("ski", "surf", "escalade")}
+
+
+@pytest.fixture
+def documentaries(sports):
+    theme = Theme.objects.create(name="Aventure", slug="aventure")
+    director = Person.objects.create(name="Jeanne Dupont", slug="jeanne-dupont")
+    tags = {
+        "ski": ["ski"],
+        "surf": ["surf"],
+        "ski-surf": ["ski", "surf"],
+        "all": ["ski", "surf", "escalade"],
+        "none": [],
+    }
+    documentaries = {}
+    for name, slugs in tags.items():
+        documentary = Documentary.objects.create(
+            title=name, slug=name, year=2020, duration_minutes=52, is_published=True
+        )
+        documentary.sports.set([sports[slug] for slug in slugs])
+        if "ski" in slugs:
+            documentary.themes.set([theme])
+        if len(slugs) > 1:
+            documentary.directors.set([director])
+        documentaries[name] = documentary
+    return documentaries
+
+
+def filtered(**params):
+    filterset = DocumentaryFilter(params, queryset=Documentary.objects.all())
+    assert filterset.is_valid(), filterset.errors
+    return sorted(filterset.qs.values_list("slug", flat=True))
+
+
+def test_any_of_several_values(documentaries):
+    assert filtered(sport="ski,surf") == ["all", "ski", "ski-surf", "surf"]
+    assert filtered(sport="ski,surf", sport_match="any") == ["all", "ski", "ski-surf", "surf"]
+
+
+def test_all_of_several_values(documentaries):
+    assert filtered(sport="ski,surf", sport_match="all") == ["all", "ski-surf"]
+    assert filtered(sport="ski,surf,escalade", sport_match="all") == ["all"]
+
+
+def test_single_value_and_blanks(documentaries):
+    assert filtered(sport="escalade") == ["all"]
+    assert filtered(sport=" surf , ,surf") == ["all", "ski-surf", "surf"]
+    assert filtered(sport=",") == ["all", "none", "ski", "ski-surf", "surf"]
+    assert filtered(sport="unknown") == []
+
+
+def test_relations_combine(documentaries):
+    assert filtered(sport="surf", theme="aventure") == ["all", "ski-surf"]
+    assert filtered(sport="ski", director="jeanne-dupont", director_match="all") == ["all", "ski-surf"]
+
+
+def test_no_duplicate_rows(documentaries):
+    filterset = DocumentaryFilter({"sport": "ski,surf,escalade"}, queryset=Documentary.objects.all())
+
+    sql = str(filterset.qs.query)
+    assert filterset.qs.count() == 4
+    assert "DISTINCT" not in sql
+    # Tags are only joined inside the EXISTS subquery
+    assert "EXISTS" in sql
+    assert "JOIN" not in sql.split(" WHERE ")[0]
+
+
+def test_invalid_match(documentaries):
+    filterset = DocumentaryFilter({"sport": "ski", "sport_match": "most"}, queryset=Documentary.objects.all())
+
+    assert not filterset.is_valid()
+    assert "sport_match" in filterset.errors
@@ -0,0 +1,97 @@
+import pytest
+
+from apps.documentaries.models import Documentary, Favorite, Watched, Watchlist
+from apps.documentaries.serializers import LIBRARY_STATE_MAX_IDS
+from apps.reviews.models import Review
+
+URL = "/api/documentaries/library-state/"
+
+
+@pytest.fixture
+def documentaries(user):
+    documentaries = [
+        Documentary.objects.create(title=f"Face nord {i}", year=2020, duration_minutes=52, is_published=True)
+        for i in range(3)
+    ]
+    Watchlist.objects.create(user=user, documentary=documentaries[0])
+    Watched.objects.create(user=user, documentary=documentaries[1])
+    Favorite.objects.create(user=user, documentary=documentaries[1])
+    Review.objects.create(user=user, documentary=documentaries[1], rating=4)
+    return documentaries
+
+
+def state(watchlist=False, watched=False, favorited=False, rating=None):
+    return {"is_in_watchlist": watchlist, "is_watched": watched, "is_favorited": favorited, "rating": rating}
+
+
+def test_requires_authentication(api_client, documentaries):
+    assert api_client.get(URL, {"ids": documentaries[0].pk}).status_code in (401, 403)
+
+
+def test_get_state(user_client, documentaries):
+    first, second, third = (documentary.pk for documentary in documentaries)
+
+    response = user_client.get(URL, {"ids": f"{first},{second},{third},{second},999999"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        str(first): state(watchlist=True),
+        str(second): state(watched=True, favorited=True, rating=4),
+        str(third): state(),
+        "999999": state(),
+    }
+
+
+def test_post_state(user_client, documentaries):
+    response = user_client.post(URL, {"ids": [documentaries[1].pk]}, format="json")
+
+    assert response.status_code == 200
+    assert response.json() == {str(documentaries[1].pk): state(watched=True, favorited=True, rating=4)}
+
+
+def test_other_users_library_is_not_shown(user_client, documentaries, django_user_model):
+    other = django_user_model.objects.create_user(username="bob", email="bob@example.com")
+    Watchlist.objects.create(user=other, documentary=documentaries[2])
+
+    assert user_client.get(URL, {"ids": documentaries[2].pk}).json() == {str(documentaries[2].pk): state()}
+
+
+@pytest.mark.parametrize("ids", ["", ",", "abc", "1,x", "0", "-4", "1.5"])
+def test_invalid_get_ids(user_client, ids):
+    response = user_client.get(URL, {"ids": ids})
+
+    assert response.status_code == 400
+    assert "ids" in response.json()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"ids": []}, {"ids": "1,2"}, {"ids": [None]}, {"ids": list(range(1, LIBRARY_STATE_MAX_IDS + 2))}],
+)
+def test_invalid_post_ids(user_client, db, body):
+    response = user_client.post(URL, body, format="json")
+
+    assert response.status_code == 400
+    assert "ids" in response.json()
+
+
+def test_query_count_does_not_grow_with_ids(user_client, documentaries, django_assert_num_queries):
+    ids = list(range(1, LIBRARY_STATE_MAX_IDS + 1))
+
+    # One query per relation: watchlist, watched, favorites and reviews
+    with django_assert_num_queries(4):
+        response = user_client.post(URL, {"ids": ids}, format="json")
+    assert len(response.json()) == LIBRARY_STATE_MAX_IDS
+
+
+def test_get_revalidates_against_the_library(user_client, user, documentaries, django_capture_on_commit_callbacks):
+    params = {"ids": documentaries[2].pk}
+    response = user_client.get(URL, params)
+    assert user_client.get(URL, params, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Favorite.objects.create(user=user, documentary=documentaries[2])
+
+    changed = user_client.get(URL, params, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert changed.status_code == 200
+    assert changed.json()[str(documentaries[2].pk)]["is_favorited"] is True
@@ -0,0 +1,73 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from apps.documentaries.models import Documentary
+
+
+@pytest.fixture
+def documentary(db):
+    return Documentary.objects.create(title="Face nord", year=2020, duration_minutes=52, is_published=True)
+
+
+def test_save_keeps_maintained_scores(documentary):
+    Documentary.objects.filter(pk=documentary.pk).update(rating_score=4.2, trending_score=7.0)
+
+    documentary.title = "Face sud"
+    documentary.save()
+
+    documentary.refresh_from_db()
+    assert documentary.title == "Face sud"
+    assert documentary.rating_score == 4.2
+    assert documentary.trending_score == 7.0
+
+
+def test_save_respects_update_fields(documentary):
+    documentary.title = "Face sud"
+    documentary.year = 2021
+    documentary.save(update_fields=["title"])
+
+    documentary.refresh_from_db()
+    assert (documentary.title, documentary.year) == ("Face sud", 2020)
+
+
+def test_save_writes_requested_scores(documentary):
+    documentary.rating_score = 4.2
+    documentary.save(update_fields=["rating_score"])
+
+    documentary.refresh_from_db()
+    assert documentary.rating_score == 4.2
+
+
+def test_save_force_insert_copy(documentary):
+    documentary.pk = None
+    documentary.slug = "face-nord-copie"
+    documentary.save(force_insert=True)
+
+    assert Documentary.objects.count() == 2
+
+
+def test_save_deferred_instance(documentary, django_assert_num_queries):
+    Documentary.objects.filter(pk=documentary.pk).update(synopsis="Une traversée", rating_score=4.2)
+    loaded = Documentary.objects.get(pk=documentary.pk)
+    deferred = Documentary.objects.defer("synopsis", "poster").get(pk=documentary.pk)
+
+    with CaptureQueriesContext(connection) as full_save:
+        loaded.save()
+    # Deferred fields are neither loaded nor written
+    with django_assert_num_queries(len(full_save)):
+        deferred.title = "Face sud"
+        deferred.save()
+
+    documentary.refresh_from_db()
+    assert (documentary.title, documentary.synopsis, documentary.rating_score) == ("Face sud", "Une traversée", 4.2)
+
+
+def test_save_deleted_row_inserts_it_again(documentary):
+    Documentary.objects.filter(pk=documentary.pk).delete()
+
+    documentary.title = "Face sud"
+    documentary.save()
+
+    assert Documentary.objects.get(pk=documentary.pk).title == "Face sud"
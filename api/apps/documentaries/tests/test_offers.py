@@ -0,0 +1,192 @@
+from datetime import timedelta
+
+from django.test import RequestFactory
+from django.utils import timezone
+
+import pytest
+
+from apps.documentaries.filters import DocumentaryFilter
+from apps.documentaries.models import Availability, AvailabilityCountry, Documentary, Platform
+from apps.documentaries.offers import current_offers, normalize_country, request_country
+
+LIST_URL = "/api/documentaries/"
+
+
+@pytest.fixture
+def platforms(db):
+    return {
+        slug: Platform.objects.create(name=slug.title(), slug=slug)
+        for slug in ("arte", "netflix")
+    }
+
+
+@pytest.fixture
+def make_documentary(db):
+    def make(slug, *offers):
+        """offers: (platform, country_codes, extra Availability fields) tuples."""
+        documentary = Documentary.objects.create(
+            title=slug, slug=slug, year=2020, duration_minutes=52, is_published=True
+        )
+        for platform, country_codes, fields in offers:
+            Availability.objects.create(
+                documentary=documentary, platform=platform, url=f"https://example.com/{slug}",
+                country_codes=country_codes, **fields,
+            )
+        return documentary
+
+    return make
+
+
+def filtered(**params):
+    filterset = DocumentaryFilter(params, queryset=Documentary.objects.all())
+    assert filterset.is_valid(), filterset.errors
+    return sorted(filterset.qs.values_list("slug", flat=True))
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("be", "BE"), (" Fr ", "FR"), ("XX", None), ("T1", None), ("BEL", None), ("", None), (None, None)],
+)
+def test_normalize_country(value, expected):
+    assert normalize_country(value) == expected
+
+
+@pytest.mark.parametrize(
+    ("params", "headers", "expected"),
+    [
+        ({"country": "ch"}, {"CF-IPCountry": "BE", "Accept-Language": "fr-CA"}, "CH"),
+        ({}, {"CF-IPCountry": "BE", "Accept-Language": "fr-CA"}, "BE"),
+        ({}, {"CF-IPCountry": "XX", "Accept-Language": "fr-CA,fr;q=0.8"}, "CA"),
+        ({"country": "nowhere"}, {"Accept-Language": "fr"}, "FR"),
+    ],
+)
+def test_request_country(settings, params, headers, expected):
+    settings.GEOIP_COUNTRY_HEADER = "CF-IPCountry"
+    settings.DEFAULT_COUNTRY = "FR"
+
+    assert request_country(RequestFactory().get("/", params, headers=headers)) == expected
+
+
+def test_country_rows_follow_country_codes(make_documentary, platforms):
+    documentary = make_documentary("face-nord", (platforms["arte"], ["fr", "BE", "bogus"], {}))
+    offer = documentary.availabilities.get()
+
+    def codes():
+        return sorted(offer.countries.values_list("country_code", flat=True))
+
+    assert codes() == ["BE", "FR"]
+    offer.country_codes = ["CH"]
+    offer.save()
+    assert codes() == ["CH"]
+    offer.country_codes = []
+    offer.save()
+    assert codes() == [AvailabilityCountry.ANY_COUNTRY]
+    assert set(offer.countries.values_list("documentary_id", flat=True)) == {documentary.pk}
+
+
+def test_country_filter(make_documentary, platforms):
+    make_documentary("france", (platforms["arte"], ["FR"], {}))
+    make_documentary("belgique", (platforms["netflix"], ["BE"], {}))
+    make_documentary("partout", (platforms["netflix"], [], {}))
+    make_documentary("nulle-part")
+
+    assert filtered(country="be") == ["belgique", "partout"]
+    assert filtered(country="FR") == ["france", "partout"]
+    assert filtered() == ["belgique", "france", "nulle-part", "partout"]
+
+
+def test_offer_filters_use_the_country_offers(make_documentary, platforms):
+    make_documentary(
+        "arte-en-france", (platforms["arte"], ["FR"], {"is_free": True}), (platforms["netflix"], ["BE"], {})
+    )
+
+    assert filtered(platform="arte") == ["arte-en-france"]
+    assert filtered(is_free=True) == ["arte-en-france"]
+    assert filtered(platform="arte", country="BE") == []
+    assert filtered(is_free=True, country="BE") == []
+    assert filtered(is_free=False, country="BE") == ["arte-en-france"]
+
+
+def test_invalid_country_is_rejected(api_client, db):
+    assert api_client.get(LIST_URL, {"country": "France"}).status_code == 400
+
+
+def test_serialized_offers_follow_the_country(api_client, settings, make_documentary, platforms):
+    settings.GEOIP_COUNTRY_HEADER = "CF-IPCountry"
+    settings.DEFAULT_COUNTRY = "FR"
+    make_documentary(
+        "face-nord", (platforms["arte"], ["FR"], {}), (platforms["netflix"], ["BE", "CH"], {})
+    )
+
+    def platforms_listed(**headers):
+        response = api_client.get(f"{LIST_URL}face-nord/", **headers)
+        assert "CF-IPCountry" in response["Vary"]
+        return [offer["platform"]["slug"] for offer in response.json()["availabilities"]]
+
+    assert platforms_listed(HTTP_CF_IPCOUNTRY="BE") == ["netflix"]
+    assert platforms_listed(HTTP_ACCEPT_LANGUAGE="fr-CH") == ["netflix"]
+    assert platforms_listed() == ["arte"]
+
+
+def days(count):
+    return timezone.localdate() + timedelta(days=count)
+
+
+@pytest.mark.parametrize(
+    ("available_from", "available_until", "current"),
+    [
+        (None, None, True),
+        (-3, None, True),
+        (None, 0, True),
+        (0, 0, True),
+        (None, -1, False),
+        (1, None, False),
+    ],
+)
+def test_current_offers(make_documentary, platforms, available_from, available_until, current):
+    fields = {
+        "is_free": True,
+        "available_from": None if available_from is None else days(available_from),
+        "available_until": None if available_until is None else days(available_until),
+    }
+    documentary = make_documentary("face-nord", (platforms["arte"], [], fields))
+
+    assert current_offers().filter(documentary=documentary).exists() is current
+    assert (filtered(platform="arte") == ["face-nord"]) is current
+    assert (filtered(is_free=True) == ["face-nord"]) is current
+    assert (filtered(country="FR") == ["face-nord"]) is current
+
+
+def test_serialized_offers_are_current(api_client, make_documentary, platforms):
+    make_documentary(
+        "face-nord",
+        (platforms["arte"], [], {"available_until": days(-1)}),
+        (platforms["netflix"], [], {"available_from": days(-1)}),
+    )
+
+    detail = api_client.get(f"{LIST_URL}face-nord/").json()
+    cards = api_client.get(LIST_URL, {"expand": "availabilities"}).json()["results"]
+
+    assert [offer["platform"]["slug"] for offer in detail["availabilities"]] == ["netflix"]
+    assert [offer["platform"]["slug"] for offer in cards[0]["availabilities"]] == ["netflix"]
+
+
+def test_dated_rails(api_client, settings, make_documentary, platforms):
+    settings.LEAVING_SOON_DAYS = 14
+    settings.JUST_ARRIVED_DAYS = 14
+    arte, netflix = platforms["arte"], platforms["netflix"]
+    make_documentary("leaving-first", (arte, [], {"available_until": days(2)}))
+    make_documentary("leaving-later", (arte, [], {"available_until": days(10)}))
+    # Another offer keeps it watchable past the window
+    make_documentary("staying", (arte, [], {"available_until": days(2)}), (netflix, [], {}))
+    make_documentary("gone", (arte, [], {"available_until": days(-1)}))
+    make_documentary("arrived", (arte, [], {"available_from": days(-2), "available_until": days(30)}))
+    make_documentary("arrived-earlier", (arte, [], {"available_from": days(-10)}))
+    make_documentary("arrived-long-ago", (arte, [], {"available_from": days(-60)}))
+    make_documentary("upcoming", (arte, [], {"available_from": days(3)}))
+
+    def rail(name):
+        return [card["slug"] for card in api_client.get(f"{LIST_URL}{name}/").json()]
+
+    assert rail("leaving_soon") == ["leaving-first", "leaving-later"]
+    assert rail("just_arrived") == ["arrived", "arrived-earlier"]
@@ -0,0 +1,100 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from apps.documentaries.models import Documentary
+from apps.documentaries.pagination import KeysetPagination
+
+LIST_URL = "/api/documentaries/"
+
+
+@pytest.fixture
+def documentaries(db):
+    # Few distinct years and titles, so pages split runs of equal values
+    return [
+        Documentary.objects.create(
+            title=f"Face {'nord' if i % 3 else 'sud'}",
+            slug=f"face-{i}",
+            year=2000 + i % 4,
+            duration_minutes=50 + i,
+            is_published=True,
+        )
+        for i in range(23)
+    ]
+
+
+def expected_ids(*ordering):
+    return list(Documentary.objects.filter(is_published=True).order_by(*ordering).values_list("pk", flat=True))
+
+
+def walk(client, url, params=None, direction="next"):
+    """Pages of IDs from url, following the direction links."""
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([item["id"] for item in data["results"]])
+        if not data[direction]:
+            return pages, data
+        response = client.get(data[direction])
+
+
+@pytest.mark.parametrize(
+    ("ordering", "expected"),
+    [
+        (None, ["-year", "title", "pk"]),
+        ("year", ["year", "pk"]),
+        # The tiebreaker follows the last field's direction
+        ("-title", ["-title", "-pk"]),
+        ("-created_at", ["-created_at", "-pk"]),
+        ("trending", ["-trending_score", "-pk"]),
+    ],
+)
+def test_pages_cover_the_ordering_once(api_client, documentaries, ordering, expected):
+    params = {"pagination": "cursor", "page_size": 5}
+    if ordering:
+        params["ordering"] = ordering
+
+    pages, _ = walk(api_client, LIST_URL, params)
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [pk for page in pages for pk in page] == expected_ids(*expected)
+
+
+def test_previous_links_walk_back(api_client, documentaries):
+    pages, last = walk(api_client, LIST_URL, {"pagination": "cursor", "page_size": 5, "ordering": "year"})
+
+    back, first = walk(api_client, last["previous"], direction="previous")
+
+    assert back == pages[-2::-1]
+    assert first["previous"] is None
+
+
+def test_count_only_when_asked(api_client, documentaries):
+    params = {"pagination": "cursor", "page_size": 5}
+    with CaptureQueriesContext(connection) as queries:
+        data = api_client.get(LIST_URL, params).json()
+
+    assert "count" not in data
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+    assert api_client.get(LIST_URL, {**params, "with_count": 1}).json()["count"] == 23
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "eyJvIjpbInBrIl0sInYiOlsxXSwiciI6MH0"])
+def test_invalid_or_foreign_cursor(api_client, documentaries, cursor):
+    # The second cursor is valid for another ordering (pk only)
+    response = api_client.get(LIST_URL, {"pagination": "cursor", "cursor": cursor})
+
+    assert response.status_code == 404
+
+
+def test_seek_filter_has_a_leading_range_bound():
+    condition = KeysetPagination.seek_filter(["-year", "title", "-pk"], [2020, "Face nord", 12])
+
+    sql = str(Documentary.objects.filter(condition).query)
+    where = sql.split(" WHERE ")[1]
+    # An index range condition on the first key, then the exact tie-breaking
+    assert where.startswith('("documentaries_documentary"."year" <= 2020 AND')
+    assert '"documentaries_documentary"."id" < 12' in where
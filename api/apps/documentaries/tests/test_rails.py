@@ -0,0 +1,22 @@
+import pytest
+
+from apps.documentaries.cache import RATINGS, bump_version
+from apps.documentaries.rails import _hero_pool_key
+
+
+@pytest.mark.parametrize(("weighting", "follows_reviews"), [("uniform", False), ("recency", False), ("rating", True)])
+def test_hero_pool_follows_reviews_only_with_rating_weighting(settings, weighting, follows_reviews):
+    settings.HERO_WEIGHTING = weighting
+    key = _hero_pool_key()
+
+    bump_version(RATINGS)
+
+    assert (_hero_pool_key() != key) is follows_reviews
+
+
+def test_hero_pool_key_depends_on_weighting(settings):
+    settings.HERO_WEIGHTING = "uniform"
+    uniform = _hero_pool_key()
+    settings.HERO_WEIGHTING = "recency"
+
+    assert _hero_pool_key() != uniform
@@ -0,0 +1,27 @@
+import pytest
+
+from apps.documentaries import recommendations
+from apps.documentaries.models import Documentary, Favorite, Watched
+from apps.reviews.models import Review
+
+FOR_YOU_URL = "/api/documentaries/for_you/"
+
+
+@pytest.fixture
+def catalog(db):
+    return [
+        Documentary.objects.create(title=f"Face nord {i}", year=2000 + i, duration_minutes=52, is_published=True)
+        for i in range(5)
+    ]
+
+
+def test_popular_fallback_skips_the_users_library(monkeypatch, user_client, user, catalog):
+    monkeypatch.setattr(recommendations, "feature_matrix", lambda: None)
+    Watched.objects.create(user=user, documentary=catalog[0])
+    Favorite.objects.create(user=user, documentary=catalog[1])
+    Review.objects.create(user=user, documentary=catalog[2], rating=4)
+
+    response = user_client.get(FOR_YOU_URL)
+
+    assert response.status_code == 200
+    assert [card["id"] for card in response.json()] == [catalog[4].pk, catalog[3].pk]
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+
+from apps.documentaries.search import TRIGRAM_THRESHOLD, set_trigram_threshold
+
+
+class FakeConnection:
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.queries = []
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql, params):
+        self.queries.append((sql, params))
+
+
+def test_trigram_threshold_is_set_on_postgres_sessions():
+    connection = FakeConnection("postgresql")
+
+    set_trigram_threshold(sender=None, connection=connection)
+
+    [(sql, params)] = connection.queries
+    assert "pg_trgm.word_similarity_threshold" in sql
+    assert params == [str(TRIGRAM_THRESHOLD)]
+
+
+def test_trigram_threshold_skips_other_databases():
+    connection = FakeConnection("sqlite")
+
+    set_trigram_threshold(sender=None, connection=connection)
+
+    assert connection.queries == []
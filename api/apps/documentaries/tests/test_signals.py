@@ -0,0 +1,49 @@
+import logging
+
+from django.db import transaction
+
+import pytest
+
+from apps.documentaries import signals
+from apps.documentaries.models import Documentary, Sport, Theme
+
+
+@pytest.fixture
+def related_updates(monkeypatch):
+    """Record update_related calls instead of rebuilding the tag matrix."""
+    calls = []
+    monkeypatch.setattr(signals._pending_related, "ids", set(), raising=False)
+    monkeypatch.setattr(signals, "update_related", lambda documentary_ids: calls.append(set(documentary_ids)))
+    return calls
+
+
+@pytest.mark.django_db
+def test_documentary_edit_refreshes_related_once(related_updates, django_capture_on_commit_callbacks):
+    sport = Sport.objects.create(name="Ski", slug="ski", icon="mountain")
+    theme = Theme.objects.create(name="Aventure", slug="aventure")
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        documentary = Documentary.objects.create(
+            title="Face nord", year=2020, duration_minutes=52, is_published=True
+        )
+        documentary.sports.set([sport])
+        documentary.themes.set([theme])
+
+    assert related_updates == [{documentary.pk}]
+
+
+@pytest.mark.django_db
+def test_related_refresh_failure_is_logged(monkeypatch, caplog, django_capture_on_commit_callbacks):
+    def fail(documentary_ids):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(signals._pending_related, "ids", set(), raising=False)
+    monkeypatch.setattr(signals, "update_related", fail)
+
+    with caplog.at_level(logging.ERROR, logger=signals.__name__), django_capture_on_commit_callbacks(execute=True):
+        documentary = Documentary.objects.create(
+            title="Face nord", year=2020, duration_minutes=52, is_published=True
+        )
+
+    assert Documentary.objects.filter(pk=documentary.pk).exists()
+    assert "Could not refresh related documentaries" in caplog.text
@@ -0,0 +1,60 @@
+from bisect import bisect_left
+
+import pytest
+
+from apps.documentaries import suggest
+from apps.documentaries.suggest import Entry, SuggestionIndex, _keys
+
+NAMES = [
+    ("documentary", "Mont Blanc", 12),
+    ("documentary", "Montagnes de glace", 3),
+    ("documentary", "La Montée", 40),
+    ("documentary", "Monte Rosa", 0),
+    ("documentary", "Mon ami le glacier", 7),
+    ("sport", "Montagne", 25),
+    ("sport", "Ski de randonnée", 9),
+    ("theme", "Aventure", 14),
+    ("region", "Mont-Blanc", 2),
+    ("person", "Monique Morel", 1),
+]
+
+
+def make_index():
+    entries, names = {}, {}
+    for pk, (kind, name, popularity) in enumerate(NAMES, start=1):
+        entries[kind, pk] = Entry(kind, pk, f"slug-{pk}", name, None, popularity)
+        names[kind, pk] = [name]
+    keys = sorted((key, position, *ref) for ref, entry_names in names.items() for key, position in _keys(entry_names))
+    return SuggestionIndex(entries, names, keys)
+
+
+def scanned(index, prefix, count):
+    """Ranking of every key starting with prefix, without the short prefix table."""
+    keys = index.keys[bisect_left(index.keys, (prefix,)):]
+    run = [item for item in keys if item[0].startswith(prefix)]
+    return [index.entries[ref] for ref in index._rank(run, count)]
+
+
+@pytest.mark.parametrize("prefix", ["mo", "mon", "mont", "la", "gla", "ski de", "xy"])
+@pytest.mark.parametrize("count", [1, 3, 8])
+def test_short_prefixes_match_scan(prefix, count):
+    index = make_index()
+
+    assert index.suggest(prefix, count) == scanned(index, prefix, count)
+
+
+@pytest.mark.parametrize("popularity", [14, 60])
+def test_short_prefixes_follow_updates(monkeypatch, popularity):
+    index = make_index()
+    assert index.suggest("ave")[0].label == "Aventure"
+
+    def load(pks=None):
+        yield Entry("theme", 8, "slug-8", "Avalanches", None, popularity), ["Avalanches"]
+
+    monkeypatch.setitem(suggest.SOURCES, "theme", (None, load))
+    updated = index.updated({("theme", 8)})
+
+    assert updated.suggest("ave") == []
+    assert [entry.label for entry in updated.suggest("av")] == ["Avalanches"]
+    rebuilt = SuggestionIndex(updated.entries, updated.names, updated.keys)
+    assert updated.short_prefixes == rebuilt.short_prefixes
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+import pytest
+
+from apps.documentaries import trending
+from apps.documentaries.models import Documentary, Favorite, TrendingCheckpoint, Watched, Watchlist
+from apps.reviews.models import Review
+from apps.users.models import User
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable timezone.now(), also used for the events' timestamps."""
+    now = [datetime(2026, 3, 1, 12, tzinfo=timezone.get_current_timezone())]
+    monkeypatch.setattr(timezone, "now", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def documentaries(db):
+    return [
+        Documentary.objects.create(title=f"Face nord {i}", year=2020, duration_minutes=52, is_published=True)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com") for i in range(3)]
+
+
+def scores():
+    return dict(Documentary.objects.values_list("pk", "trending_score"))
+
+
+def assert_matches_rebuild():
+    epoch = TrendingCheckpoint.objects.get().epoch
+    incremental = scores()
+    trending.rebuild_trending()
+    # The rebuild moves the epoch to now, scaling every score down
+    scale = 2 ** ((epoch - TrendingCheckpoint.objects.get().epoch) / trending._half_life())
+    assert {pk: score * scale for pk, score in incremental.items()} == pytest.approx(scores())
+
+
+def test_updates_match_rebuild(clock, documentaries, users):
+    start = clock[0]
+    clock[0] = start - timedelta(days=2)
+    Review.objects.create(user=users[0], documentary=documentaries[0], rating=5)
+    clock[0] = start - timedelta(hours=1)
+    Favorite.objects.create(user=users[1], documentary=documentaries[0])
+    clock[0] = start
+    trending.update_trending()
+
+    # Stamped before the run, committed after it
+    clock[0] = start - timedelta(seconds=1)
+    Watched.objects.create(user=users[2], documentary=documentaries[1])
+    clock[0] = start + timedelta(minutes=10)
+    Watchlist.objects.create(user=users[0], documentary=documentaries[2])
+    clock[0] = start + timedelta(days=1)
+    trending.update_trending()
+
+    assert all(score > 0 for score in scores().values())
+    assert_matches_rebuild()
+
+
+def test_update_skips_unsettled_events(clock, settings, documentaries, users):
+    trending.update_trending()
+    Watched.objects.create(user=users[0], documentary=documentaries[0])
+
+    clock[0] += timedelta(seconds=settings.EVENT_SETTLE_SECONDS)
+    assert trending.update_trending() == 0
+    clock[0] += timedelta(seconds=1)
+    assert trending.update_trending() == 1
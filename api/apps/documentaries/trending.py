@@ -0,0 +1,129 @@
+"""
+Time-decayed trending scores.
+
+Each review, favorite, watched or watchlist event of weight w at time t
+counts w * 2 ** -((now - t) / half-life) towards its documentary's score
+(TRENDING_HALF_LIFE_DAYS setting). Time passing multiplies every score by
+the same factor, so Documentary.trending_score stores the scores scaled to
+a fixed epoch instead,
+
+    sum(w * 2 ** ((t - epoch) / half-life)),
+
+which ranks documentaries exactly like the decayed scores at any time. An
+update then only adds the events created since the checkpoint to their own
+documentaries; every other row is left untouched.
+
+Stored scores double every half-life. rebuild_trending moves the epoch to
+the present (and forgets deleted events): run it every few months, and
+update_trending every few minutes.
+
+Events are only read once they are EVENT_SETTLE_SECONDS old: their timestamp
+is set before their transaction commits, so the checkpoint stays that far
+behind the clock for every event to be visible when its window is read, and
+read exactly once.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+import numpy as np
+
+from apps.reviews.models import Review
+
+from .cache import TRENDING, bump_version_on_commit
+from .models import Documentary, Favorite, TrendingCheckpoint, Watched, Watchlist
+
+# (model, creation timestamp field, weight) of each event type
+EVENTS = [
+    (Review, "created_at", 3.0),
+    (Favorite, "added_at", 3.0),
+    (Watched, "watched_at", 2.0),
+    (Watchlist, "added_at", 1.0),
+]
+
+# A rebuild ignores events older than this many half-lives (under 0.1% left)
+REBUILD_HALF_LIVES = 10
+
+UPDATE_BATCH_SIZE = 500
+
+
+def _half_life():
+    return timedelta(days=settings.TRENDING_HALF_LIFE_DAYS)
+
+
+def _settled_until(now):
+    """Events created before this are committed (or rolled back) by now."""
+    return now - timedelta(seconds=settings.EVENT_SETTLE_SECONDS)
+
+
+def event_scores(epoch, since, until):
+    """{documentary ID: scaled score of its events created in [since, until)}."""
+    documentary_ids, offsets, weights = [], [], []
+    for model, timestamp, weight in EVENTS:
+        events = model.objects.filter(
+            **{f"{timestamp}__gte": since, f"{timestamp}__lt": until}
+        ).values_list("documentary_id", timestamp)
+        for documentary_id, created_at in events:
+            documentary_ids.append(documentary_id)
+            offsets.append((created_at - epoch).total_seconds())
+            weights.append(weight)
+    if not documentary_ids:
+        return {}
+
+    scores = np.asarray(weights) * np.exp2(np.asarray(offsets) / _half_life().total_seconds())
+    ids, positions = np.unique(documentary_ids, return_inverse=True)
+    return dict(zip(ids.tolist(), np.bincount(positions, weights=scores).tolist(), strict=True))
+
+
+def _add_scores(scores):
+    """Add scores to the stored ones, one UPDATE per batch of documentaries."""
+    items = list(scores.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = dict(items[start:start + UPDATE_BATCH_SIZE])
+        Documentary.objects.filter(pk__in=batch).update(
+            trending_score=F("trending_score") + Case(
+                *(When(pk=pk, then=Value(score)) for pk, score in batch.items()),
+                output_field=FloatField(),
+            )
+        )
+
+
+@transaction.atomic
+def rebuild_trending():
+    """Recompute every score from recent events, with the epoch set to now."""
+    now = timezone.now()
+    until = _settled_until(now)
+    scores = event_scores(now, since=now - _half_life() * REBUILD_HALF_LIVES, until=until)
+    Documentary.objects.exclude(trending_score=0).update(trending_score=0)
+    _add_scores(scores)
+    TrendingCheckpoint.objects.all().delete()
+    TrendingCheckpoint.objects.create(epoch=now, processed_until=until)
+    bump_version_on_commit(TRENDING)
+    return len(scores)
+
+
+@transaction.atomic
+def update_trending():
+    """
+    Add the events created since the checkpoint to the scores.
+
+    Returns the number of documentaries updated. Rebuilds everything when
+    there is no checkpoint yet.
+    """
+    checkpoint = TrendingCheckpoint.objects.select_for_update().first()
+    if checkpoint is None:
+        return rebuild_trending()
+
+    until = max(_settled_until(timezone.now()), checkpoint.processed_until)
+    scores = event_scores(checkpoint.epoch, since=checkpoint.processed_until, until=until)
+    _add_scores(scores)
+    checkpoint.processed_until = until
+    checkpoint.save(update_fields=["processed_until"])
+    if scores:
+        # Rails computed before the commit would be cached as current
+        bump_version_on_commit(TRENDING)
+    return len(scores)
@@ -10,6 +10,7 @@ router.register("", views.DocumentaryViewSet, basename="documentary")
 
 urlpatterns = [
     # Taxonomy endpoints
+    path("taxonomies/", views.TaxonomyBundleView.as_view(), name="taxonomy-bundle"),
     path("sports/", views.SportListView.as_view(), name="sport-list"),
     path("themes/", views.ThemeListView.as_view(), name="theme-list"),
     path("regions/", views.RegionListView.as_view(), name="region-list"),
@@ -39,6 +40,8 @@ urlpatterns = [
     path("favorites/<int:pk>/", views.FavoriteViewSet.as_view({
         "delete": "destroy",
     }), name="favorites-detail"),
+    # Library flags and ratings of a batch of cards
+    path("library-state/", views.LibraryStateView.as_view(), name="library-state"),
     # Documentary routes (must be last due to slug matching)
     path("", include(router.urls)),
 ]
@@ -1,26 +1,48 @@
-from django.db.models import Avg, Count
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-
-from .filters import DocumentaryFilter
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from django_filters import utils as filter_utils
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .cache import CATALOG, RATINGS, RECOMMENDATIONS, SEARCH, TAXONOMY, TRENDING, get_version
+from .cards import LIBRARY_FIELDS, card_rows, card_rows_in_order, serialize_cards
+from .conditional import ConditionalGetMixin
+from .facets import get_facets
+from .filters import DocumentaryFilter, DocumentaryOrderingFilter
+from .library import LibraryState
 from .models import (
+    AlsoLikedDocumentary,
     Documentary,
     Favorite,
     Person,
     Platform,
     Region,
+    RelatedDocumentary,
     Sport,
     Theme,
     Watched,
     Watchlist,
 )
+from .offers import current_offers, request_country
+from .pagination import DocumentaryPagination
+from .rails import get_rail_ids, home_rails, pick_hero_id
+from .recommendations import get_recommendations
+from .renderers import CompactJSONRenderer, CompactMessagePackRenderer
 from .serializers import (
     DocumentaryDetailSerializer,
     DocumentaryHeroSerializer,
     DocumentaryListSerializer,
     FavoriteCreateSerializer,
     FavoriteSerializer,
+    LibraryStateRequestSerializer,
     PersonSerializer,
     PlatformSerializer,
     RegionSerializer,
@@ -31,68 +53,189 @@ from .serializers import (
     WatchlistCreateSerializer,
     WatchlistSerializer,
 )
+from .spelling import correct_query
+from .suggest import get_suggestions
+from .taxonomies import get_taxonomy_bundle
+
+# Default renderers plus the opt-in compact columnar formats for lists
+LIST_RENDERER_CLASSES = [
+    *api_settings.DEFAULT_RENDERER_CLASSES,
+    CompactJSONRenderer,
+    CompactMessagePackRenderer,
+]
+
+
+class LibraryStateMixin:
+    """
+    Share one LibraryState for everything a view serializes.
+
+    The user's watchlist/watched/favorite flags for the serialized documentaries
+    are loaded once per response and passed through the serializer context.
+    """
+
+    def get_library_documentaries(self, instance):
+        """Documentaries contained in the serialized instance(s)."""
+        return instance
+
+    def uses_library_flags(self):
+        return True
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", self.get_serializer_context())
+        if args and args[0] is not None and self.uses_library_flags():
+            kwargs["context"]["library_state"] = LibraryState.for_documentaries(
+                self.request.user, self.get_library_documentaries(args[0])
+            )
+        return super().get_serializer(*args, **kwargs)
+
+
+class LibraryItemMixin:
+    """Build the documentary cards of a page of Watchlist/Watched/Favorite rows in one pass."""
 
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", self.get_serializer_context())
+        if kwargs.get("many") and args and args[0] is not None:
+            ids = [item.documentary_id for item in args[0]]
+            rows = card_rows(Documentary.objects.filter(pk__in=ids).order_by())
+            kwargs["context"]["cards"] = {
+                card["id"]: card for card in serialize_cards(rows, self.request)
+            }
+        return super().get_serializer(*args, **kwargs)
 
-class DocumentaryViewSet(viewsets.ReadOnlyModelViewSet):
+
+class DocumentaryViewSet(ConditionalGetMixin, LibraryStateMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for browsing documentaries."""
 
+    version_namespaces = [CATALOG, TAXONOMY, RATINGS, TRENDING, RECOMMENDATIONS, SEARCH]
+    # Current offers and dated rails change at midnight
+    date_dependent = True
     queryset = Documentary.objects.filter(is_published=True)
+    renderer_classes = LIST_RENDERER_CLASSES
+    filter_backends = [DjangoFilterBackend, DocumentaryOrderingFilter]
     filterset_class = DocumentaryFilter
-    search_fields = ["title", "original_title", "synopsis_en", "synopsis_fr"]
-    ordering_fields = ["year", "title", "created_at"]
-    ordering = ["-year"]
+    pagination_class = DocumentaryPagination
+    ordering_fields = ["year", "title", "created_at", "trending_score", "rating_score"]
+    ordering_aliases = {"trending": "-trending_score", "score": "-rating_score"}
+    ordering = ["-year", "title"]
     lookup_field = "slug"
 
+    def get_version_namespaces(self):
+        # The hero is a random pick on every request
+        if self.action in ("hero", "home"):
+            return None
+        return super().get_version_namespaces()
+
+    def get_vary_headers(self):
+        # Offers are listed for the country of the GeoIP header (see offers.py)
+        headers = super().get_vary_headers()
+        if settings.GEOIP_COUNTRY_HEADER:
+            headers.append(settings.GEOIP_COUNTRY_HEADER)
+        return headers
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return DocumentaryDetailSerializer
         return DocumentaryListSerializer
 
+    @cached_property
+    def requested_fields(self):
+        """Fields selected with ?fields= / ?expand= (all defaults without them)."""
+        return self.get_serializer_class().requested_fields(self.request.query_params)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.requested_fields
+        return context
+
+    def uses_library_flags(self):
+        return any(name in LIBRARY_FIELDS for name in self.requested_fields)
+
     def get_queryset(self):
         queryset = super().get_queryset()
+        fields = self.requested_fields
+
+        # Only join/prefetch what the requested fields read
+        if "average_rating" in fields or "review_count" in fields:
+            queryset = queryset.select_related("rating_summary")
+        prefetches = {
+            "sports": "sports",
+            "themes": "themes",
+            "regions": "regions",
+            "directors": "directors",
+            "availabilities": Prefetch(
+                "availabilities",
+                queryset=current_offers(request_country(self.request)).select_related("platform"),
+            ),
+        }
+        return queryset.prefetch_related(
+            *(lookup for name, lookup in prefetches.items() if name in fields)
+        )
 
-        # Prefetch related for performance
-        if self.action == "list":
-            queryset = queryset.prefetch_related("sports")
-        elif self.action == "retrieve":
-            queryset = queryset.prefetch_related(
-                "sports", "themes", "regions", "directors",
-                "availabilities__platform"
-            )
-
-        return queryset.distinct()
+    def list(self, request, *args, **kwargs):
+        # Cards are built from values() rows (see cards.py), not through
+        # DocumentaryListSerializer
+        fields = self.requested_fields
+        rows = card_rows(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(rows)
+        corrected_search = self.get_corrected_search(page)
+        if corrected_search is not None:
+            rows = card_rows(self.search_queryset(corrected_search), fields)
+            page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serialize_cards(rows, request, fields=fields))
+
+        response = self.get_paginated_response(serialize_cards(page, request, fields=fields))
+        if corrected_search is not None:
+            # Following pages are fetched for the corrected search directly
+            for link in ("next", "previous"):
+                if response.data.get(link):
+                    response.data[link] = replace_query_param(response.data[link], "search", corrected_search)
+            response.data["corrected_search"] = corrected_search
+        return response
+
+    def get_corrected_search(self, page):
+        """
+        Spelling-corrected ?search= when its first page came back empty, else None.
+
+        See spelling.py; the results of the corrected search are served
+        instead, with the correction in corrected_search.
+        """
+        params = self.request.query_params
+        search = params.get("search", "").strip()
+        first_page = not any(param in params for param in ("page", "cursor"))
+        if page or not search or not first_page:
+            return None
+        return correct_query(search)
+
+    def search_queryset(self, search):
+        """The filtered and ordered queryset, with search in place of ?search=."""
+        data = self.request.query_params.copy()
+        data["search"] = search
+        filterset = self.filterset_class(data, queryset=self.get_queryset(), request=self.request)
+        if not filterset.is_valid():
+            raise filter_utils.translate_validation(filterset.errors)
+        return DocumentaryOrderingFilter().filter_queryset(self.request, filterset.qs, self)
+
+    def rail_response(self, name, param=None):
+        """Serialize a precomputed homepage rail."""
+        fields = self.requested_fields
+        rows = card_rows_in_order(self.get_queryset(), get_rail_ids(name, param), fields)
+        return Response(serialize_cards(rows, self.request, fields=fields))
 
     @action(detail=False, methods=["get"])
     def featured(self, request):
         """Get featured documentaries."""
-        queryset = self.get_queryset().filter(is_featured=True)[:10]
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("featured")
 
     @action(detail=False, methods=["get"])
     def top_rated(self, request):
         """Get top-rated documentaries."""
-        queryset = (
-            self.get_queryset()
-            .annotate(avg_rating=Avg("reviews__rating"), review_count=Count("reviews"))
-            .filter(review_count__gte=3)
-            .order_by("-avg_rating")[:10]
-        )
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("top_rated")
 
     @action(detail=False, methods=["get"])
     def recent(self, request):
         """Get recently added documentaries."""
-        queryset = self.get_queryset().order_by("-created_at")[:10]
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("recent")
 
     @action(detail=False, methods=["get"])
     def by_theme(self, request):
@@ -103,16 +246,7 @@ class DocumentaryViewSet(viewsets.ReadOnlyModelViewSet):
                 {"error": "theme parameter is required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        queryset = (
-            self.get_queryset()
-            .filter(themes__slug=theme_slug)
-            .prefetch_related("sports")
-            .order_by("-year")[:10]
-        )
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("by_theme", theme_slug)
 
     @action(detail=False, methods=["get"])
     def by_sport(self, request):
@@ -123,62 +257,118 @@ class DocumentaryViewSet(viewsets.ReadOnlyModelViewSet):
                 {"error": "sport parameter is required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        queryset = (
-            self.get_queryset()
-            .filter(sports__slug=sport_slug)
-            .prefetch_related("sports")
-            .order_by("-year")[:10]
-        )
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("by_sport", sport_slug)
 
     @action(detail=False, methods=["get"])
     def popular(self, request):
         """Get popular documentaries (most reviewed)."""
-        queryset = (
-            self.get_queryset()
-            .annotate(num_reviews=Count("reviews"))
-            .order_by("-num_reviews", "-year")[:10]
-        )
-        serializer = DocumentaryListSerializer(
-            queryset, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        return self.rail_response("popular")
 
     @action(detail=False, methods=["get"])
-    def hero(self, request):
-        """Get a random documentary with backdrop for hero section."""
-        # Get any documentary that has a backdrop (prefer recent ones)
-        queryset = (
-            self.get_queryset()
-            .exclude(backdrop="")
-            .exclude(backdrop__isnull=True)
-            .prefetch_related("sports")
-            .order_by("?")  # Random order
+    def trending(self, request):
+        """Get the documentaries with the most recent activity (see trending.py)."""
+        return self.rail_response("trending")
+
+    @action(detail=False, methods=["get"])
+    def leaving_soon(self, request):
+        """Get the documentaries whose offers all end within LEAVING_SOON_DAYS."""
+        return self.rail_response("leaving_soon")
+
+    @action(detail=False, methods=["get"])
+    def just_arrived(self, request):
+        """Get the documentaries with an offer started within JUST_ARRIVED_DAYS."""
+        return self.rail_response("just_arrived")
+
+    def neighbours_response(self, model, slug):
+        """Serialize the precomputed neighbours (a model with related/rank) of a documentary."""
+        ids = list(
+            model.objects.filter(
+                documentary__slug=slug, documentary__is_published=True
+            ).order_by("rank").values_list("related_id", flat=True)
         )
-        documentary = queryset.first()
+        if not ids:
+            # No neighbours, or no such documentary
+            self.get_object()
+        fields = self.requested_fields
+        rows = card_rows_in_order(self.get_queryset(), ids, fields)
+        return Response(serialize_cards(rows, self.request, fields=fields))
+
+    @action(detail=True, methods=["get"])
+    def related(self, request, slug=None):
+        """Documentaries sharing the most tags with this one (precomputed, see similarity.py)."""
+        return self.neighbours_response(RelatedDocumentary, slug)
+
+    @action(detail=True, methods=["get"])
+    def also_liked(self, request, slug=None):
+        """Documentaries liked by the same users as this one (precomputed, see cooccurrence.py)."""
+        return self.neighbours_response(AlsoLikedDocumentary, slug)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def for_you(self, request):
+        """Documentaries matching the user's taste, unwatched (see recommendations.py)."""
+        fields = self.requested_fields
+        rows = card_rows_in_order(self.get_queryset(), get_recommendations(request.user), fields)
+        return Response(serialize_cards(rows, request, fields=fields))
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """Result counts per sport, theme, region, platform, decade and duration for the current filters."""
+        filterset = DjangoFilterBackend().get_filterset(request, self.get_queryset(), self)
+        if not filterset.is_valid():
+            raise filter_utils.translate_validation(filterset.errors)
+        return Response(get_facets(filterset))
+
+    def get_hero_documentary(self):
+        """A random documentary with backdrop for the hero section, or None."""
+        hero_id = pick_hero_id()
+        documentary = self.get_queryset().filter(pk=hero_id).first() if hero_id else None
         if documentary:
-            serializer = DocumentaryHeroSerializer(
-                documentary, context={"request": request}
-            )
-            return Response(serializer.data)
+            return documentary
         # Fallback: any documentary with a poster
-        fallback = (
+        return (
             self.get_queryset()
             .exclude(poster="")
             .exclude(poster__isnull=True)
             .order_by("-created_at")
             .first()
         )
-        if fallback:
+
+    @action(detail=False, methods=["get"])
+    def hero(self, request):
+        """Get a random documentary with backdrop for hero section."""
+        documentary = self.get_hero_documentary()
+        if documentary:
             serializer = DocumentaryHeroSerializer(
-                fallback, context={"request": request}
+                documentary, context={"request": request}
             )
             return Response(serializer.data)
         return Response(None)
 
+    @action(detail=False, methods=["get"])
+    def home(self, request):
+        """
+        Everything the homepage needs in one response.
+
+        Rails are lists of documentary IDs; each card is serialized once in
+        "documentaries", keyed by ID, however many rails it appears in.
+        """
+        rails = home_rails()
+        ids = set()
+        for rail in rails.values():
+            for rail_ids in rail.values() if isinstance(rail, dict) else [rail]:
+                ids.update(rail_ids)
+
+        fields = self.requested_fields
+        rows = list(card_rows(self.get_queryset().filter(pk__in=ids), fields))
+        cards = serialize_cards(rows, request, fields=fields)
+
+        hero = self.get_hero_documentary()
+        return Response({
+            "hero": DocumentaryHeroSerializer(hero, context={"request": request}).data if hero else None,
+            "rails": rails,
+            "documentaries": {row["id"]: card for row, card in zip(rows, cards, strict=True)},
+        })
+
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def add_to_watchlist(self, request, slug=None):
         """Add documentary to user's watchlist."""
@@ -246,15 +436,14 @@ class DocumentaryViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({"status": "not in favorites"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class WatchlistViewSet(viewsets.ModelViewSet):
+class WatchlistViewSet(LibraryItemMixin, viewsets.ModelViewSet):
     """ViewSet for user's watchlist."""
 
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = LIST_RENDERER_CLASSES
 
     def get_queryset(self):
-        return Watchlist.objects.filter(user=self.request.user).select_related(
-            "documentary"
-        ).prefetch_related("documentary__sports")
+        return Watchlist.objects.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -262,15 +451,14 @@ class WatchlistViewSet(viewsets.ModelViewSet):
         return WatchlistSerializer
 
 
-class WatchedViewSet(viewsets.ModelViewSet):
+class WatchedViewSet(LibraryItemMixin, viewsets.ModelViewSet):
     """ViewSet for user's watched list."""
 
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = LIST_RENDERER_CLASSES
 
     def get_queryset(self):
-        return Watched.objects.filter(user=self.request.user).select_related(
-            "documentary"
-        ).prefetch_related("documentary__sports")
+        return Watched.objects.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -278,15 +466,14 @@ class WatchedViewSet(viewsets.ModelViewSet):
         return WatchedSerializer
 
 
-class FavoriteViewSet(viewsets.ModelViewSet):
+class FavoriteViewSet(LibraryItemMixin, viewsets.ModelViewSet):
     """ViewSet for user's favorites."""
 
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = LIST_RENDERER_CLASSES
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user).select_related(
-            "documentary"
-        ).prefetch_related("documentary__sports")
+        return Favorite.objects.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -294,46 +481,137 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         return FavoriteSerializer
 
 
-class SportListView(generics.ListAPIView):
+class LibraryStateView(ConditionalGetMixin, APIView):
+    """
+    The user's library flags and own rating for a batch of documentaries.
+
+    Cards served from shared caches carry no personal state; clients layer
+    it on with ?ids=1,2,3 (or {"ids": [...]} in a POST body for long lists).
+    Each relation is read with one IN query whatever the number of IDs, and
+    GET responses revalidate against the user's library namespace.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        ids = [value for value in request.query_params.get("ids", "").split(",") if value.strip()]
+        return self.state_response(request, {"ids": ids})
+
+    def post(self, request):
+        return self.state_response(request, request.data)
+
+    def state_response(self, request, data):
+        serializer = LibraryStateRequestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+        state = LibraryState(request.user, ids, with_ratings=True)
+        return Response({
+            str(pk): {
+                "is_in_watchlist": state.is_in_watchlist(pk),
+                "is_watched": state.is_watched(pk),
+                "is_favorited": state.is_favorited(pk),
+                "rating": state.rating(pk),
+            }
+            for pk in ids
+        })
+
+
+class SportListView(ConditionalGetMixin, generics.ListAPIView):
     """List all sports."""
 
     queryset = Sport.objects.all()
+    version_namespaces = [TAXONOMY]
+    per_user = False
     serializer_class = SportSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
 
-class ThemeListView(generics.ListAPIView):
+class ThemeListView(ConditionalGetMixin, generics.ListAPIView):
     """List all themes."""
 
     queryset = Theme.objects.all()
+    version_namespaces = [TAXONOMY]
+    per_user = False
     serializer_class = ThemeSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
 
-class RegionListView(generics.ListAPIView):
+class RegionListView(ConditionalGetMixin, generics.ListAPIView):
     """List all regions."""
 
     queryset = Region.objects.all()
+    version_namespaces = [TAXONOMY]
+    per_user = False
     serializer_class = RegionSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
 
-class PlatformListView(generics.ListAPIView):
+class PlatformListView(ConditionalGetMixin, generics.ListAPIView):
     """List all platforms."""
 
     queryset = Platform.objects.all()
+    version_namespaces = [TAXONOMY]
+    per_user = False
     serializer_class = PlatformSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
 
-class PersonListView(generics.ListAPIView):
+class PersonListView(ConditionalGetMixin, generics.ListAPIView):
     """List all people (directors, etc.)."""
 
     queryset = Person.objects.all()
+    version_namespaces = [TAXONOMY]
+    per_user = False
     serializer_class = PersonSerializer
     permission_classes = [permissions.AllowAny]
     search_fields = ["name"]
+
+
+class TaxonomyBundleView(ConditionalGetMixin, APIView):
+    """
+    Sports, themes, regions and platforms in one response.
+
+    Requests carrying the current version (?v=) may be cached for a year:
+    the version changes whenever any of these lists does.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    version_namespaces = [TAXONOMY]
+    per_user = False
+
+    def get(self, request):
+        return Response(get_taxonomy_bundle(request))
+
+    def get_cache_control(self, request):
+        if request.query_params.get("v") == str(get_version(TAXONOMY)):
+            return {"public": True, "max_age": 60 * 60 * 24 * 365, "immutable": True}
+        return super().get_cache_control(request)
+
+
+class SuggestView(APIView):
+    """
+    Typeahead suggestions for ?q= (see suggest.py).
+
+    Documentaries, directors, sports, themes and regions whose name has a
+    word starting with the query, answered from the worker's memory. When
+    nothing matches, suggestions for the spelling-corrected query are
+    returned instead, with the correction in did_you_mean.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    # Called on every keystroke: its own, higher rate than other anonymous requests
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "suggest"
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        data = {"query": query, "results": get_suggestions(query)}
+        if not data["results"]:
+            corrected = correct_query(query)
+            if corrected is not None:
+                data.update(did_you_mean=corrected, results=get_suggestions(corrected))
+        return Response(data)
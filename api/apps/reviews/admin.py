@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Review
+from .models import RatingSummary, Review
 
 
 @admin.register(Review)
@@ -16,3 +16,16 @@ class ReviewAdmin(admin.ModelAdmin):
             return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
         return "-"
     content_preview.short_description = "Review"
+
+
+@admin.register(RatingSummary)
+class RatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ["documentary", "average_rating", "review_count", "updated_at"]
+    search_fields = ["documentary__title"]
+    readonly_fields = [
+        "documentary", "review_count", "rating_sum", "average_rating",
+        "rating_1", "rating_2", "rating_3", "rating_4", "rating_5", "updated_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
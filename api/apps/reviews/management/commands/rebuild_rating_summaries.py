@@ -0,0 +1,33 @@
+"""
+Rebuild the denormalized rating summaries from the reviews table.
+
+Summaries are kept up to date on every review write; this command is for
+backfills and for repairing drift after bulk imports or raw SQL edits.
+
+Usage:
+    python manage.py rebuild_rating_summaries
+    python manage.py rebuild_rating_summaries --documentary 12 --documentary 34
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.documentaries.cache import RATINGS, bump_version
+from apps.reviews.models import RatingSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-documentary rating summaries from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--documentary",
+            type=int,
+            action="append",
+            dest="documentary_ids",
+            help="Only rebuild the given documentary ID (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        count = RatingSummary.rebuild(options["documentary_ids"])
+        bump_version(RATINGS)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rating summaries."))
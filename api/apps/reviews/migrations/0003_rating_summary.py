@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    """Create a summary for every documentary that already has reviews."""
+    Review = apps.get_model("reviews", "Review")
+    RatingSummary = apps.get_model("reviews", "RatingSummary")
+
+    rows = (
+        Review.objects.values("documentary")
+        .annotate(
+            review_count=Count("id"),
+            rating_sum=Sum("rating"),
+            **{f"rating_{stars}": Count("id", filter=Q(rating=stars)) for stars in range(1, 6)},
+        )
+        .order_by()
+    )
+    RatingSummary.objects.bulk_create(
+        [
+            RatingSummary(
+                documentary_id=row["documentary"],
+                review_count=row["review_count"],
+                rating_sum=row["rating_sum"],
+                average_rating=row["rating_sum"] / row["review_count"],
+                **{f"rating_{stars}": row[f"rating_{stars}"] for stars in range(1, 6)},
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentaries', '0007_french_only'),
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('documentary', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='documentaries.documentary')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(blank=True, null=True)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'rating summaries',
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,12 @@
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+RATING_CHOICES = range(1, 6)
 
 
 class Review(models.Model):
@@ -27,6 +33,180 @@ class Review(models.Model):
     class Meta:
         unique_together = ["user", "documentary"]
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["created_at"], name="review_created_at_idx")]
 
     def __str__(self):
         return f"{self.user.email} - {self.documentary.title} ({self.rating}/5)"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored rating so updates can adjust the rating summary."""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values, strict=True))
+        rating = loaded.get("rating", models.DEFERRED)
+        documentary_id = loaded.get("documentary_id", models.DEFERRED)
+        if models.DEFERRED not in (rating, documentary_id):
+            instance._loaded_rating = rating
+            instance._loaded_documentary_id = documentary_id
+        return instance
+
+
+class RatingSummary(models.Model):
+    """Denormalized rating aggregates for a documentary, maintained from Review writes."""
+
+    documentary = models.OneToOneField(
+        "documentaries.Documentary",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_summary"
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(null=True, blank=True)
+
+    # Star histogram
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "rating summaries"
+
+    def __str__(self):
+        return f"{self.documentary_id}: {self.average_rating} ({self.review_count} reviews)"
+
+    @property
+    def histogram(self):
+        """Number of reviews per star, keyed 1 to 5."""
+        return {stars: getattr(self, f"rating_{stars}") for stars in RATING_CHOICES}
+
+    @classmethod
+    def apply_change(cls, documentary_id, added=None, removed=None, create=True):
+        """
+        Atomically add and/or remove one rating from a documentary's summary.
+
+        Runs a single UPDATE with F() expressions so concurrent review writes
+        never lose increments. With create=False a missing summary is left
+        alone (used on delete, where the documentary may be going away too).
+        """
+        if added == removed:
+            return
+
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+        updates = {
+            "review_count": F("review_count") + count_delta,
+            "rating_sum": F("rating_sum") + sum_delta,
+            "average_rating": Case(
+                When(review_count=-count_delta, then=Value(None)),
+                default=Cast(F("rating_sum") + sum_delta, FloatField())
+                / Cast(F("review_count") + count_delta, FloatField()),
+                output_field=FloatField(),
+            ),
+            "updated_at": timezone.now(),
+        }
+        if added is not None:
+            updates[f"rating_{added}"] = F(f"rating_{added}") + 1
+        if removed is not None:
+            updates[f"rating_{removed}"] = F(f"rating_{removed}") - 1
+
+        with transaction.atomic():
+            if create:
+                cls.objects.get_or_create(documentary_id=documentary_id)
+            cls.objects.filter(pk=documentary_id).update(**updates)
+            cls.update_scores([documentary_id])
+
+    @classmethod
+    def update_scores(cls, documentary_ids=None):
+        """
+        Recompute Documentary.rating_score from the summaries, in one UPDATE.
+
+        The score is a Bayesian average: ratings are averaged together with
+        RATING_PRIOR_WEIGHT virtual reviews of RATING_PRIOR_MEAN stars, so a
+        few enthusiastic reviews do not outrank many good ones. Documentaries
+        without reviews score 0. Updates every documentary when
+        documentary_ids is None.
+        """
+        from apps.documentaries.models import Documentary
+
+        prior_weight = float(settings.RATING_PRIOR_WEIGHT)
+        prior_mean = float(settings.RATING_PRIOR_MEAN)
+        summary = cls.objects.filter(pk=OuterRef("pk"))
+        review_count = Coalesce(Subquery(summary.values("review_count")), 0)
+        rating_sum = Cast(Coalesce(Subquery(summary.values("rating_sum")), 0), FloatField())
+
+        documentaries = Documentary.objects.all()
+        if documentary_ids is not None:
+            documentaries = documentaries.filter(pk__in=documentary_ids)
+        documentaries.update(rating_score=Case(
+            When(
+                GreaterThan(review_count, 0),
+                then=(Value(prior_weight * prior_mean) + rating_sum)
+                / (Value(prior_weight) + Cast(review_count, FloatField())),
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+
+    @classmethod
+    def rebuild(cls, documentary_ids=None):
+        """
+        Recompute summaries from the reviews table.
+
+        Rebuilds every documentary when documentary_ids is None, otherwise only
+        the given ones. Returns the number of summaries written.
+        """
+        from apps.documentaries.models import Documentary
+
+        documentaries = Documentary.objects.all()
+        if documentary_ids is not None:
+            documentaries = documentaries.filter(pk__in=documentary_ids)
+
+        aggregates = {
+            row["documentary"]: row
+            for row in Review.objects.filter(documentary__in=documentaries)
+            .values("documentary")
+            .annotate(
+                review_count=Count("id"),
+                rating_sum=Sum("rating"),
+                **{
+                    f"rating_{stars}": Count("id", filter=Q(rating=stars))
+                    for stars in RATING_CHOICES
+                },
+            )
+            .order_by()
+        }
+
+        now = timezone.now()
+        summaries = []
+        for documentary_id in documentaries.values_list("pk", flat=True):
+            row = aggregates.get(documentary_id, {})
+            review_count = row.get("review_count", 0)
+            rating_sum = row.get("rating_sum") or 0
+            summaries.append(cls(
+                documentary_id=documentary_id,
+                review_count=review_count,
+                rating_sum=rating_sum,
+                average_rating=rating_sum / review_count if review_count else None,
+                updated_at=now,
+                **{f"rating_{stars}": row.get(f"rating_{stars}", 0) for stars in RATING_CHOICES},
+            ))
+
+        fields = [
+            "review_count", "rating_sum", "average_rating", "updated_at",
+            *(f"rating_{stars}" for stars in RATING_CHOICES),
+        ]
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                summaries,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=["documentary"],
+                update_fields=fields,
+            )
+            cls.update_scores(documentary_ids)
+        return len(summaries)
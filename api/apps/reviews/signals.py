@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.documentaries.cache import RATINGS, bump_version_on_commit, library_namespace
+
+from .models import RatingSummary, Review
+
+
+def _remember_stored_state(instance):
+    instance._loaded_rating = instance.rating
+    instance._loaded_documentary_id = instance.documentary_id
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """Fold a created or edited review into the documentary's rating summary."""
+    if raw:
+        return
+
+    if created:
+        RatingSummary.apply_change(instance.documentary_id, added=instance.rating)
+    elif not hasattr(instance, "_loaded_rating"):
+        # Saved from an instance that was not loaded from the database, so
+        # the previous rating is unknown: recompute this documentary instead.
+        RatingSummary.rebuild([instance.documentary_id])
+    elif instance._loaded_documentary_id != instance.documentary_id:
+        RatingSummary.apply_change(
+            instance._loaded_documentary_id, removed=instance._loaded_rating, create=False
+        )
+        RatingSummary.apply_change(instance.documentary_id, added=instance.rating)
+    else:
+        RatingSummary.apply_change(
+            instance.documentary_id, added=instance.rating, removed=instance._loaded_rating
+        )
+
+    _remember_stored_state(instance)
+    bump_version_on_commit(RATINGS)
+    # Reviews feed the author's recommendations
+    bump_version_on_commit(library_namespace(instance.user_id))
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review from the documentary's rating summary."""
+    RatingSummary.apply_change(
+        getattr(instance, "_loaded_documentary_id", instance.documentary_id),
+        removed=getattr(instance, "_loaded_rating", instance.rating),
+        create=False,
+    )
+    bump_version_on_commit(RATINGS)
+    bump_version_on_commit(library_namespace(instance.user_id))
@@ -0,0 +1,99 @@
+import pytest
+
+from apps.documentaries.models import Documentary
+from apps.reviews.models import RATING_CHOICES, RatingSummary, Review
+from apps.users.models import User
+
+SUMMARY_FIELDS = ["review_count", "rating_sum", "average_rating", *(f"rating_{stars}" for stars in RATING_CHOICES)]
+
+
+@pytest.fixture
+def documentaries(db):
+    return [
+        Documentary.objects.create(title=f"Face nord {i}", year=2020, duration_minutes=52)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com") for i in range(4)]
+
+
+def snapshot():
+    summaries = {
+        row["documentary_id"]: row
+        for row in RatingSummary.objects.values("documentary_id", *SUMMARY_FIELDS)
+    }
+    scores = dict(Documentary.objects.values_list("pk", "rating_score"))
+    return summaries, scores
+
+
+def assert_matches_rebuild():
+    incremental = snapshot()
+    RatingSummary.rebuild()
+    RatingSummary.update_scores()
+    rebuilt = snapshot()
+
+    summaries, scores = incremental
+    rebuilt_summaries, rebuilt_scores = rebuilt
+    # rebuild writes a summary for every documentary, reviewed or not
+    for documentary_id, row in rebuilt_summaries.items():
+        empty = {"documentary_id": documentary_id, **dict.fromkeys(SUMMARY_FIELDS, 0), "average_rating": None}
+        assert summaries.get(documentary_id, empty) == pytest.approx(row)
+    assert scores == pytest.approx(rebuilt_scores)
+
+
+def test_created_reviews(documentaries, users):
+    for i, user in enumerate(users):
+        Review.objects.create(user=user, documentary=documentaries[0], rating=1 + i)
+        Review.objects.create(user=user, documentary=documentaries[1], rating=5)
+
+    summary = RatingSummary.objects.get(pk=documentaries[0].pk)
+    assert (summary.review_count, summary.average_rating) == (4, 2.5)
+    assert summary.histogram == {1: 1, 2: 1, 3: 1, 4: 1, 5: 0}
+    assert_matches_rebuild()
+
+
+def test_edited_moved_and_deleted_reviews(documentaries, users):
+    reviews = [
+        Review.objects.create(user=user, documentary=documentaries[0], rating=4)
+        for user in users
+    ]
+
+    reviews[0].rating = 1
+    reviews[0].save()
+    # Loaded from the database: the stored rating is known
+    moved = Review.objects.get(pk=reviews[1].pk)
+    moved.documentary = documentaries[1]
+    moved.rating = 2
+    moved.save()
+    reviews[2].delete()
+
+    summary = RatingSummary.objects.get(pk=documentaries[0].pk)
+    assert summary.histogram == {1: 1, 2: 0, 3: 0, 4: 1, 5: 0}
+    assert_matches_rebuild()
+
+
+def test_review_saved_without_loading(documentaries, users):
+    review = Review.objects.create(user=users[0], documentary=documentaries[0], rating=4)
+
+    # The stored rating is unknown, so the summary is recomputed instead
+    Review(
+        pk=review.pk, user=users[0], documentary=documentaries[0], rating=2,
+        created_at=review.created_at,
+    ).save()
+
+    summary = RatingSummary.objects.get(pk=documentaries[0].pk)
+    assert summary.histogram == {1: 0, 2: 1, 3: 0, 4: 0, 5: 0}
+    assert_matches_rebuild()
+
+
+def test_last_review_deleted(documentaries, users):
+    review = Review.objects.create(user=users[0], documentary=documentaries[2], rating=3)
+    review.delete()
+
+    summary = RatingSummary.objects.get(pk=documentaries[2].pk)
+    assert (summary.review_count, summary.average_rating) == (0, None)
+    assert Documentary.objects.get(pk=documentaries[2].pk).rating_score == 0
+    assert_matches_rebuild()
@@ -43,6 +43,7 @@ DJANGO_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -123,6 +124,17 @@ DATABASES = {
 }
 
 
+# =============================================================================
+# Cache
+# Must be shared between workers in production (e.g. redis://localhost:6379/1)
+# so that cache invalidation reaches every process.
+# =============================================================================
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+
 # =============================================================================
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -213,6 +225,7 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/hour",
         "user": "1000/hour",
+        "suggest": "60/minute",
     },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -288,3 +301,59 @@ CORS_ALLOW_CREDENTIALS = True
 # =============================================================================
 
 TMDB_API_KEY = env("TMDB_API_KEY", default="")
+
+
+# =============================================================================
+# Homepage
+# Theme/sport rails shown on the homepage (slugs), precomputed by refresh_rails
+# =============================================================================
+
+HOME_RAILS = {
+    "themes": ["survival", "environment", "expedition"],
+    "sports": [],
+}
+
+# Hero pick weighting: "uniform", "recency" (newer films more often) or
+# "rating" (better rated films more often)
+HERO_WEIGHTING = "uniform"
+
+# Leaving soon / just arrived rails: offers ending within / started within
+# this many days
+LEAVING_SOON_DAYS = 14
+JUST_ARRIVED_DAYS = 14
+
+# Trending scores: an event counts half as much after this many days
+TRENDING_HALF_LIFE_DAYS = 7
+
+# Incremental jobs (update_trending, build_cooccurrence) only read events
+# older than this many seconds: rows are timestamped before their transaction
+# commits, so a newer one may still appear behind the job's watermark
+EVENT_SETTLE_SECONDS = 5 * 60
+
+# Bayesian rating score (top rated rail, ?ordering=score): ratings are
+# averaged with RATING_PRIOR_WEIGHT virtual reviews of RATING_PRIOR_MEAN stars.
+# Run rebuild_rating_summaries after changing them.
+RATING_PRIOR_MEAN = 3.5
+RATING_PRIOR_WEIGHT = 5
+
+
+# =============================================================================
+# Availability
+# Offers are listed for the viewer's country: ?country=, else the GeoIP header
+# set by the CDN/proxy in front of the API, else the region of Accept-Language
+# (fr-BE), else DEFAULT_COUNTRY
+# =============================================================================
+
+GEOIP_COUNTRY_HEADER = env("GEOIP_COUNTRY_HEADER", default="CF-IPCountry")
+DEFAULT_COUNTRY = "FR"
+
+
+# =============================================================================
+# Recommendations
+# Memory-mapped feature matrix behind /api/documentaries/for_you/, shared by
+# all workers of a host (must be on a local filesystem), co-occurrence counts,
+# the spelling dictionary and the semantic search index (manage.py
+# build_spelling_dictionary, build_semantic_index)
+# =============================================================================
+
+RECOMMENDATIONS_DIR = env.path("RECOMMENDATIONS_DIR", default=BASE_DIR / "var" / "recommendations")
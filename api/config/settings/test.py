@@ -2,6 +2,9 @@
 Django test settings for Bivouac.tv API.
 """
 
+import tempfile
+from pathlib import Path
+
 from .base import *  # noqa: F401, F403
 
 # =============================================================================
@@ -25,10 +28,13 @@ PASSWORD_HASHERS = [
 
 # Disable throttling in tests
 REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []  # noqa: F405
-REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {}  # noqa: F405
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {"suggest": None}  # noqa: F405
 
 # Email backend for tests
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 # Disable CSRF for API tests
 MIDDLEWARE = [m for m in MIDDLEWARE if "csrf" not in m.lower()]  # noqa: F405
+
+# Keep recommendation matrices out of the source tree
+RECOMMENDATIONS_DIR = Path(tempfile.gettempdir()) / "bivouac-recommendations"
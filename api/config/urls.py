@@ -29,6 +29,7 @@ def api_root(request):
             },
             "endpoints": {
                 "documentaries": "/api/documentaries/",
+                "search": "/api/search/suggest/",
                 "reviews": "/api/reviews/",
                 "submissions": "/api/submissions/",
                 "auth": "/api/auth/",
@@ -49,6 +50,7 @@ urlpatterns = [
     path("api/", api_root, name="api-root"),
     # App URLs
     path("api/documentaries/", include("apps.documentaries.urls")),
+    path("api/search/", include("apps.documentaries.search_urls")),
     path("api/reviews/", include("apps.reviews.urls")),
     path("api/submissions/", include("apps.submissions.urls")),
     path("api/notifications/", include("apps.notifications.urls")),
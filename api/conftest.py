@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+import pytest
+
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cache versions and cached responses must not leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="alice", email="alice@example.com")
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
@@ -1,12 +1,16 @@
 import axios from 'axios'
+import { expandCompact } from './compact'
 import type {
   AuthTokens,
+  CompactListResponse,
   Documentary,
   DocumentaryFilters,
   DocumentaryListItem,
   FavoriteItem,
   HeroDocumentary,
+  HomeBundle,
   LinkReport,
+  LibraryStateMap,
   LinkSuggestion,
   Notification,
   PaginatedResponse,
@@ -15,6 +19,8 @@ import type {
   Review,
   Sport,
   Submission,
+  Suggestion,
+  TaxonomyBundle,
   Theme,
   User,
   WatchedItem,
@@ -98,8 +104,26 @@ export const documentariesApi = {
   list: (filters?: DocumentaryFilters) =>
     api.get<PaginatedResponse<DocumentaryListItem>>('/documentaries/', { params: filters }),
 
+  // Keyset pagination for infinite scroll: follow `next` links with listPage().
+  // Pages are fetched in the compact columnar format and expanded here.
+  browse: (filters?: DocumentaryFilters) =>
+    api
+      .get<CompactListResponse>('/documentaries/', {
+        // Browse shows the total, so ask for the count on this first page
+        params: { ...filters, pagination: 'cursor', with_count: 1, format: 'compact' },
+      })
+      .then(expandCompact<DocumentaryListItem>),
+
+  listPage: (url: string) =>
+    api.get<CompactListResponse>(url).then(expandCompact<DocumentaryListItem>),
+
   get: (slug: string) => api.get<Documentary>(`/documentaries/${slug}/`),
 
+  related: (slug: string) => api.get<DocumentaryListItem[]>(`/documentaries/${slug}/related/`),
+
+  alsoLiked: (slug: string) =>
+    api.get<DocumentaryListItem[]>(`/documentaries/${slug}/also_liked/`),
+
   featured: () => api.get<DocumentaryListItem[]>('/documentaries/featured/'),
 
   topRated: () => api.get<DocumentaryListItem[]>('/documentaries/top_rated/'),
@@ -116,6 +140,16 @@ export const documentariesApi = {
 
   popular: () => api.get<DocumentaryListItem[]>('/documentaries/popular/'),
 
+  trending: () => api.get<DocumentaryListItem[]>('/documentaries/trending/'),
+
+  leavingSoon: () => api.get<DocumentaryListItem[]>('/documentaries/leaving_soon/'),
+
+  justArrived: () => api.get<DocumentaryListItem[]>('/documentaries/just_arrived/'),
+
+  home: () => api.get<HomeBundle>('/documentaries/home/'),
+
+  forYou: () => api.get<DocumentaryListItem[]>('/documentaries/for_you/'),
+
   addToWatchlist: (slug: string) =>
     api.post(`/documentaries/${slug}/add_to_watchlist/`),
 
@@ -141,6 +175,20 @@ export const taxonomyApi = {
   themes: () => api.get<Theme[]>('/documentaries/themes/'),
   regions: () => api.get<Region[]>('/documentaries/regions/'),
   platforms: () => api.get<Platform[]>('/documentaries/platforms/'),
+  // All four lists at once; requests carrying the current version (?v=)
+  // are served with a one-year immutable Cache-Control
+  bundle: (version?: string) =>
+    api.get<TaxonomyBundle>('/documentaries/taxonomies/', {
+      params: version ? { v: version } : undefined,
+    }),
+}
+
+// Search API
+export const searchApi = {
+  suggest: (q: string) =>
+    api.get<{ query: string; results: Suggestion[]; did_you_mean?: string }>('/search/suggest/', {
+      params: { q },
+    }),
 }
 
 // Watchlist API
@@ -167,6 +215,17 @@ export const favoritesApi = {
   remove: (id: number) => api.delete(`/documentaries/favorites/${id}/`),
 }
 
+// Long ID lists go in a POST body instead of the query string
+const LIBRARY_STATE_GET_MAX_IDS = 100
+
+// Library flags and own rating of a batch of cards
+export const libraryStateApi = {
+  get: (ids: number[]) =>
+    ids.length > LIBRARY_STATE_GET_MAX_IDS
+      ? api.post<LibraryStateMap>('/documentaries/library-state/', { ids })
+      : api.get<LibraryStateMap>('/documentaries/library-state/', { params: { ids: ids.join(',') } }),
+}
+
 // Reviews API
 export const reviewsApi = {
   list: (documentarySlug?: string) =>
@@ -0,0 +1,53 @@
+import type { AxiosResponse } from 'axios'
+import type { CompactListResponse, CursorPaginatedResponse } from '@/types'
+
+// Keys whose values were replaced by IDs, and the lookup table holding them
+const LOOKUP_KEYS: Record<string, string> = { sports: 'sports', platform: 'platforms' }
+
+type Columns = Record<string, unknown>
+type Lookups = CompactListResponse['lookups']
+
+function isColumns(value: unknown): value is Columns {
+  return typeof value === 'object' && value !== null && !Array.isArray(value)
+}
+
+function resolve(value: unknown, table: Record<string, unknown>): unknown {
+  if (value === null) return null
+  if (Array.isArray(value)) return value.map((id) => table[String(id)])
+  return table[String(value)]
+}
+
+// Rebuild the list of objects from a column table (see api renderers.py)
+function fromColumns(columns: Columns, lookups: Lookups): Record<string, unknown>[] {
+  const keys = Object.keys(columns)
+  const rows: Record<string, unknown>[] = []
+
+  for (const key of keys) {
+    const column = columns[key]
+    const values = isColumns(column) ? fromColumns(column, lookups) : (column as unknown[])
+    const table = LOOKUP_KEYS[key] ? lookups[LOOKUP_KEYS[key]] ?? {} : null
+
+    values.forEach((value, index) => {
+      const row = (rows[index] ??= {})
+      if (table) {
+        row[key] = resolve(value, table)
+      } else if (isColumns(value) && !isColumns(column)) {
+        row[key] = fromColumns(value, lookups)
+      } else {
+        row[key] = value
+      }
+    })
+  }
+  return rows
+}
+
+// Turn a ?format=compact list response back into a regular paginated one
+export function expandCompact<T>(
+  response: AxiosResponse<CompactListResponse>
+): AxiosResponse<CursorPaginatedResponse<T>> {
+  const { results, lookups, ...pagination } = response.data
+  return {
+    ...response,
+    data: { ...pagination, results: fromColumns(results, lookups) as T[] },
+  }
+}
@@ -21,6 +21,10 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
   const topRated = ref<DocumentaryListItem[]>([])
   const recent = ref<DocumentaryListItem[]>([])
   const popular = ref<DocumentaryListItem[]>([])
+  const trending = ref<DocumentaryListItem[]>([])
+  const leavingSoon = ref<DocumentaryListItem[]>([])
+  const justArrived = ref<DocumentaryListItem[]>([])
+  const forYou = ref<DocumentaryListItem[]>([])
   const themedCollections = ref<Record<string, DocumentaryListItem[]>>({})
 
   // Taxonomy
@@ -31,7 +35,8 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
 
   // Pagination
   const totalCount = ref(0)
-  const currentPage = ref(1)
+  const correctedSearch = ref<string | null>(null)
+  const nextPageUrl = ref<string | null>(null)
   const hasNext = ref(false)
   const hasPrevious = ref(false)
   const currentFilters = ref<DocumentaryFilters>({})
@@ -49,13 +54,16 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
   async function fetchDocumentaries(filters?: DocumentaryFilters) {
     loading.value = true
     error.value = null
-    currentPage.value = 1
+    nextPageUrl.value = null
+    correctedSearch.value = null
     currentFilters.value = filters || {}
 
     try {
-      const { data } = await documentariesApi.list(filters)
+      const { data } = await documentariesApi.browse(filters)
       documentaries.value = data.results
-      totalCount.value = data.count
+      totalCount.value = data.count ?? data.results.length
+      correctedSearch.value = data.corrected_search ?? null
+      nextPageUrl.value = data.next
       hasNext.value = !!data.next
       hasPrevious.value = !!data.previous
     } catch (err: unknown) {
@@ -66,23 +74,19 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
   }
 
   async function loadMoreDocumentaries() {
-    if (!hasNext.value || loadingMore.value) return
+    if (!hasNext.value || !nextPageUrl.value || loadingMore.value) return
 
     loadingMore.value = true
     error.value = null
-    currentPage.value++
 
     try {
-      const { data } = await documentariesApi.list({
-        ...currentFilters.value,
-        page: currentPage.value,
-      })
+      const { data } = await documentariesApi.listPage(nextPageUrl.value)
       documentaries.value = [...documentaries.value, ...data.results]
+      nextPageUrl.value = data.next
       hasNext.value = !!data.next
       hasPrevious.value = !!data.previous
     } catch (err: unknown) {
       error.value = err instanceof Error ? err.message : 'Failed to load more documentaries'
-      currentPage.value--
     } finally {
       loadingMore.value = false
     }
@@ -138,6 +142,15 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
     }
   }
 
+  async function fetchForYou() {
+    try {
+      const { data } = await documentariesApi.forYou()
+      forYou.value = data
+    } catch {
+      // Silently fail for recommendations
+    }
+  }
+
   async function fetchByTheme(themeSlug: string) {
     try {
       const { data } = await documentariesApi.byTheme(themeSlug)
@@ -156,6 +169,31 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
     }
   }
 
+  async function fetchHome() {
+    try {
+      const { data } = await documentariesApi.home()
+      const cards = (ids: number[]) =>
+        ids.flatMap((id) => data.documentaries[id] ?? [])
+
+      heroDocumentary.value = data.hero
+      featured.value = cards(data.rails.featured)
+      topRated.value = cards(data.rails.top_rated)
+      recent.value = cards(data.rails.recent)
+      popular.value = cards(data.rails.popular)
+      trending.value = cards(data.rails.trending)
+      leavingSoon.value = cards(data.rails.leaving_soon)
+      justArrived.value = cards(data.rails.just_arrived)
+      for (const [slug, ids] of Object.entries(data.rails.themes ?? {})) {
+        themedCollections.value[slug] = cards(ids)
+      }
+      for (const [slug, ids] of Object.entries(data.rails.sports ?? {})) {
+        themedCollections.value[`sport-${slug}`] = cards(ids)
+      }
+    } catch {
+      // Silently fail for home
+    }
+  }
+
   async function fetchHero() {
     try {
       const { data } = await documentariesApi.hero()
@@ -177,16 +215,12 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
 
     const doFetch = async () => {
       try {
-        const [sportsRes, themesRes, regionsRes, platformsRes] = await Promise.all([
-          taxonomyApi.sports(),
-          taxonomyApi.themes(),
-          taxonomyApi.regions(),
-          taxonomyApi.platforms(),
-        ])
-        sports.value = sportsRes.data
-        themes.value = themesRes.data
-        regions.value = regionsRes.data
-        platforms.value = platformsRes.data
+        // Revalidated with ETags, so unchanged taxonomies cost a 304
+        const { data } = await taxonomyApi.bundle()
+        sports.value = data.sports
+        themes.value = data.themes
+        regions.value = data.regions
+        platforms.value = data.platforms
         taxonomyLoaded.value = true
       } catch {
         // Silently fail for taxonomy
@@ -220,6 +254,10 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
       topRated.value = topRated.value.map(updateItem)
       recent.value = recent.value.map(updateItem)
       popular.value = popular.value.map(updateItem)
+      trending.value = trending.value.map(updateItem)
+      leavingSoon.value = leavingSoon.value.map(updateItem)
+      justArrived.value = justArrived.value.map(updateItem)
+      forYou.value = forYou.value.map(updateItem)
       for (const key of Object.keys(themedCollections.value)) {
         const collection = themedCollections.value[key]
         if (collection) {
@@ -257,6 +295,10 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
       topRated.value = topRated.value.map(updateItem)
       recent.value = recent.value.map(updateItem)
       popular.value = popular.value.map(updateItem)
+      trending.value = trending.value.map(updateItem)
+      leavingSoon.value = leavingSoon.value.map(updateItem)
+      justArrived.value = justArrived.value.map(updateItem)
+      forYou.value = forYou.value.map(updateItem)
       for (const key of Object.keys(themedCollections.value)) {
         const collection = themedCollections.value[key]
         if (collection) {
@@ -294,6 +336,10 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
       topRated.value = topRated.value.map(updateItem)
       recent.value = recent.value.map(updateItem)
       popular.value = popular.value.map(updateItem)
+      trending.value = trending.value.map(updateItem)
+      leavingSoon.value = leavingSoon.value.map(updateItem)
+      justArrived.value = justArrived.value.map(updateItem)
+      forYou.value = forYou.value.map(updateItem)
       for (const key of Object.keys(themedCollections.value)) {
         const collection = themedCollections.value[key]
         if (collection) {
@@ -319,12 +365,17 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
     topRated,
     recent,
     popular,
+    trending,
+    leavingSoon,
+    justArrived,
+    forYou,
     themedCollections,
     sports,
     themes,
     regions,
     platforms,
     totalCount,
+    correctedSearch,
     hasNext,
     hasPrevious,
     loading,
@@ -342,6 +393,8 @@ export const useDocumentariesStore = defineStore('documentaries', () => {
     fetchByTheme,
     fetchBySport,
     fetchHero,
+    fetchHome,
+    fetchForYou,
     fetchTaxonomy,
     toggleWatchlist,
     toggleWatched,
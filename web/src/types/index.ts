@@ -228,6 +228,74 @@ export interface PaginatedResponse<T> {
   results: T[]
 }
 
+// Keyset pagination (?pagination=cursor): count is only sent on the first page, with ?with_count=1
+export interface CursorPaginatedResponse<T> {
+  count?: number
+  next: string | null
+  previous: string | null
+  results: T[]
+  // Set when ?search= found nothing and the results are for this spelling instead
+  corrected_search?: string
+}
+
+// Typeahead suggestion (/search/suggest/)
+export interface Suggestion {
+  type: 'documentary' | 'person' | 'sport' | 'theme' | 'region'
+  id: number
+  slug: string
+  label: string
+  year?: number | null
+}
+
+// Taxonomy bundle (/documentaries/taxonomies/)
+export interface TaxonomyBundle {
+  version: string
+  sports: Sport[]
+  themes: Theme[]
+  regions: Region[]
+  platforms: Platform[]
+}
+
+// Compact columnar list (?format=compact): one array per field, sports and
+// platforms replaced by IDs into the lookup tables
+export interface CompactListResponse {
+  count?: number
+  next: string | null
+  previous: string | null
+  corrected_search?: string
+  results: Record<string, unknown>
+  lookups: Record<string, Record<string, unknown>>
+}
+
+// Personal state of cards (/documentaries/library-state/), keyed by documentary ID
+export interface LibraryState {
+  is_in_watchlist: boolean
+  is_watched: boolean
+  is_favorited: boolean
+  rating: number | null
+}
+
+export type LibraryStateMap = Record<string, LibraryState>
+
+// Homepage bundle (/documentaries/home/): rails reference cards by ID
+export interface HomeRails {
+  featured: number[]
+  top_rated: number[]
+  recent: number[]
+  popular: number[]
+  trending: number[]
+  leaving_soon: number[]
+  just_arrived: number[]
+  themes?: Record<string, number[]>
+  sports?: Record<string, number[]>
+}
+
+export interface HomeBundle {
+  hero: HeroDocumentary | null
+  rails: HomeRails
+  documentaries: Record<string, DocumentaryListItem>
+}
+
 export interface AuthTokens {
   access: string
   refresh: string
@@ -236,10 +304,14 @@ export interface AuthTokens {
 // Filter types
 export interface DocumentaryFilters {
   search?: string
+  // Synopses closest in meaning to the text (LSA), instead of keyword search
+  semantic?: string
   sport?: string
   theme?: string
   region?: string
+  director?: string
   platform?: string
+  country?: string
   year_min?: number
   year_max?: number
   duration_min?: number
@@ -248,4 +320,5 @@ export interface DocumentaryFilters {
   is_featured?: boolean
   ordering?: string
   page?: number
+  pagination?: 'cursor'
 }